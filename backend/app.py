@@ -1,21 +1,320 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, has_app_context, Response
 from flask_cors import CORS
-from werkzeug.security import check_password_hash, generate_password_hash
 import mysql.connector
+import base64
+import io
+import json
+import os
+import secrets
+import threading
+import time
+from functools import wraps
 from datetime import datetime, timedelta
 from datetime import datetime
 
+from db_pool import ConnectionPool
+from catalog_cache import CatalogCache
+from search_index import ProductSearchIndex
+from associations import (
+    bump_association_version, load_association_counts, load_association_version, record_order_associations,
+)
+from association_engine import AssociationEngine
+from rollups import record_order_rollups
+from query_executor import ParallelQueryExecutor, QueryDeadlineExceeded, server_timing_header
+from instrumentation import InstrumentedCursor, Metrics, RequestStats, current_request_stats
+from query_profiler import QueryProfiler
+from carts import CartIdCache, UnknownProduct, add_cart_items, resolve_cart_id
+from auth import InvalidToken, PasswordHasher, SessionTokens
+from hash_pool import HashPool, HashPoolBusy
+from product_io import CONTENT_TYPES, ProductImport, export_products, import_products, iter_records
+from stock import (
+    BulkStockRejected, InsufficientStock, NegativeStock, ProductNotFound,
+    adjust_product_stock, apply_stock_deltas, merge_order_lines, reserve_stock, with_deadlock_retry,
+)
+
 app = Flask(__name__)
 CORS(app)
 
+# ---------- DB CONFIG ----------
+DB_CONFIG = {
+    "host": os.environ.get("DB_HOST", "localhost"),
+    "user": os.environ.get("DB_USER", "root"),
+    "password": os.environ.get("DB_PASS", ""),   # update if needed
+    "database": os.environ.get("DB_NAME", "supershop"),
+}
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_POOL_MAX_OVERFLOW = int(os.environ.get("DB_POOL_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+DB_POOL_IDLE_TIMEOUT = float(os.environ.get("DB_POOL_IDLE_TIMEOUT", 300))
+CATALOG_CACHE_SIZE = int(os.environ.get("CATALOG_CACHE_SIZE", 512))
+CATALOG_CACHE_TTL = float(os.environ.get("CATALOG_CACHE_TTL", 60))
+# seconds before the search/barcode index is rebuilt from the table (0 = never);
+# other workers' writes only reach this one's index through the rebuild
+SEARCH_INDEX_REFRESH = float(os.environ.get("SEARCH_INDEX_REFRESH", 60))
+ANALYTICS_WORKERS = int(os.environ.get("ANALYTICS_WORKERS", 8))
+ANALYTICS_DEADLINE = float(os.environ.get("ANALYTICS_DEADLINE", 10))
+CART_ID_CACHE_SIZE = int(os.environ.get("CART_ID_CACHE_SIZE", 50000))
+# set SESSION_SECRET so tokens survive restarts and work across servers
+SESSION_SECRET = os.environ.get("SESSION_SECRET") or secrets.token_hex(32)
+SESSION_TTL = int(os.environ.get("SESSION_TTL", 12 * 3600))
+SESSION_REVOKED_MAX = int(os.environ.get("SESSION_REVOKED_MAX", 100000))
+# e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000"; unset = werkzeug default
+PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD") or None
+# password hashing processes per web worker (0 = hash on the request thread)
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS", 2))
+HASH_QUEUE_SIZE = int(os.environ.get("HASH_QUEUE_SIZE", 16))
+HASH_TIMEOUT = float(os.environ.get("HASH_TIMEOUT", 10))
+SLOW_REQUEST_SECONDS = float(os.environ.get("SLOW_REQUEST_SECONDS", 1.0))
+SLOW_REQUEST_QUERIES = int(os.environ.get("SLOW_REQUEST_QUERIES", 25))
+SLOW_QUERY_SECONDS = float(os.environ.get("SLOW_QUERY_SECONDS", 0.1))
+QUERY_PROFILE_PATH = os.environ.get("QUERY_PROFILE_PATH")
+QUERY_PROFILE_INTERVAL = float(os.environ.get("QUERY_PROFILE_INTERVAL", 60))
+# -------------------------------
+
+db_pool = ConnectionPool(
+    lambda: mysql.connector.connect(**DB_CONFIG),
+    size=DB_POOL_SIZE,
+    max_overflow=DB_POOL_MAX_OVERFLOW,
+    timeout=DB_POOL_TIMEOUT,
+    idle_timeout=DB_POOL_IDLE_TIMEOUT,
+)
+
+# Per-fingerprint statement stats; slow statements get an EXPLAIN sample
+query_profiler = QueryProfiler(
+    db_pool.acquire,
+    explain_threshold=SLOW_QUERY_SECONDS,
+    report_path=QUERY_PROFILE_PATH,
+    report_interval=QUERY_PROFILE_INTERVAL,
+)
+db_pool.cursor_wrapper = lambda cursor: InstrumentedCursor(
+    cursor, on_query=query_profiler.record, on_rows=query_profiler.record_rows
+)
+
+# Fans independent analytics queries out over pooled connections
+analytics_executor = ParallelQueryExecutor(db_pool, max_workers=ANALYTICS_WORKERS)
+
 # MAIN DB CONNECTION
+# Connections come from the pool; conn.close() hands them back. Inside a
+# request every checkout is also tracked on `g` so a route that bails out
+# early can't leak its connection.
 def get_db_connection():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="",   # update if needed
-        database="supershop"
-    )
+    start = time.perf_counter()
+    conn = db_pool.acquire()
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.record_pool_wait(time.perf_counter() - start)
+    if has_app_context():
+        g.setdefault("db_conns", []).append(conn)
+    return conn
+
+@app.teardown_appcontext
+def release_db_connections(exc):
+    for conn in g.pop("db_conns", []):
+        conn.close()
+
+# ---------------------
+# SESSIONS
+# ---------------------
+password_hasher = HashPool(PasswordHasher(PASSWORD_HASH_METHOD), workers=HASH_WORKERS,
+                           max_pending=HASH_QUEUE_SIZE, timeout=HASH_TIMEOUT)
+session_tokens = SessionTokens(SESSION_SECRET, ttl=SESSION_TTL, max_revoked=SESSION_REVOKED_MAX)
+
+# "Authorization: Bearer <token>" is checked on every request without a DB
+# hit; g.session holds the claims (uid, role, exp, jti) or None. A bad token
+# only fails routes that require a session, so /login still works with a
+# stale one.
+@app.before_request
+def load_session():
+    g.session = None
+    g.session_error = None
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        try:
+            g.session = session_tokens.verify(header[7:].strip())
+        except InvalidToken as e:
+            g.session_error = str(e)
+
+# The role claim in a token lives as long as the token, so role checks read
+# the users table instead: a demoted admin loses access on the next request.
+def current_role(user_id):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT role FROM users WHERE user_id = %s", (user_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    finally:
+        cursor.close()
+        conn.close()
+
+def login_required(role=None):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if g.session is None:
+                message = g.session_error or "Authentication required"
+                return jsonify({"success": False, "message": message}), 401
+            if role is not None and current_role(g.session["uid"]) != role:
+                return jsonify({"success": False, "message": "Forbidden"}), 403
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def hash_pool_busy(e):
+    response = jsonify({"success": False, "message": str(e)})
+    response.headers["Retry-After"] = "1"
+    return response, 429
+
+def session_response(user_id, role):
+    token, expires_at = session_tokens.issue(user_id, role)
+    return {"token": token, "expires_at": expires_at}
+
+# Upgrade a hash made with an older method or cost; the login already
+# succeeded, so a failure here (including a busy hash pool) is only logged.
+def rehash_password(user_id, stored_hash, password):
+    try:
+        new_hash = password_hasher.hash(password)
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                UPDATE users SET password_hash = %s
+                WHERE user_id = %s AND password_hash = %s
+            """, (new_hash, user_id, stored_hash))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+    except Exception as e:
+        app.logger.warning("Password rehash failed for user %s: %s", user_id, e)
+
+# ---------------------
+# DB POOL METRICS
+# ---------------------
+@app.get("/admin/db-pool")
+@login_required(role="admin")
+def get_db_pool_stats():
+    return jsonify({"success": True, "pool": db_pool.stats()})
+
+# ---------------------
+# REQUEST METRICS
+# ---------------------
+metrics = Metrics()
+
+@app.before_request
+def start_request_stats():
+    g.request_stats = RequestStats()
+    g.request_stats_token = current_request_stats.set(g.request_stats)
+
+# Route labels use the URL rule ("/user/<int:user_id>/orders"), not the raw
+# path, so per-user URLs don't explode the series count.
+@app.after_request
+def record_request_stats(response):
+    stats = g.get("request_stats")
+    if stats is None:
+        return response
+
+    duration = time.perf_counter() - stats.started
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    slow = duration > SLOW_REQUEST_SECONDS or len(stats.queries) > SLOW_REQUEST_QUERIES
+    metrics.observe_request(route, request.method, response.status_code, stats, duration, slow)
+
+    if slow:
+        lines = [
+            f"  {seconds * 1000:8.1f}ms rows={rows:<6} {' '.join(sql.split())[:200]}"
+            for sql, seconds, rows in stats.queries
+        ]
+        app.logger.warning(
+            "Slow request %s %s: %.1fms, %d queries, %.1fms in DB, %.1fms pool wait\n%s",
+            request.method, request.full_path.rstrip("?"), duration * 1000, len(stats.queries),
+            stats.db_time * 1000, stats.pool_wait * 1000, "\n".join(lines),
+        )
+    return response
+
+@app.teardown_request
+def clear_request_stats(exc):
+    token = g.pop("request_stats_token", None)
+    if token is not None:
+        current_request_stats.reset(token)
+
+@app.get("/metrics")
+def get_metrics():
+    pool = db_pool.stats()
+    cache = catalog_cache.stats()
+    hashing = password_hasher.stats()
+    gauges = [
+        ("db_pool_open_connections", "Connections currently open.", pool["open"]),
+        ("db_pool_idle_connections", "Connections idle in the pool.", pool["idle"]),
+        ("db_pool_in_use_connections", "Connections checked out.", pool["in_use"]),
+        ("catalog_cache_entries", "Entries in the catalog cache.", cache["entries"]),
+        ("password_hash_in_flight", "Password hashes running or queued.", hashing["in_flight"]),
+    ]
+    counters = [
+        ("db_pool_checkouts_total", "Connections handed out since start.", pool["checkouts"]),
+        ("db_pool_waits_total", "Checkouts that had to wait for a free connection.", pool["waits"]),
+        ("db_pool_timeouts_total", "Checkouts that gave up waiting.", pool["timeouts"]),
+        ("catalog_cache_hits_total", "Catalog cache hits since start.", cache["hits"]),
+        ("catalog_cache_misses_total", "Catalog cache misses since start.", cache["misses"]),
+        ("password_hash_rejected_total", "Password hashes refused with 429 since start.", hashing["rejected"]),
+        ("password_hash_timeouts_total", "Password hashes that exceeded HASH_TIMEOUT.", hashing["timeouts"]),
+    ]
+    return Response(metrics.render(gauges, counters), mimetype="text/plain; version=0.0.4")
+
+@app.get("/admin/query-profile")
+@login_required(role="admin")
+def get_query_profile():
+    try:
+        top = max(1, min(int(request.args.get("top", 20)), 200))
+    except ValueError:
+        return jsonify({"success": False, "message": "top must be an integer"}), 400
+    return jsonify({"success": True, "profile": query_profiler.report(top)})
+
+@app.delete("/admin/query-profile")
+@login_required(role="admin")
+def reset_query_profile():
+    query_profiler.reset()
+    return jsonify({"success": True})
+
+# ---------------------
+# CATALOG CACHE
+# ---------------------
+catalog_cache = CatalogCache(max_entries=CATALOG_CACHE_SIZE, ttl=CATALOG_CACHE_TTL)
+
+# Cache a read-only catalog route under `namespace`. Successful responses are
+# kept per full request path (so query strings get their own entry) and carry
+# an ETag; a matching If-None-Match gets a 304 without running the view.
+# Writers call catalog_cache.invalidate() with the namespaces they affect.
+def catalog_cached(namespace):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            request_key = request.full_path
+            etag = catalog_cache.etag(namespace, request_key)
+
+            if etag in request.if_none_match:
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+
+            key = catalog_cache.key(namespace, request_key)
+            cached = catalog_cache.get(key)
+            if cached is None:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                cached = response.get_data()
+                catalog_cache.set(key, cached)
+
+            response = Response(cached, mimetype="application/json")
+            response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
+
+@app.get("/admin/catalog-cache")
+@login_required(role="admin")
+def get_catalog_cache_stats():
+    return jsonify({"success": True, "cache": catalog_cache.stats()})
 
 # ---------------------
 # LOGIN ROUTE
@@ -45,6 +344,7 @@ def login():
 
     user = cursor.fetchone()
 
+    # give the connection back before the (slow) hash check
     cursor.close()
     conn.close()
 
@@ -53,24 +353,23 @@ def login():
 
     stored_hash = user[5]
     
-    # Add debug logging
-    print(f"DEBUG: Email: {email}")
-    print(f"DEBUG: Stored hash: {stored_hash}")
-    print(f"DEBUG: Hash length: {len(stored_hash) if stored_hash else 0}")
-    
     # Check if hash is empty or invalid
     if not stored_hash:
         return jsonify({"success": False, "message": "Invalid password configuration. Please contact admin."}), 400
     
     try:
-        if not check_password_hash(stored_hash, password):
+        if not password_hasher.verify(stored_hash, password):
             return jsonify({"success": False, "message": "Incorrect password"}), 400
+    except HashPoolBusy as e:
+        return hash_pool_busy(e)
     except ValueError as e:
         # Handle invalid hash format
-        print(f"ERROR: Invalid hash format for user {email}: {str(e)}")
+        app.logger.error("Invalid hash format for user %s: %s", email, e)
         return jsonify({"success": False, "message": "Password verification error. Please contact admin."}), 400
 
-    # Rest of your code...
+    if password_hasher.needs_rehash(stored_hash):
+        rehash_password(user[0], stored_hash, password)
+
     user_data = {
         "user_id": user[0],
         "name": user[1],
@@ -80,14 +379,27 @@ def login():
         "role": user[7]
     }
 
-    print(f"Login successful for {email}, role: {user[7]}")
-
     return jsonify({
         "success": True,
         "user": user_data,
-        "token": "demo-token"
+        **session_response(user[0], user[7])
     }), 200
 
+@app.post("/logout")
+@login_required()
+def logout():
+    session_tokens.revoke(g.session)
+    return jsonify({"success": True, "message": "Logged out"})
+
+@app.get("/session")
+@login_required()
+def get_session():
+    return jsonify({"success": True, "session": {
+        "user_id": g.session["uid"],
+        "role": g.session["role"],
+        "expires_at": g.session["exp"]
+    }})
+
 
 # ---------------------
 # REGISTER ROUTE
@@ -105,6 +417,12 @@ def register_user():
     if not (name and email and password):
         return jsonify({"success": False, "message": "Missing required fields"}), 400
 
+    # hash before taking a connection, so slow hashing can't tie up the pool
+    try:
+        password_hash = password_hasher.hash(password)
+    except HashPoolBusy as e:
+        return hash_pool_busy(e)
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
@@ -116,8 +434,6 @@ def register_user():
         conn.close()
         return jsonify({"success": False, "message": "Email already registered"}), 400
 
-    password_hash = generate_password_hash(password)
-
     cursor.execute("""
         INSERT INTO users (name, email, phone, address, password_hash, role)
         VALUES (%s, %s, %s, %s, %s, 'user')
@@ -139,7 +455,8 @@ def register_user():
             "phone": phone,
             "address": address,
             "role": "user"
-        }
+        },
+        **session_response(new_id, "user")
     }), 200
 
     # ---------------------
@@ -214,35 +531,351 @@ def update_user_profile(user_id):
 # ---------------------
 # GET ALL PRODUCTS
 # ---------------------
+# Columns /products can return (?fields=) and sort on (?sort=, "-" = desc)
+PRODUCT_FIELDS = {
+    "id": "p.product_id",
+    "barcode": "p.barcode",
+    "name": "p.name",
+    "description": "p.description",
+    "price": "p.price",
+    "stock": "p.stock",
+    "category": "c.name",
+}
+PRODUCT_SORT_KEYS = {"id", "name", "price", "stock"}
+PRODUCTS_MAX_LIMIT = 200
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(token):
+    return json.loads(base64.urlsafe_b64decode(token.encode()))
+
+
+def parse_product_query(args):
+    """Turn /products query args into SQL pieces; raises ValueError on bad input."""
+    where = []
+    params = []
+
+    category = args.get('category')
+    if category:
+        where.append("c.name = %s")
+        params.append(category)
+
+    category_id = args.get('category_id')
+    if category_id:
+        where.append("p.category_id = %s")
+        params.append(int(category_id))
+
+    min_price = args.get('min_price')
+    if min_price:
+        where.append("p.price >= %s")
+        params.append(float(min_price))
+
+    max_price = args.get('max_price')
+    if max_price:
+        where.append("p.price <= %s")
+        params.append(float(max_price))
+
+    if args.get('in_stock', '').lower() in ('1', 'true', 'yes'):
+        where.append("p.stock > 0")
+
+    sort = args.get('sort', 'id')
+    descending = sort.startswith('-')
+    sort_key = sort.lstrip('-')
+    if sort_key not in PRODUCT_SORT_KEYS:
+        raise ValueError(f"Unsupported sort key '{sort_key}'")
+
+    fields = args.get('fields')
+    if fields:
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = [f for f in fields if f not in PRODUCT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    else:
+        fields = list(PRODUCT_FIELDS)
+
+    return where, params, sort_key, descending, fields
+
+
+def plan_products_query(args):
+    """
+    Validate /products args and build its COUNT and page queries.
+
+    Shared by the Flask route and the async read path (asgi.py); raises
+    ValueError on bad input.
+    """
+    where, params, sort_key, descending, fields = parse_product_query(args)
+    limit = args.get('limit', type=int)
+    cursor_token = args.get('cursor')
+    cursor_values = decode_cursor(cursor_token) if cursor_token else None
+    if cursor_values is not None and (not isinstance(cursor_values, list) or len(cursor_values) != 2):
+        raise ValueError("Invalid cursor")
+
+    if limit is not None:
+        limit = max(1, min(limit, PRODUCTS_MAX_LIMIT))
+
+    # The sort column and id are always selected so the next cursor can be built
+    select_fields = list(dict.fromkeys(fields + [sort_key, "id"]))
+    select_sql = ",\n            ".join(f"{PRODUCT_FIELDS[f]} AS {f}" for f in select_fields)
+    join_sql = "LEFT JOIN categories c ON p.category_id = c.category_id"
+    sort_col = PRODUCT_FIELDS[sort_key]
+    direction = "DESC" if descending else "ASC"
+
+    filter_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    count_sql = f"""
+        SELECT COUNT(*) AS total
+        FROM products p
+        {join_sql}
+        {filter_sql}
+    """
+
+    page_where = list(where)
+    page_params = list(params)
+    if cursor_values is not None:
+        last_sort, last_id = cursor_values
+        op = "<" if descending else ">"
+        if sort_key == "id":
+            page_where.append(f"p.product_id {op} %s")
+            page_params.append(last_id)
+        else:
+            page_where.append(f"({sort_col} {op} %s OR ({sort_col} = %s AND p.product_id {op} %s))")
+            page_params.extend([last_sort, last_sort, last_id])
+
+    page_filter_sql = f"WHERE {' AND '.join(page_where)}" if page_where else ""
+    page_sql = f"""
+        SELECT 
+        {select_sql}
+        FROM products p
+        {join_sql}
+        {page_filter_sql}
+        ORDER BY {sort_col} {direction}, p.product_id {direction}
+    """
+    if limit is not None:
+        page_sql += " LIMIT %s"
+        page_params.append(limit + 1)
+
+    return {
+        "count_sql": count_sql,
+        "count_params": params,
+        "page_sql": page_sql,
+        "page_params": page_params,
+        "limit": limit,
+        "sort_key": sort_key,
+        "fields": fields,
+        "select_fields": select_fields,
+    }
+
+
+def products_page(plan, total, products):
+    next_cursor = None
+    limit = plan["limit"]
+    if limit is not None and len(products) > limit:
+        products = products[:limit]
+        last = products[-1]
+        next_cursor = encode_cursor([last[plan["sort_key"]], last["id"]])
+
+    extra = set(plan["select_fields"]) - set(plan["fields"])
+    if extra:
+        for product in products:
+            for key in extra:
+                del product[key]
+
+    return {
+        "success": True,
+        "products": products,
+        "total": total,
+        "next_cursor": next_cursor
+    }
+
+
 @app.get("/products")
+@catalog_cached("products")
 def get_products():
+    # Without paging args the whole catalog is returned, as before. With
+    # ?limit=N the response carries `next_cursor` for the following page.
+    try:
+        plan = plan_products_query(request.args)
+    except (ValueError, TypeError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
-    cursor.execute("""
-        SELECT 
-            p.product_id AS id,
-            p.barcode,
-            p.name,
-            p.description,
-            p.price,
-            p.stock,
-            c.name as category
-        FROM products p
-        LEFT JOIN categories c ON p.category_id = c.category_id
-    """)
+    try:
+        cursor.execute(plan["count_sql"], plan["count_params"])
+        total = cursor.fetchone()['total']
 
-    products = cursor.fetchall()
+        cursor.execute(plan["page_sql"], plan["page_params"])
+        products = cursor.fetchall()
 
-    cursor.close()
-    conn.close()
+        return jsonify(products_page(plan, total, products))
 
-    return jsonify({"success": True, "products": products})
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+# ---------------------
+# PRODUCT SEARCH
+# ---------------------
+CATALOG_PRODUCT_SQL = """
+    SELECT 
+        p.product_id AS id,
+        p.barcode,
+        p.name,
+        p.description,
+        p.price,
+        p.stock,
+        c.name as category
+    FROM products p
+    LEFT JOIN categories c ON p.category_id = c.category_id
+"""
+
+search_index = ProductSearchIndex()
+search_index_lock = threading.Lock()
+
+
+def catalog_row(row):
+    return dict(row, price=float(row['price']) if row['price'] is not None else None)
+
+
+def fetch_catalog_product(cursor, product_id):
+    cursor.execute(CATALOG_PRODUCT_SQL + " WHERE p.product_id = %s", (product_id,))
+    row = cursor.fetchone()
+    return catalog_row(row) if row else None
+
+
+# Built from the products table on first use (or by warm-up); add_product,
+# update_product_stock and create_order keep it current in this worker.
+# Writes handled by other workers are picked up by a rebuild every
+# SEARCH_INDEX_REFRESH seconds, run in the background while the old index
+# keeps serving.
+search_index_refreshing = threading.Event()
+
+def build_search_index():
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(CATALOG_PRODUCT_SQL)
+        search_index.build(catalog_row(row) for row in cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+def refresh_search_index():
+    try:
+        build_search_index()
+    except Exception as e:
+        app.logger.warning("Search index refresh failed: %s", e)
+    finally:
+        search_index_refreshing.clear()
+
+def load_search_index():
+    if search_index.ready:
+        if SEARCH_INDEX_REFRESH > 0 and not search_index_refreshing.is_set() \
+                and time.monotonic() - search_index.built_at > SEARCH_INDEX_REFRESH:
+            search_index_refreshing.set()
+            threading.Thread(target=refresh_search_index, name="search-index-refresh", daemon=True).start()
+        return
+    with search_index_lock:
+        if not search_index.ready:
+            build_search_index()
+
+
+@app.get("/products/search")
+def search_products():
+    query = request.args.get('q', '').strip()
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    in_stock = request.args.get('in_stock', '').lower() in ('1', 'true', 'yes')
+
+    if not query:
+        return jsonify({"success": False, "message": "Query parameter 'q' is required"}), 400
+
+    try:
+        load_search_index()
+        results = search_index.search(query, limit=limit, in_stock=in_stock)
+        return jsonify({"success": True, "query": query, "products": results})
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+# ---------------------
+# BARCODE LOOKUP (POS SCANNING)
+# ---------------------
+BARCODE_BULK_MAX = 500
+
+# Served from the search index's barcode map; a miss falls back to the
+# database in case another worker added the product.
+def lookup_barcodes(barcodes):
+    load_search_index()
+    found = {}
+    missing = []
+    for code in barcodes:
+        product = search_index.by_barcode(code)
+        if product is not None:
+            found[code] = product
+        else:
+            missing.append(code)
+
+    if missing:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            placeholders = ", ".join(["%s"] * len(missing))
+            cursor.execute(CATALOG_PRODUCT_SQL + f" WHERE p.barcode IN ({placeholders})", missing)
+            for row in cursor.fetchall():
+                product = catalog_row(row)
+                search_index.add(product)
+                found[product['barcode']] = product
+        finally:
+            cursor.close()
+            conn.close()
+
+    return found
+
+
+@app.get("/products/barcode/<code>")
+def get_product_by_barcode(code):
+    try:
+        product = lookup_barcodes([code]).get(code)
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    if product is None:
+        return jsonify({"success": False, "message": "Product not found"}), 404
+    return jsonify({"success": True, "product": product})
+
+
+@app.post("/products/barcode/bulk")
+def get_products_by_barcodes():
+    data = request.json or {}
+    barcodes = data.get('barcodes')
+
+    if not isinstance(barcodes, list) or not barcodes:
+        return jsonify({"success": False, "message": "'barcodes' must be a non-empty list"}), 400
+    if len(barcodes) > BARCODE_BULK_MAX:
+        return jsonify({"success": False, "message": f"At most {BARCODE_BULK_MAX} barcodes per request"}), 400
+
+    barcodes = [str(code) for code in barcodes]
+    try:
+        found = lookup_barcodes(list(dict.fromkeys(barcodes)))
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    return jsonify({
+        "success": True,
+        "products": {code: found.get(code) for code in barcodes},
+        "missing": [code for code in barcodes if code not in found]
+    })
 
 # ---------------------
 # GET POPULAR PRODUCTS
 # ---------------------
 @app.get("/popular-products")
+@catalog_cached("popular")
 def get_popular_products():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -283,81 +916,152 @@ def get_popular_products():
 # ---------------------
 # GET USER ORDERS WITH COMPLETE DETAILS
 # ---------------------
+ORDER_ITEMS_SQL = """
+    SELECT 
+        oi.order_id,
+        oi.order_item_id,
+        oi.product_id,
+        oi.quantity,
+        oi.price,
+        p.name,
+        p.description,
+        p.barcode,
+        c.name as category
+    FROM order_items oi
+    JOIN products p ON oi.product_id = p.product_id
+    LEFT JOIN categories c ON p.category_id = c.category_id
+    WHERE oi.order_id IN ({placeholders})
+    ORDER BY oi.order_id, oi.order_item_id
+"""
+
+
+def plan_orders_query(user_id, args):
+    """
+    Build the orders query for /user/<id>/orders; raises ValueError.
+
+    Optional keyset pagination: ?limit=N returns the N newest orders,
+    ?before=<created_at>&before_id=<order_id> continues after the last
+    order of the previous page (pass back `next_cursor`).
+    """
+    limit = args.get('limit', type=int)
+    before = args.get('before')
+    before_id = args.get('before_id', type=int)
+
+    if args.get('before_id') and before_id is None:
+        raise ValueError("'before_id' must be an integer")
+    # half a cursor would silently restart from the first page
+    if bool(before) != (before_id is not None):
+        raise ValueError("'before' and 'before_id' must be given together")
+
+    if limit is not None:
+        limit = max(1, min(limit, 200))
+
+    where = ["o.user_id = %s"]
+    params = [user_id]
+
+    if before:
+        try:
+            before_ts = datetime.fromisoformat(before)
+        except ValueError:
+            raise ValueError("Invalid 'before' timestamp") from None
+        where.append("(o.created_at < %s OR (o.created_at = %s AND o.order_id < %s))")
+        params.extend([before_ts, before_ts, before_id])
+
+    query = f"""
+        SELECT 
+            o.order_id,
+            o.total,
+            o.status,
+            o.created_at,
+            pa.method as payment_method
+        FROM orders o
+        LEFT JOIN payments pa ON o.order_id = pa.order_id
+        WHERE {' AND '.join(where)}
+        ORDER BY o.created_at DESC, o.order_id DESC
+    """
+    if limit is not None:
+        # fetch one extra row to know whether another page exists
+        query += " LIMIT %s"
+        params.append(limit + 1)
+
+    return query, params, limit
+
+
+def order_items_query(order_ids):
+    placeholders = ", ".join(["%s"] * len(order_ids))
+    return ORDER_ITEMS_SQL.format(placeholders=placeholders), list(order_ids)
+
+
+def format_orders(orders, limit):
+    """Trim the page and shape order rows; returns (formatted, by_id, next_cursor)."""
+    next_cursor = None
+    if limit is not None and len(orders) > limit:
+        orders = orders[:limit]
+        last = orders[-1]
+        next_cursor = {
+            "before": last['created_at'].isoformat() if last['created_at'] else None,
+            "before_id": last['order_id']
+        }
+
+    formatted_orders = []
+    by_id = {}
+    for order in orders:
+        formatted = {
+            "id": order['order_id'],
+            "total": float(order['total']),
+            "status": order['status'],
+            "created_at": order['created_at'].isoformat() if order['created_at'] else None,
+            "payment_method": order['payment_method'] or 'card',
+            "items": [],
+            "total_items": 0
+        }
+        formatted_orders.append(formatted)
+        by_id[order['order_id']] = formatted
+
+    return formatted_orders, by_id, next_cursor
+
+
+def attach_order_item(by_id, item):
+    order = by_id[item['order_id']]
+    price = float(item['price'])
+    order["items"].append({
+        "id": item['product_id'],
+        "order_item_id": item['order_item_id'],
+        "name": item['name'],
+        "description": item['description'],
+        "price": price,
+        "quantity": item['quantity'],
+        "barcode": item['barcode'],
+        "category": item['category'],
+        "subtotal": price * item['quantity']
+    })
+    order["total_items"] += item['quantity']
+
+
 @app.get("/user/<int:user_id>/orders")
 def get_user_orders(user_id):
+    try:
+        query, params, limit = plan_orders_query(user_id, request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     
     try:
-        # First, get all orders for the user
-        cursor.execute("""
-            SELECT 
-                o.order_id,
-                o.total,
-                o.status,
-                o.created_at,
-                pa.method as payment_method
-            FROM orders o
-            LEFT JOIN payments pa ON o.order_id = pa.order_id
-            WHERE o.user_id = %s
-            ORDER BY o.created_at DESC
-        """, (user_id,))
-        
-        orders = cursor.fetchall()
-        
-        formatted_orders = []
-        
-        for order in orders:
-            # Get order items for this order
-            cursor.execute("""
-                SELECT 
-                    oi.order_item_id,
-                    oi.product_id,
-                    oi.quantity,
-                    oi.price,
-                    p.name,
-                    p.description,
-                    p.barcode,
-                    c.name as category
-                FROM order_items oi
-                JOIN products p ON oi.product_id = p.product_id
-                LEFT JOIN categories c ON p.category_id = c.category_id
-                WHERE oi.order_id = %s
-            """, (order['order_id'],))
-            
-            order_items = cursor.fetchall()
-            
-            # Format items
-            items = []
-            for item in order_items:
-                items.append({
-                    "id": item['product_id'],
-                    "order_item_id": item['order_item_id'],
-                    "name": item['name'],
-                    "description": item['description'],
-                    "price": float(item['price']),
-                    "quantity": item['quantity'],
-                    "barcode": item['barcode'],
-                    "category": item['category'],
-                    "subtotal": float(item['price']) * item['quantity']
-                })
-            
-            # Calculate total items count
-            total_items = sum(item['quantity'] for item in items)
-            
-            formatted_orders.append({
-                "id": order['order_id'],
-                "total": float(order['total']),
-                "status": order['status'],
-                "created_at": order['created_at'].isoformat() if order['created_at'] else None,
-                "payment_method": order['payment_method'] or 'card',
-                "items": items,
-                "total_items": total_items
-            })
+        cursor.execute(query, params)
+        formatted_orders, by_id, next_cursor = format_orders(cursor.fetchall(), limit)
+
+        if by_id:
+            # One query for the items of every order on this page
+            cursor.execute(*order_items_query(by_id))
+            for item in cursor:
+                attach_order_item(by_id, item)
         
         return jsonify({
             "success": True,
-            "orders": formatted_orders
+            "orders": formatted_orders,
+            "next_cursor": next_cursor
         })
         
     except Exception as e:
@@ -369,20 +1073,23 @@ def get_user_orders(user_id):
 # ---------------------
 # GET ALL CATEGORIES
 # ---------------------
+CATEGORIES_SQL = """
+    SELECT 
+        category_id as id,
+        name,
+        description
+    FROM categories
+    ORDER BY name
+"""
+
 @app.get("/categories")
+@catalog_cached("categories")
 def get_categories():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     
     try:
-        cursor.execute("""
-            SELECT 
-                category_id as id,
-                name,
-                description
-            FROM categories
-            ORDER BY name
-        """)
+        cursor.execute(CATEGORIES_SQL)
         
         categories = cursor.fetchall()
         
@@ -397,13 +1104,26 @@ def get_categories():
         cursor.close()
         conn.close()
 
-
-
-
-
 # ---------------------
 # GET USER CART
 # ---------------------
+CART_ITEMS_SQL = """
+    SELECT 
+        ci.cart_item_id,
+        ci.quantity,
+        p.product_id AS id,
+        p.name,
+        p.description,
+        p.price,
+        p.stock
+    FROM cart_items ci
+    JOIN products p ON ci.product_id = p.product_id
+    WHERE ci.cart_id = %s
+"""
+
+# user_id -> cart_id; a user's cart row never changes once created
+cart_ids = CartIdCache(max_entries=CART_ID_CACHE_SIZE)
+
 @app.get("/cart/<int:user_id>")
 def get_cart(user_id):
     conn = get_db_connection()
@@ -411,34 +1131,12 @@ def get_cart(user_id):
     
     try:
         # Get or create cart for user
-        cursor.execute("""
-            SELECT cart_id FROM cart WHERE user_id = %s
-        """, (user_id,))
-        cart = cursor.fetchone()
-        
-        if not cart:
-            cursor.execute("""
-                INSERT INTO cart (user_id) VALUES (%s)
-            """, (user_id,))
+        cart_id = resolve_cart_id(cursor, cart_ids, user_id)
+        if conn.in_transaction:
             conn.commit()
-            cart_id = cursor.lastrowid
-        else:
-            cart_id = cart['cart_id']
         
         # Get cart items with product details
-        cursor.execute("""
-            SELECT 
-                ci.cart_item_id,
-                ci.quantity,
-                p.product_id AS id,
-                p.name,
-                p.description,
-                p.price,
-                p.stock
-            FROM cart_items ci
-            JOIN products p ON ci.product_id = p.product_id
-            WHERE ci.cart_id = %s
-        """, (cart_id,))
+        cursor.execute(CART_ITEMS_SQL, (cart_id,))
         
         items = cursor.fetchall()
         
@@ -457,70 +1155,56 @@ def get_cart(user_id):
 # ---------------------
 # ADD TO CART
 # ---------------------
-@app.post("/cart/add")
-def add_to_cart():
-    data = request.json
-    user_id = data.get('user_id')
-    product_id = data.get('product_id')
-    quantity = data.get('quantity', 1)
-    
+CART_ADD_MANY_MAX = 200
+
+def add_lines_to_cart(user_id, items):
+    if not user_id:
+        return jsonify({"success": False, "message": "Missing user_id"}), 400
+    try:
+        quantities = merge_order_lines(items)
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"success": False, "message": "Each item needs a product_id and a positive quantity"}), 400
+
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
+    cursor = conn.cursor()
+
     try:
-        # Get user's cart
-        cursor.execute("""
-            SELECT cart_id FROM cart WHERE user_id = %s
-        """, (user_id,))
-        cart = cursor.fetchone()
-        
-        if not cart:
-            # Create cart if doesn't exist
-            cursor.execute("""
-                INSERT INTO cart (user_id) VALUES (%s)
-            """, (user_id,))
-            conn.commit()
-            cart_id = cursor.lastrowid
-        else:
-            cart_id = cart['cart_id']
-        
-        # Check if product already in cart
-        cursor.execute("""
-            SELECT cart_item_id, quantity 
-            FROM cart_items 
-            WHERE cart_id = %s AND product_id = %s
-        """, (cart_id, product_id))
-        
-        existing_item = cursor.fetchone()
-        
-        if existing_item:
-            # Update quantity
-            new_quantity = existing_item['quantity'] + quantity
-            cursor.execute("""
-                UPDATE cart_items 
-                SET quantity = %s 
-                WHERE cart_item_id = %s
-            """, (new_quantity, existing_item['cart_item_id']))
-        else:
-            # Add new item
-            cursor.execute("""
-                INSERT INTO cart_items (cart_id, product_id, quantity)
-                VALUES (%s, %s, %s)
-            """, (cart_id, product_id, quantity))
-        
-        conn.commit()
-        
+        cart_id = add_cart_items(conn, cursor, cart_ids, user_id, quantities)
         return jsonify({
             "success": True,
-            "message": "Added to cart"
+            "message": "Added to cart",
+            "cart_id": cart_id,
+            "items_added": len(quantities)
         })
-        
+
+    except UnknownProduct:
+        return jsonify({"success": False, "message": "Product not found"}), 404
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
     finally:
         cursor.close()
         conn.close()
 
+@app.post("/cart/add")
+def add_to_cart():
+    data = request.json
+    return add_lines_to_cart(data.get('user_id'), [
+        {"product_id": data.get('product_id'), "quantity": data.get('quantity', 1)}
+    ])
+
+# Several products in one request and one multi-row upsert
+@app.post("/cart/add-many")
+def add_many_to_cart():
+    data = request.json
+    items = data.get('items')
+
+    if not isinstance(items, list) or not items:
+        return jsonify({"success": False, "message": "items must be a non-empty list"}), 400
+    if len(items) > CART_ADD_MANY_MAX:
+        return jsonify({"success": False, "message": f"At most {CART_ADD_MANY_MAX} items per request"}), 400
+
+    return add_lines_to_cart(data.get('user_id'), items)
+
 # ---------------------
 # UPDATE CART ITEM QUANTITY
 # ---------------------
@@ -610,108 +1294,120 @@ def clear_cart(user_id):
 # ADMIN: GET SALES ANALYTICS
 # ---------------------
 @app.get("/admin/sales-analytics")
+@login_required(role="admin")
 def get_sales_analytics():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    try:
-        # Get date ranges
-        today = datetime.now().date()
-        week_ago = today - timedelta(days=7)
-        month_ago = today - timedelta(days=30)
-        
+    # Get date ranges
+    today = datetime.now().date()
+    week_ago = today - timedelta(days=7)
+
+    # Sales figures come from the rollup tables (see rollups.py), which
+    # create_order keeps current, so none of these scan order_items. The
+    # queries are independent and run in parallel.
+    queries = {
         # 1. Top selling products (all time)
-        cursor.execute("""
+        "top_products": ("""
             SELECT 
                 p.product_id as id,
                 p.name,
                 p.price,
                 p.stock,
-                COALESCE(SUM(oi.quantity), 0) as total_sold,
-                COALESCE(SUM(oi.quantity * oi.price), 0) as revenue
+                r.quantity as total_sold,
+                r.revenue
+            FROM sales_product_rollup r
+            JOIN products p ON p.product_id = r.product_id
+            ORDER BY r.quantity DESC
+            LIMIT 10
+        """, (), "all"),
+        # unsold products, to pad the list to ten
+        "unsold_products": ("""
+            SELECT 
+                p.product_id as id,
+                p.name,
+                p.price,
+                p.stock,
+                0 as total_sold,
+                0 as revenue
             FROM products p
-            LEFT JOIN order_items oi ON p.product_id = oi.product_id
-            GROUP BY p.product_id, p.name, p.price, p.stock
-            ORDER BY total_sold DESC
+            LEFT JOIN sales_product_rollup r ON r.product_id = p.product_id
+            WHERE r.product_id IS NULL
             LIMIT 10
-        """)
-        top_products = cursor.fetchall()
-        
+        """, (), "all"),
         # 2. Sales by category
-        cursor.execute("""
+        "category_sales": ("""
             SELECT 
                 c.name as category_name,
-                COALESCE(SUM(oi.quantity), 0) as total_sold,
-                COALESCE(SUM(oi.quantity * oi.price), 0) as revenue
+                COALESCE(r.quantity, 0) as total_sold,
+                COALESCE(r.revenue, 0) as revenue
             FROM categories c
-            LEFT JOIN products p ON c.category_id = p.category_id
-            LEFT JOIN order_items oi ON p.product_id = oi.product_id
-            GROUP BY c.category_id, c.name
-        """)
-        category_sales = cursor.fetchall()
-        
+            LEFT JOIN (
+                -- summed over the rollup shards
+                SELECT category_id, CAST(SUM(quantity) AS SIGNED) as quantity, SUM(revenue) as revenue
+                FROM sales_category_rollup
+                GROUP BY category_id
+            ) r ON r.category_id = c.category_id
+        """, (), "all"),
         # 3. Daily sales for last 7 days
-        cursor.execute("""
+        "daily_sales": ("""
             SELECT 
-                DATE(o.created_at) as sale_date,
-                COUNT(DISTINCT o.order_id) as orders_count,
-                SUM(oi.quantity) as items_sold,
-                SUM(oi.quantity * oi.price) as daily_revenue
-            FROM orders o
-            JOIN order_items oi ON o.order_id = oi.order_id
-            WHERE o.created_at >= %s
-            GROUP BY DATE(o.created_at)
+                sale_date,
+                CAST(SUM(order_count) AS SIGNED) as orders_count,
+                CAST(SUM(items_sold) AS SIGNED) as items_sold,
+                SUM(revenue) as daily_revenue
+            FROM sales_daily_rollup
+            WHERE sale_date >= %s
+            GROUP BY sale_date
             ORDER BY sale_date
-        """, (week_ago,))
-        daily_sales = cursor.fetchall()
-        
+        """, (week_ago,), "all"),
         # 4. Overall stats
-        cursor.execute("SELECT COUNT(*) as total_products FROM products")
-        total_products = cursor.fetchone()['total_products']
-        
-        cursor.execute("SELECT COUNT(*) as total_orders FROM orders")
-        total_orders = cursor.fetchone()['total_orders']
-        
-        cursor.execute("SELECT COUNT(*) as total_users FROM users")
-        total_users = cursor.fetchone()['total_users']
-        
-        cursor.execute("""
-            SELECT COALESCE(SUM(oi.quantity * oi.price), 0) as total_revenue 
-            FROM order_items oi
-            JOIN orders o ON oi.order_id = o.order_id 
-            WHERE o.status = 'completed'
-        """)
-        total_revenue = cursor.fetchone()['total_revenue']
-        
-        cursor.execute("SELECT COALESCE(SUM(stock), 0) as total_stock FROM products")
-        total_stock = cursor.fetchone()['total_stock']
+        "order_totals": ("""
+            SELECT 
+                COALESCE(SUM(order_count), 0) as total_orders,
+                COALESCE(SUM(completed_revenue), 0) as total_revenue
+            FROM sales_daily_rollup
+        """, (), "one"),
+        "product_totals": ("""
+            SELECT 
+                COUNT(*) as total_products,
+                COALESCE(SUM(stock), 0) as total_stock
+            FROM products
+        """, (), "one"),
+        "user_totals": ("SELECT COUNT(*) as total_users FROM users", (), "one"),
+    }
+    
+    try:
+        results, timings = analytics_executor.run(queries, deadline=ANALYTICS_DEADLINE)
+
+        top_products = results["top_products"]
+        top_products += results["unsold_products"][:10 - len(top_products)]
         
-        return jsonify({
+        response = jsonify({
             "success": True,
             "analytics": {
                 "top_products": top_products,
-                "category_sales": category_sales,
-                "daily_sales": daily_sales,
+                "category_sales": results["category_sales"],
+                "daily_sales": results["daily_sales"],
                 "stats": {
-                    "total_products": total_products,
-                    "total_orders": total_orders,
-                    "total_users": total_users,
-                    "total_revenue": float(total_revenue),
-                    "total_stock": total_stock
+                    "total_products": results["product_totals"]['total_products'],
+                    "total_orders": int(results["order_totals"]['total_orders']),
+                    "total_users": results["user_totals"]['total_users'],
+                    "total_revenue": float(results["order_totals"]['total_revenue']),
+                    "total_stock": results["product_totals"]['total_stock']
                 }
             }
         })
-        
+        response.headers["Server-Timing"] = server_timing_header(timings)
+        return response
+
+    except QueryDeadlineExceeded as e:
+        return jsonify({"success": False, "message": str(e)}), 504
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 # ---------------------
 # ADMIN: ADD NEW PRODUCT
 # ---------------------
 @app.post("/admin/products")
+@login_required(role="admin")
 def add_product():
     data = request.json
     
@@ -739,6 +1435,12 @@ def add_product():
         
         conn.commit()
         product_id = cursor.lastrowid
+        catalog_cache.invalidate("products", "popular")
+
+        if search_index.ready:
+            dict_cursor = conn.cursor(dictionary=True)
+            search_index.add(fetch_catalog_product(dict_cursor, product_id))
+            dict_cursor.close()
         
         return jsonify({
             "success": True,
@@ -752,46 +1454,176 @@ def add_product():
         cursor.close()
         conn.close()
 
+# ---------------------
+# ADMIN: BULK PRODUCT IMPORT / EXPORT
+# ---------------------
+# The body is streamed straight from the socket (CSV with a header row, or
+# JSON Lines) and inserted in batches; see product_io.py for the columns.
+# Rejected rows don't stop the import and are reported by line number.
+def product_io_format():
+    fmt = request.args.get("format")
+    if fmt is None:
+        fmt = "jsonl" if request.mimetype in ("application/x-ndjson", "application/jsonl") else "csv"
+    return fmt if fmt in CONTENT_TYPES else None
+
+@app.post("/admin/products/import")
+@login_required(role="admin")
+def import_products_route():
+    fmt = product_io_format()
+    if fmt is None:
+        return jsonify({"success": False, "message": "format must be csv or jsonl"}), 400
+    create_categories = request.args.get("create_categories", "").lower() in ("1", "true", "yes")
+
+    result = ProductImport()
+    conn = get_db_connection()
+    try:
+        lines = io.TextIOWrapper(request.stream, encoding="utf-8-sig", newline="")
+        import_products(conn, "mysql", iter_records(lines, fmt),
+                        create_categories=create_categories, result=result)
+    except UnicodeDecodeError:
+        return jsonify({"success": False, "message": "Input must be UTF-8", **result.summary()}), 400
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e), **result.summary()}), 500
+    finally:
+        conn.close()
+        # batches are committed as they go, so rows that made it in before
+        # a failure must become visible too
+        if result.inserted or result.categories_created:
+            catalog_cache.invalidate("products", "popular", "categories")
+            # rebuilt from the table on the next search
+            with search_index_lock:
+                search_index.ready = False
+
+    return jsonify({"success": True, **result.summary()})
+
+@app.get("/admin/products/export")
+@login_required(role="admin")
+def export_products_route():
+    fmt = product_io_format()
+    if fmt is None:
+        return jsonify({"success": False, "message": "format must be csv or jsonl"}), 400
+
+    # The body is iterated after the request's app context is torn down, so
+    # the connection is checked out here rather than with get_db_connection()
+    # (whose teardown would hand it back mid-download) and held until the
+    # last page has been sent.
+    def generate():
+        conn = db_pool.acquire()
+        try:
+            yield from export_products(conn, "mysql", fmt)
+        finally:
+            conn.close()
+
+    return Response(generate(), mimetype=CONTENT_TYPES[fmt], headers={
+        "Content-Disposition": f"attachment; filename=products.{fmt}"
+    })
+
 # ---------------------
 # ADMIN: UPDATE PRODUCT STOCK
 # ---------------------
 @app.put("/admin/products/<int:product_id>/stock")
+@login_required(role="admin")
 def update_product_stock(product_id):
     data = request.json
     stock_change = data.get('stock_change')
+
+    if not isinstance(stock_change, int) or isinstance(stock_change, bool):
+        return jsonify({"success": False, "message": "stock_change must be an integer"}), 400
     
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
+
+    def apply_change():
+        # Relative update: concurrent edits and orders can't overwrite each other
+        new_stock = adjust_product_stock(cursor, product_id, stock_change)
+        conn.commit()
+        return new_stock
     
     try:
-        # Get current stock
-        cursor.execute("SELECT stock FROM products WHERE product_id = %s", (product_id,))
-        product = cursor.fetchone()
-        
-        if not product:
-            return jsonify({"success": False, "message": "Product not found"}), 404
-        
-        new_stock = product['stock'] + stock_change
-        
-        if new_stock < 0:
-            return jsonify({"success": False, "message": "Stock cannot be negative"}), 400
-        
-        # Update stock
-        cursor.execute("""
-            UPDATE products 
-            SET stock = %s 
-            WHERE product_id = %s
-        """, (new_stock, product_id))
-        
-        conn.commit()
+        new_stock = with_deadlock_retry(conn, apply_change)
+        catalog_cache.invalidate("products", "popular", "analysis")
+        search_index.update_stock(product_id, new_stock)
         
         return jsonify({
             "success": True,
             "message": "Stock updated successfully",
             "new_stock": new_stock
         })
+
+    except ProductNotFound:
+        conn.rollback()
+        return jsonify({"success": False, "message": "Product not found"}), 404
+
+    except NegativeStock:
+        conn.rollback()
+        return jsonify({"success": False, "message": "Stock cannot be negative"}), 400
         
     except Exception as e:
+        conn.rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+# ---------------------
+# ADMIN: BULK STOCK ADJUSTMENT
+# ---------------------
+# {"items": [{"product_id": 12, "delta": 40}, {"barcode": "890...", "delta": -3}]}
+# Applied in one transaction; if any item fails, nothing changes and the
+# per-item results say why (409).
+BULK_STOCK_MAX = 5000
+
+@app.post("/admin/products/stock/bulk")
+@login_required(role="admin")
+def bulk_update_product_stock():
+    data = request.json or {}
+    items = data.get('items')
+
+    if not isinstance(items, list) or not items:
+        return jsonify({"success": False, "message": "items must be a non-empty list"}), 400
+    if len(items) > BULK_STOCK_MAX:
+        return jsonify({"success": False, "message": f"At most {BULK_STOCK_MAX} items per request"}), 400
+
+    cleaned = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or ('product_id' in item) == ('barcode' in item):
+            return jsonify({"success": False,
+                            "message": f"items[{index}] needs exactly one of product_id or barcode"}), 400
+        delta = item.get('delta')
+        key = 'product_id' if 'product_id' in item else 'barcode'
+        value = item[key]
+        if not isinstance(delta, int) or isinstance(delta, bool) \
+                or (key == 'product_id' and (not isinstance(value, int) or isinstance(value, bool))):
+            return jsonify({"success": False,
+                            "message": f"items[{index}]: product_id and delta must be integers"}), 400
+        cleaned.append({key: str(value) if key == 'barcode' else value, "delta": delta})
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    def apply_changes():
+        results = apply_stock_deltas(cursor, cleaned)
+        conn.commit()
+        return results
+
+    try:
+        results = with_deadlock_retry(conn, apply_changes)
+        catalog_cache.invalidate("products", "popular", "analysis")
+        for result in results:
+            search_index.update_stock(result['product_id'], result['new_stock'])
+
+        return jsonify({"success": True, "message": "Stock updated successfully", "results": results})
+
+    except BulkStockRejected as e:
+        conn.rollback()
+        return jsonify({
+            "success": False,
+            "message": "No stock was changed: some items were rejected",
+            "results": e.results
+        }), 409
+
+    except Exception as e:
+        conn.rollback()
         return jsonify({"success": False, "message": str(e)}), 500
     finally:
         cursor.close()
@@ -801,6 +1633,7 @@ def update_product_stock(product_id):
 # ADMIN: GET ALL USERS
 # ---------------------
 @app.get("/admin/users")
+@login_required(role="admin")
 def get_all_users():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -836,6 +1669,7 @@ def get_all_users():
 # ADMIN: UPDATE USER ROLE
 # ---------------------
 @app.put("/admin/users/<int:user_id>/role")
+@login_required(role="admin")
 def update_user_role(user_id):
     data = request.json
     new_role = data.get('role')
@@ -874,41 +1708,7 @@ def update_user_role(user_id):
         conn.close()
 
 # ---------------------
-# UPDATE PRODUCT STOCK ON ORDER (CALL THIS WHEN ORDER IS PLACED)
-# ---------------------
-def update_stock_on_order(order_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    try:
-        # Get all items in the order
-        cursor.execute("""
-            SELECT product_id, quantity 
-            FROM order_items 
-            WHERE order_id = %s
-        """, (order_id,))
-        
-        order_items = cursor.fetchall()
-        
-        # Update stock for each product
-        for item in order_items:
-            cursor.execute("""
-                UPDATE products 
-                SET stock = stock - %s 
-                WHERE product_id = %s AND stock >= %s
-            """, (item['quantity'], item['product_id'], item['quantity']))
-        
-        conn.commit()
-        
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        cursor.close()
-        conn.close()
-
-# ---------------------
-# MODIFY THE PLACE ORDER ENDPOINT (ADD THIS TO YOUR EXISTING CODE)
+# PLACE ORDER
 # ---------------------
 @app.post("/orders")
 def create_order():
@@ -918,13 +1718,22 @@ def create_order():
     
     if not user_id or not items:
         return jsonify({"success": False, "message": "Missing required data"}), 400
+
+    try:
+        quantities = merge_order_lines(items)
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"success": False, "message": "Each item needs a product_id and a positive quantity"}), 400
     
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
-    
-    try:
-        # Calculate total
-        total = sum(item['price'] * item['quantity'] for item in items)
+
+    def place_order():
+        # Locks the product rows and takes prices from the catalog,
+        # not from the client
+        products = reserve_stock(cursor, quantities)
+        product_ids = sorted(quantities)
+        prices = {pid: products[pid]['price'] for pid in product_ids}
+        total = sum(prices[pid] * qty for pid, qty in quantities.items())
         
         # Create order
         cursor.execute("""
@@ -934,33 +1743,50 @@ def create_order():
         
         order_id = cursor.lastrowid
         
-        # Add order items
-        for item in items:
-            cursor.execute("""
-                INSERT INTO order_items (order_id, product_id, quantity, price)
-                VALUES (%s, %s, %s, %s)
-            """, (order_id, item['product_id'], item['quantity'], item['price']))
-            
-            # Update product stock
-            cursor.execute("""
-                UPDATE products 
-                SET stock = stock - %s 
-                WHERE product_id = %s
-            """, (item['quantity'], item['product_id']))
+        # Add order items (executemany sends a single multi-row INSERT)
+        cursor.executemany("""
+            INSERT INTO order_items (order_id, product_id, category_id, quantity, price)
+            VALUES (%s, %s, %s, %s, %s)
+        """, [(order_id, pid, products[pid]['category_id'], quantities[pid], prices[pid])
+              for pid in product_ids])
         
         # Add payment record
         cursor.execute("""
             INSERT INTO payments (order_id, amount, method)
             VALUES (%s, %s, 'card')
         """, (order_id, total))
+
+        record_order_associations(cursor, product_ids)
+        record_order_rollups(cursor, order_id, [
+            (pid, products[pid]['category_id'], quantities[pid], prices[pid])
+            for pid in product_ids
+        ])
         
         conn.commit()
+        return order_id, total
+    
+    try:
+        order_id, total = with_deadlock_retry(conn, place_order)
+        # stock and sales counts changed
+        catalog_cache.invalidate("products", "popular", "analysis")
+        refresh_association_version(conn)
+        for pid, qty in quantities.items():
+            search_index.adjust_stock(pid, -qty)
         
         return jsonify({
             "success": True,
             "message": "Order placed successfully",
-            "order_id": order_id
+            "order_id": order_id,
+            "total": float(total)
         })
+
+    except InsufficientStock as e:
+        conn.rollback()
+        return jsonify({
+            "success": False,
+            "message": "Insufficient stock for some items",
+            "insufficient_stock": e.shortages
+        }), 409
         
     except Exception as e:
         conn.rollback()
@@ -969,70 +1795,100 @@ def create_order():
         cursor.close()
         conn.close()
 
-    # Add this import at the top
-from collections import defaultdict
-
 # ---------------------
 # GET PURCHASE ASSOCIATIONS
 # ---------------------
+# Its own short transaction after the order commits, so checkouts don't
+# queue on the version row; a failure only delays the engine rebuild until
+# the next order.
+def refresh_association_version(conn):
+    cursor = conn.cursor()
+    try:
+        bump_association_version(cursor)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        app.logger.warning("Association version bump failed: %s", e)
+    finally:
+        cursor.close()
+
+ASSOCIATIONS_DEFAULT_TOP = 10
+ASSOCIATIONS_MAX_TOP = 100
+
+# The engine built from the counts, with its rules per `top`, reused until
+# association_version moves (see associations.py)
+association_cache = {"version": None, "engine": None, "rules": {}}
+association_cache_lock = threading.Lock()
+
+
+def load_association_rules(conn, top):
+    cursor = conn.cursor()
+    try:
+        version = load_association_version(cursor)
+        with association_cache_lock:
+            if association_cache["version"] == version:
+                rules = association_cache["rules"].get(top)
+                if rules is None:
+                    rules = association_cache["engine"].rules(top=top)
+                    association_cache["rules"][top] = rules
+                return rules
+
+        # same transaction as the version read, so (REPEATABLE READ) the
+        # counts are the ones that version stands for
+        order_counts, pairs = load_association_counts(cursor)
+        cursor.execute("SELECT COUNT(*) FROM orders WHERE status = 'completed'")
+        n_orders = cursor.fetchone()[0]
+        engine = AssociationEngine.from_counts(order_counts, pairs, n_orders)
+        rules = engine.rules(top=top)
+        with association_cache_lock:
+            association_cache.update(version=version, engine=engine, rules={top: rules})
+        return rules
+    finally:
+        cursor.close()
+
 @app.get("/analysis/purchase-associations")
 def get_purchase_associations():
+    # Only the `top` strongest associations per product are returned so the
+    # payload stays bounded however large the catalog gets
+    top = request.args.get('top', ASSOCIATIONS_DEFAULT_TOP, type=int)
+    top = max(1, min(top, ASSOCIATIONS_MAX_TOP))
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     
     try:
-        # Get all completed orders
-        cursor.execute("""
-            SELECT o.order_id, oi.product_id
-            FROM orders o
-            JOIN order_items oi ON o.order_id = oi.order_id
-            WHERE o.status = 'completed'
-            ORDER BY o.order_id
-        """)
-        
-        order_items = cursor.fetchall()
-        
-        # Group items by order
-        orders = defaultdict(list)
-        for item in order_items:
-            orders[item['order_id']].append(item['product_id'])
-        
-        # Calculate associations
-        associations = defaultdict(lambda: defaultdict(int))
-        product_counts = defaultdict(int)
-        
-        for order_id, products in orders.items():
-            # Count each product
-            for product_id in products:
-                product_counts[product_id] += 1
-            
-            # Count co-purchases
-            for i in range(len(products)):
-                for j in range(i + 1, len(products)):
-                    p1, p2 = products[i], products[j]
-                    associations[p1][p2] += 1
-                    associations[p2][p1] += 1
-        
-        # Convert to percentage
-        result = {}
-        for product_id, related in associations.items():
-            result[product_id] = {}
-            for related_id, count in related.items():
-                # Calculate percentage: (co-purchase count / product purchase count) * 100
-                percentage = (count / product_counts[product_id]) * 100 if product_counts[product_id] > 0 else 0
-                result[product_id][related_id] = round(percentage, 1)
+        # Precomputed counts (see associations.py), kept current by create_order
+        rules = load_association_rules(conn, top)
+        
+        # Percentage view: (co-purchase count / product purchase count) * 100
+        result = {
+            product_id: {
+                rule["product_id"]: round(rule["confidence"] * 100, 1)
+                for rule in related
+            }
+            for product_id, related in rules.items()
+        }
         
-        # Get all products for reference
-        cursor.execute("""
-            SELECT product_id as id, name, price, stock, image
-            FROM products
-            ORDER BY name
-        """)
-        all_products = cursor.fetchall()
+        # Products referenced by the associations, for reference
+        referenced = set(result)
+        for related in result.values():
+            referenced.update(related)
+
+        all_products = []
+        if referenced:
+            placeholders = ", ".join(["%s"] * len(referenced))
+            cursor.execute(f"""
+                SELECT product_id as id, name, price, stock
+                FROM products
+                WHERE product_id IN ({placeholders})
+                ORDER BY name
+            """, list(referenced))
+            all_products = cursor.fetchall()
         
         return jsonify({
             "success": True,
             "associations": result,
+            "rules": rules,
             "products": all_products
         })
         
@@ -1046,13 +1902,12 @@ def get_purchase_associations():
 # GET ANALYSIS FOR SPECIFIC PRODUCT
 # ---------------------
 @app.get("/analysis/product/<int:product_id>")
+@catalog_cached("analysis")
 def get_product_analysis(product_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    try:
+    # The four queries don't depend on each other, so they run in parallel
+    queries = {
         # Get product details with category
-        cursor.execute("""
+        "product": ("""
             SELECT 
                 p.product_id as id,
                 p.name,
@@ -1063,15 +1918,9 @@ def get_product_analysis(product_id):
             FROM products p
             LEFT JOIN categories c ON p.category_id = c.category_id
             WHERE p.product_id = %s
-        """, (product_id,))
-        
-        product = cursor.fetchone()
-        
-        if not product:
-            return jsonify({"success": False, "message": "Product not found"}), 404
-        
+        """, (product_id,), "one"),
         # Get purchase associations for this product (with categories)
-        cursor.execute("""
+        "associated_products": ("""
             WITH product_orders AS (
                 SELECT DISTINCT oi.order_id
                 FROM order_items oi
@@ -1103,12 +1952,9 @@ def get_product_analysis(product_id):
                 ROUND((cp.co_purchase_count * 100.0 / tpo.total_orders), 1) as percentage
             FROM co_purchased cp
             CROSS JOIN total_product_orders tpo
-        """, (product_id, product_id))
-        
-        associated_products = cursor.fetchall()
-        
+        """, (product_id, product_id), "all"),
         # Get sales statistics for this product
-        cursor.execute("""
+        "stats": ("""
             SELECT 
                 COUNT(DISTINCT o.order_id) as total_orders,
                 SUM(oi.quantity) as total_sold,
@@ -1117,12 +1963,9 @@ def get_product_analysis(product_id):
             FROM orders o
             JOIN order_items oi ON o.order_id = oi.order_id
             WHERE oi.product_id = %s AND o.status = 'completed'
-        """, (product_id,))
-        
-        stats = cursor.fetchone()
-        
+        """, (product_id,), "one"),
         # Get monthly sales trend
-        cursor.execute("""
+        "monthly_trend": ("""
             SELECT 
                 DATE_FORMAT(o.created_at, '%Y-%m') as month,
                 SUM(oi.quantity) as monthly_sold,
@@ -1133,29 +1976,55 @@ def get_product_analysis(product_id):
             GROUP BY DATE_FORMAT(o.created_at, '%Y-%m')
             ORDER BY month DESC
             LIMIT 6
-        """, (product_id,))
+        """, (product_id,), "all"),
+    }
+    
+    try:
+        results, timings = analytics_executor.run(queries, deadline=ANALYTICS_DEADLINE)
+        product = results["product"]
         
-        monthly_trend = cursor.fetchall()
+        if not product:
+            return jsonify({"success": False, "message": "Product not found"}), 404
         
-        return jsonify({
+        response = jsonify({
             "success": True,
             "product": product,
-            "associated_products": associated_products,
-            "stats": stats or {},
-            "monthly_trend": monthly_trend
+            "associated_products": results["associated_products"],
+            "stats": results["stats"] or {},
+            "monthly_trend": results["monthly_trend"]
         })
-        
+        response.headers["Server-Timing"] = server_timing_header(timings)
+        return response
+
+    except QueryDeadlineExceeded as e:
+        return jsonify({"success": False, "message": str(e)}), 504
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # ---------------------
-# RUN APP AT THE END
+# WARM-UP
 # ---------------------
-if __name__ == "__main__":
-    print("🚀 Flask backend running on http://127.0.0.1:5000")
-    app.run(debug=True)
+WARM_UP_PATHS = ["/products", "/categories", "/popular-products"]
+
+# Build the search/barcode index and prime the catalog cache so the first
+# real requests don't pay for it. server.py runs this once in the master
+# before forking, so workers share the result copy-on-write.
+def warm_up():
+    started = datetime.now()
+    try:
+        load_search_index()
+        with app.test_client() as client:
+            for path in WARM_UP_PATHS:
+                client.get(path)
+    except Exception as e:
+        app.logger.warning("Warm-up incomplete: %s", e)
+        return False
+
+    elapsed = (datetime.now() - started).total_seconds()
+    app.logger.info("Warm-up done in %.2fs: %d products indexed, %d cached responses",
+                    elapsed, search_index.stats()['products'], catalog_cache.stats()['entries'])
+    return True
+
+# Run with server.py (--dev for the Flask development server)
 
@@ -0,0 +1,191 @@
+# asgi.py
+#
+# Async serving mode. The read-heavy endpoints (/products, /categories,
+# /cart/<user_id>, /user/<user_id>/orders) are served by async handlers on
+# an aiomysql connection pool, so a single process can keep thousands of
+# slow clients waiting on the database without a thread each. Every other
+# route falls through to the regular Flask app, which runs in a threadpool.
+#
+#   uvicorn asgi:app --host 0.0.0.0 --port 5000
+#
+# The handlers reuse the query builders and response shaping from app.py,
+# so both modes return the same JSON.
+
+import contextlib
+import os
+
+import aiomysql
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.datastructures import MultiDict
+
+import app as flask_backend
+from app import (
+    CART_ITEMS_SQL, CATEGORIES_SQL, DB_CONFIG, attach_order_item, cart_ids, catalog_cache,
+    format_orders, order_items_query, plan_orders_query, plan_products_query,
+    products_page,
+)
+from carts import CART_UPSERT_SQL
+
+# ---------- ASYNC DB CONFIG ----------
+ASYNC_DB_POOL_MIN = int(os.environ.get("ASYNC_DB_POOL_MIN", 5))
+ASYNC_DB_POOL_MAX = int(os.environ.get("ASYNC_DB_POOL_MAX", 50))
+ASYNC_DB_POOL_RECYCLE = int(os.environ.get("ASYNC_DB_POOL_RECYCLE", 300))
+# -------------------------------------
+
+db = {"pool": None}
+
+
+def json_response(payload, status=200):
+    # Flask's JSON provider, so Decimal/datetime render exactly as in sync mode
+    body = flask_backend.app.json.dumps(payload)
+    return Response(body, status_code=status, media_type="application/json")
+
+
+def error_response(message, status):
+    return json_response({"success": False, "message": message}, status)
+
+
+async def fetch(sql, params=(), one=False):
+    async with db["pool"].acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(sql, params)
+            return await (cursor.fetchone() if one else cursor.fetchall())
+
+
+# Same ETag/cache behaviour as the catalog_cached decorator in app.py
+async def cached_catalog(request, namespace, build):
+    request_key = f"{request.url.path}?{request.url.query}"
+    etag = catalog_cache.etag(namespace, request_key)
+
+    if f'"{etag}"' in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": f'"{etag}"'})
+
+    key = catalog_cache.key(namespace, request_key)
+    body = catalog_cache.get(key)
+    if body is None:
+        response = await build()
+        if response.status_code != 200:
+            return response
+        body = response.body
+        catalog_cache.set(key, body)
+
+    return Response(body, media_type="application/json", headers={"ETag": f'"{etag}"'})
+
+
+# ---------------------
+# ASYNC READ ROUTES
+# ---------------------
+async def get_products(request):
+    async def build():
+        try:
+            plan = plan_products_query(MultiDict(request.query_params.multi_items()))
+        except (ValueError, TypeError) as e:
+            return error_response(str(e), 400)
+
+        try:
+            total = (await fetch(plan["count_sql"], plan["count_params"], one=True))['total']
+            products = await fetch(plan["page_sql"], plan["page_params"])
+            return json_response(products_page(plan, total, list(products)))
+        except Exception as e:
+            return error_response(str(e), 500)
+
+    return await cached_catalog(request, "products", build)
+
+
+async def get_categories(request):
+    async def build():
+        try:
+            categories = await fetch(CATEGORIES_SQL)
+            return json_response({"success": True, "categories": categories})
+        except Exception as e:
+            return error_response(str(e), 500)
+
+    return await cached_catalog(request, "categories", build)
+
+
+async def get_cart(request):
+    user_id = request.path_params["user_id"]
+    try:
+        async with db["pool"].acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                # Get or create cart for user (autocommit pool, so no commit)
+                cart_id = cart_ids.get(user_id)
+                if cart_id is None:
+                    await cursor.execute(CART_UPSERT_SQL, (user_id,))
+                    cart_id = cursor.lastrowid
+                    cart_ids.set(user_id, cart_id)
+
+                await cursor.execute(CART_ITEMS_SQL, (cart_id,))
+                items = await cursor.fetchall()
+
+        return json_response({"success": True, "cart_id": cart_id, "items": items})
+    except Exception as e:
+        return error_response(str(e), 500)
+
+
+async def get_user_orders(request):
+    user_id = request.path_params["user_id"]
+    try:
+        query, params, limit = plan_orders_query(user_id, MultiDict(request.query_params.multi_items()))
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    try:
+        async with db["pool"].acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(query, params)
+                formatted_orders, by_id, next_cursor = format_orders(list(await cursor.fetchall()), limit)
+
+                if by_id:
+                    await cursor.execute(*order_items_query(by_id))
+                    for item in await cursor.fetchall():
+                        attach_order_item(by_id, item)
+
+        return json_response({
+            "success": True,
+            "orders": formatted_orders,
+            "next_cursor": next_cursor
+        })
+    except Exception as e:
+        return error_response(str(e), 500)
+
+
+# ---------------------
+# APP
+# ---------------------
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    db["pool"] = await aiomysql.create_pool(
+        host=DB_CONFIG["host"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        db=DB_CONFIG["database"],
+        minsize=ASYNC_DB_POOL_MIN,
+        maxsize=ASYNC_DB_POOL_MAX,
+        pool_recycle=ASYNC_DB_POOL_RECYCLE,
+        autocommit=True,
+    )
+    try:
+        yield
+    finally:
+        db["pool"].close()
+        await db["pool"].wait_closed()
+
+
+app = Starlette(
+    routes=[
+        Route("/products", get_products),
+        Route("/categories", get_categories),
+        Route("/cart/{user_id:int}", get_cart),
+        Route("/user/{user_id:int}/orders", get_user_orders),
+        # everything else is handled by the Flask app
+        Mount("/", WSGIMiddleware(flask_backend.app)),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])],
+    lifespan=lifespan,
+)
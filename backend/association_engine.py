@@ -0,0 +1,163 @@
+# association_engine.py
+#
+# Vectorized co-purchase analytics on a sparse order x product incidence
+# matrix (NumPy/SciPy).
+#
+# With X the binary order x product matrix, C = X^T X holds co-purchase
+# counts off the diagonal and per-product order counts on it. From those:
+#
+#   support(a, b)    = C[a, b] / orders
+#   confidence(a->b) = C[a, b] / C[a, a]
+#   lift(a->b)       = confidence(a->b) / (C[b, b] / orders)
+#
+# The endpoint builds the engine from the materialized counts
+# (associations.py); offline analysis can build it straight from order
+# lines:
+#
+#   python association_engine.py [--top 10] [--out rules.json]
+
+import argparse
+import json
+import os
+
+import numpy as np
+from scipy import sparse
+
+
+class AssociationEngine:
+
+    def __init__(self, product_ids, order_counts, co_counts, n_orders):
+        self.product_ids = np.asarray(product_ids)        # column -> product_id
+        self.order_counts = np.asarray(order_counts, dtype=np.float64)
+        self.co_counts = co_counts.tocsr()                 # symmetric, zero diagonal
+        self.n_orders = n_orders
+
+    @classmethod
+    def from_order_lines(cls, order_ids, product_ids):
+        """Build from parallel sequences of (order_id, product_id) order lines."""
+        order_ids = np.asarray(order_ids)
+        product_ids = np.asarray(product_ids)
+        orders, order_idx = np.unique(order_ids, return_inverse=True)
+        products, product_idx = np.unique(product_ids, return_inverse=True)
+
+        incidence = sparse.csr_matrix(
+            (np.ones(len(order_idx), dtype=np.int32), (order_idx, product_idx)),
+            shape=(len(orders), len(products)),
+        )
+        # the same product twice in one order still counts once
+        incidence.data[:] = 1
+
+        co = (incidence.T @ incidence).tocsr()
+        counts = co.diagonal()
+        co.setdiag(0)
+        co.eliminate_zeros()
+        return cls(products, counts, co, len(orders))
+
+    @classmethod
+    def from_counts(cls, order_counts, pairs, n_orders):
+        """Build from {product_id: order_count} and (product_a, product_b, co_count) rows."""
+        products = np.array(sorted(order_counts), dtype=np.int64)
+        counts = np.array([order_counts[pid] for pid in products])
+
+        if pairs:
+            a, b, co = np.array(pairs, dtype=np.int64).T
+            a_idx = np.searchsorted(products, a)
+            b_idx = np.searchsorted(products, b)
+            rows = np.concatenate([a_idx, b_idx])
+            cols = np.concatenate([b_idx, a_idx])
+            data = np.concatenate([co, co])
+        else:
+            rows = cols = data = np.array([], dtype=np.int64)
+
+        matrix = sparse.csr_matrix((data, (rows, cols)), shape=(len(products), len(products)))
+        return cls(products, counts, matrix, n_orders)
+
+    def rules(self, top=10, min_count=1):
+        """
+        Top-N associated products per product, ranked by co-purchase count.
+
+        Returns {product_id: [{"product_id", "co_count", "support",
+        "confidence", "lift"}, ...]}.
+        """
+        co = self.co_counts
+        n = max(self.n_orders, 1)
+        base_rate = self.order_counts / n
+
+        result = {}
+        for row in range(co.shape[0]):
+            start, end = co.indptr[row], co.indptr[row + 1]
+            if start == end:
+                continue
+            cols = co.indices[start:end]
+            counts = co.data[start:end]
+
+            keep = counts >= min_count
+            cols, counts = cols[keep], counts[keep]
+            if not len(cols):
+                continue
+
+            if len(cols) > top:
+                best = np.argpartition(-counts, top - 1)[:top]
+                cols, counts = cols[best], counts[best]
+            order = np.lexsort((self.product_ids[cols], -counts))
+            cols, counts = cols[order], counts[order]
+
+            confidence = counts / self.order_counts[row]
+            lift = confidence / base_rate[cols]
+            result[int(self.product_ids[row])] = [
+                {
+                    "product_id": pid,
+                    "co_count": c,
+                    "support": sup,
+                    "confidence": conf,
+                    "lift": lf,
+                }
+                for pid, c, sup, conf, lf in zip(
+                    self.product_ids[cols].tolist(),
+                    counts.tolist(),
+                    np.round(counts / n, 6).tolist(),
+                    np.round(confidence, 4).tolist(),
+                    np.round(lift, 4).tolist(),
+                )
+            ]
+        return result
+
+
+if __name__ == "__main__":
+    import mysql.connector
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--out", help="write rules as JSON to this file")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(
+        host=os.environ.get("DB_HOST", "localhost"),
+        user=os.environ.get("DB_USER", "root"),
+        password=os.environ.get("DB_PASS", ""),
+        database=os.environ.get("DB_NAME", "supershop"),
+    )
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT oi.order_id, oi.product_id
+        FROM order_items oi
+        JOIN orders o ON o.order_id = oi.order_id
+        WHERE o.status = 'completed'
+    """)
+    lines = cursor.fetchall()
+    cursor.close()
+    conn.close()
+
+    if not lines:
+        raise SystemExit("No completed orders.")
+
+    order_ids, product_ids = zip(*lines)
+    engine = AssociationEngine.from_order_lines(order_ids, product_ids)
+    rules = engine.rules(top=args.top)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(rules, f)
+        print(f"✅ Wrote rules for {len(rules)} products to {args.out}")
+    else:
+        print(json.dumps(rules, indent=2))
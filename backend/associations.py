@@ -0,0 +1,128 @@
+# associations.py
+#
+# Materialized co-purchase counts for /analysis/purchase-associations.
+#
+#   product_order_counts  (product_id, order_count)
+#   product_pair_counts   (product_a, product_b, co_count)   product_a < product_b
+#   association_version   (id = 1, version)
+#
+# create_order calls record_order_associations() inside its transaction, so
+# the counts move together with the order rows. The endpoint then reads the
+# counts instead of replaying the whole order history, and keeps the engine
+# it builds from them until association_version moves. create_order bumps
+# the version right after its transaction commits, not inside it: the
+# single version row would otherwise be locked until commit and serialize
+# every checkout. A reader that builds in between caches the new counts
+# under the old version, which is harmless, and rebuilds on the bump. A
+# rebuild bumps inside its own transaction. For backfill (or after
+# editing orders by hand) rebuild everything from order_items:
+#
+#   python associations.py rebuild
+
+import os
+import sys
+from itertools import combinations
+
+import mysql.connector
+
+# ---------- CONFIG ----------
+DB_HOST = os.environ.get("DB_HOST", "localhost")
+DB_USER = os.environ.get("DB_USER", "root")
+DB_PASS = os.environ.get("DB_PASS", "")
+DB_NAME = os.environ.get("DB_NAME", "supershop")
+# ---------------------------
+
+# rows per multi-row INSERT when recording very large orders
+PAIR_BATCH_SIZE = 1000
+
+
+def record_order_associations(cursor, product_ids):
+    """Add one order's distinct products to the materialized counts."""
+    product_ids = sorted(set(product_ids))
+    if not product_ids:
+        return
+
+    cursor.executemany("""
+        INSERT INTO product_order_counts (product_id, order_count)
+        VALUES (%s, 1)
+        ON DUPLICATE KEY UPDATE order_count = order_count + 1
+    """, [(pid,) for pid in product_ids])
+
+    pairs = list(combinations(product_ids, 2))
+    for start in range(0, len(pairs), PAIR_BATCH_SIZE):
+        cursor.executemany("""
+            INSERT INTO product_pair_counts (product_a, product_b, co_count)
+            VALUES (%s, %s, 1)
+            ON DUPLICATE KEY UPDATE co_count = co_count + 1
+        """, pairs[start:start + PAIR_BATCH_SIZE])
+
+
+def bump_association_version(cursor):
+    """Tell cached engines the counts moved; run after the counts commit."""
+    cursor.execute("UPDATE association_version SET version = version + 1 WHERE id = 1")
+
+
+def load_association_version(cursor):
+    cursor.execute("SELECT version FROM association_version WHERE id = 1")
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def load_association_counts(cursor):
+    """Return ({product_id: order_count}, [(product_a, product_b, co_count), ...])."""
+    cursor.execute("SELECT product_id, order_count FROM product_order_counts")
+    order_counts = {row[0]: row[1] for row in cursor.fetchall()}
+
+    cursor.execute("SELECT product_a, product_b, co_count FROM product_pair_counts")
+    pairs = [tuple(row) for row in cursor.fetchall()]
+    return order_counts, pairs
+
+
+def rebuild_associations(conn):
+    """Recompute both tables from completed orders in one transaction."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM product_pair_counts")
+        cursor.execute("DELETE FROM product_order_counts")
+
+        cursor.execute("""
+            INSERT INTO product_order_counts (product_id, order_count)
+            SELECT oi.product_id, COUNT(DISTINCT oi.order_id)
+            FROM order_items oi
+            JOIN orders o ON o.order_id = oi.order_id
+            WHERE o.status = 'completed'
+            GROUP BY oi.product_id
+        """)
+
+        cursor.execute("""
+            INSERT INTO product_pair_counts (product_a, product_b, co_count)
+            SELECT a.product_id, b.product_id, COUNT(DISTINCT a.order_id)
+            FROM order_items a
+            JOIN order_items b
+                ON b.order_id = a.order_id AND b.product_id > a.product_id
+            JOIN orders o ON o.order_id = a.order_id
+            WHERE o.status = 'completed'
+            GROUP BY a.product_id, b.product_id
+        """)
+        pair_rows = cursor.rowcount
+
+        bump_association_version(cursor)
+        conn.commit()
+        return pair_rows
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("usage: python associations.py rebuild")
+
+    conn = mysql.connector.connect(host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME)
+    try:
+        pair_rows = rebuild_associations(conn)
+        print(f"✅ Rebuilt co-purchase counts ({pair_rows} product pairs)")
+    finally:
+        conn.close()
@@ -0,0 +1,124 @@
+# auth.py
+#
+# Password hashing and session tokens.
+#
+# PasswordHasher wraps werkzeug's hashing with a configurable method (e.g.
+# "scrypt:32768:8:1" or "pbkdf2:sha256:600000"). Hashes made with a
+# different method or cost still verify, and needs_rehash() tells login to
+# upgrade them transparently.
+#
+# SessionTokens issues signed, expiring tokens:
+#
+#   base64url(json claims) "." base64url(HMAC-SHA256(secret, claims))
+#
+# Verifying one is an HMAC and a dict lookup -- no database round trip and
+# no password hash -- so the expensive hash is paid once per login. Logout
+# adds the token id to a bounded revocation set, kept until the token would
+# have expired anyway. The secret is per process unless SESSION_SECRET is
+# set. The revocation set is always per process: other workers (and this
+# one after a restart) keep accepting a logged-out token until it expires,
+# so keep SESSION_TTL short. The role is a claim too; routes that require
+# a role re-check it against the users table, so a demotion applies at once.
+
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class PasswordHasher:
+
+    def __init__(self, method=None):
+        # None keeps werkzeug's default
+        self.method = method
+        self._prefix = None
+
+    def hash(self, password):
+        if self.method:
+            return generate_password_hash(password, method=self.method)
+        return generate_password_hash(password)
+
+    def verify(self, stored_hash, password):
+        return check_password_hash(stored_hash, password)
+
+    def current_prefix(self):
+        # "scrypt:32768:8:1", "pbkdf2:sha256:600000", ... exactly as stored
+        if self._prefix is None:
+            self._prefix = self.hash("").split("$", 1)[0]
+        return self._prefix
+
+    def needs_rehash(self, stored_hash):
+        return stored_hash.split("$", 1)[0] != self.current_prefix()
+
+
+class SessionTokens:
+
+    def __init__(self, secret, ttl=12 * 3600, max_revoked=100_000):
+        self._secret = secret.encode() if isinstance(secret, str) else secret
+        self.ttl = ttl
+        self.max_revoked = max_revoked
+        self._revoked = OrderedDict()  # jti -> exp, in expiry order (fixed ttl)
+        self._lock = threading.Lock()
+
+    def _sign(self, payload):
+        return b64encode(hmac.new(self._secret, payload.encode(), hashlib.sha256).digest())
+
+    def issue(self, user_id, role):
+        exp = int(time.time()) + self.ttl
+        claims = {"uid": user_id, "role": role, "exp": exp, "jti": uuid.uuid4().hex}
+        payload = b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        return f"{payload}.{self._sign(payload)}", exp
+
+    def verify(self, token):
+        """Return the token's claims; raises InvalidToken."""
+        # tokens are base64url; anything else (e.g. a non-ASCII header,
+        # which compare_digest rejects with TypeError) is simply invalid
+        if not token.isascii():
+            raise InvalidToken("Invalid token")
+        payload, _, signature = token.partition(".")
+        if not signature or not hmac.compare_digest(signature, self._sign(payload)):
+            raise InvalidToken("Invalid token")
+        try:
+            claims = json.loads(b64decode(payload))
+        except ValueError:
+            raise InvalidToken("Invalid token") from None
+        if claims["exp"] < time.time():
+            raise InvalidToken("Token expired")
+        with self._lock:
+            if claims["jti"] in self._revoked:
+                raise InvalidToken("Token revoked")
+        return claims
+
+    def revoke(self, claims):
+        now = time.time()
+        with self._lock:
+            self._revoked[claims["jti"]] = claims["exp"]
+            # expired tokens fail verify() on their own; drop them first,
+            # then the oldest entries if still over the bound
+            while self._revoked:
+                jti, exp = next(iter(self._revoked.items()))
+                if exp >= now and len(self._revoked) <= self.max_revoked:
+                    break
+                self._revoked.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"ttl": self.ttl, "revoked": len(self._revoked), "max_revoked": self.max_revoked}
@@ -0,0 +1,104 @@
+# bench_associations.py
+#
+# Full recompute vs incremental maintenance of co-purchase counts on a
+# synthetic order history (default 1M order lines). "Full" replays the
+# whole history the way /analysis/purchase-associations used to on every
+# request; "incremental" is the per-order work create_order now does, so
+# a read costs only the lookup of the stored counts. The sparse-matrix
+# engine (association_engine.py) is timed on the same history for the
+# offline path and for turning stored counts into top-N rules.
+# No database needed.
+#
+#   python benchmarks/bench_associations.py [--lines 1000000] [--products 5000]
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from itertools import combinations
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from association_engine import AssociationEngine
+
+
+def make_orders(lines, products, rng):
+    # Zipf-like popularity: a handful of products appear in most baskets
+    weights = [1 / (rank ** 1.1) for rank in range(1, products + 1)]
+    population = list(range(1, products + 1))
+    orders = []
+    total = 0
+    while total < lines:
+        size = min(rng.randint(1, 9), lines - total)
+        basket = set(rng.choices(population, weights, k=size))
+        orders.append(sorted(basket))
+        total += size
+    return orders
+
+
+def full_recompute(orders):
+    associations = defaultdict(lambda: defaultdict(int))
+    product_counts = defaultdict(int)
+    for products in orders:
+        for product_id in products:
+            product_counts[product_id] += 1
+        for i in range(len(products)):
+            for j in range(i + 1, len(products)):
+                p1, p2 = products[i], products[j]
+                associations[p1][p2] += 1
+                associations[p2][p1] += 1
+    return associations, product_counts
+
+
+def record_order(order_counts, pair_counts, products):
+    for product_id in products:
+        order_counts[product_id] += 1
+    for pair in combinations(products, 2):
+        pair_counts[pair] += 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    orders = make_orders(args.lines, args.products, rng)
+    print(f"{len(orders)} orders, {sum(map(len, orders))} distinct order lines")
+
+    start = time.perf_counter()
+    full_recompute(orders)
+    full = time.perf_counter() - start
+    print(f"full recompute (per request):   {full * 1000:10.1f} ms")
+
+    order_counts = defaultdict(int)
+    pair_counts = defaultdict(int)
+    start = time.perf_counter()
+    for products in orders:
+        record_order(order_counts, pair_counts, products)
+    backfill = time.perf_counter() - start
+
+    new_orders = make_orders(10_000, args.products, rng)
+    start = time.perf_counter()
+    for products in new_orders:
+        record_order(order_counts, pair_counts, products)
+    per_order = (time.perf_counter() - start) / len(new_orders)
+
+    print(f"incremental backfill (once):    {backfill * 1000:10.1f} ms")
+    print(f"incremental cost per new order: {per_order * 1e6:10.1f} us")
+    print(f"stored pairs: {len(pair_counts)}  (read cost is proportional to this, not to history)")
+
+    order_ids = [n for n, products in enumerate(orders) for _ in products]
+    product_ids = [pid for products in orders for pid in products]
+    start = time.perf_counter()
+    AssociationEngine.from_order_lines(order_ids, product_ids).rules(top=10)
+    print(f"sparse engine, order lines:     {(time.perf_counter() - start) * 1000:10.1f} ms")
+
+    pairs = [(a, b, c) for (a, b), c in pair_counts.items()]
+    start = time.perf_counter()
+    AssociationEngine.from_counts(order_counts, pairs, len(orders) + len(new_orders)).rules(top=10)
+    print(f"sparse engine, stored counts:   {(time.perf_counter() - start) * 1000:10.1f} ms")
@@ -0,0 +1,86 @@
+# bench_auth.py
+#
+# Cost of authentication on one core:
+#
+#   - password verification per hash method (what a login pays), and the
+#     resulting logins/sec
+#   - /login end to end through the Flask test client, using the seeded
+#     admin (python seed.py) from the database configured by DB_*
+#   - verifying a session token, and the same request with and without a
+#     token (the per-request overhead of being logged in)
+#
+#   python benchmarks/bench_auth.py [--seconds 2] [--methods scrypt pbkdf2:sha256:600000]
+#   python benchmarks/bench_auth.py --no-db     # skip the /login round
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import app as backend
+from auth import PasswordHasher, SessionTokens
+from seed import SEED_ADMIN_EMAIL, SEED_PASSWORD
+
+DEFAULT_METHODS = ["scrypt:32768:8:1", "scrypt:16384:8:1", "pbkdf2:sha256:600000", "pbkdf2:sha256:100000"]
+
+
+def rate(fn, seconds):
+    """Calls per second of fn() over roughly `seconds`."""
+    fn()  # warm up
+    calls = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while True:
+        fn()
+        calls += 1
+        now = time.perf_counter()
+        if now >= deadline:
+            return calls / (now - start)
+
+
+def report(label, per_second):
+    print(f"{label:<36} {per_second:12,.1f}/s   {1e6 / per_second:10.1f} us each")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2.0, help="time spent on each measurement")
+    parser.add_argument("--methods", nargs="+", default=DEFAULT_METHODS)
+    parser.add_argument("--no-db", action="store_true", help="skip /login, which needs a seeded database")
+    args = parser.parse_args()
+
+    print("password verification (= logins/sec per core):")
+    for method in args.methods:
+        hasher = PasswordHasher(method)
+        stored = hasher.hash(SEED_PASSWORD)
+        report(method, rate(lambda: hasher.verify(stored, SEED_PASSWORD), args.seconds))
+
+    client = backend.app.test_client()
+    if not args.no_db:
+        print(f"\n/login end to end (server method: {backend.password_hasher.current_prefix()}):")
+        body = {"email": SEED_ADMIN_EMAIL, "password": SEED_PASSWORD}
+
+        def login():
+            response = client.post("/login", json=body)
+            if response.status_code != 200:
+                sys.exit(f"/login failed ({response.status_code}); seed the database first: python seed.py")
+
+        report("POST /login", rate(login, args.seconds))
+
+    print("\nauthenticated request overhead:")
+    tokens = SessionTokens("bench-secret")
+    token, _ = tokens.issue(1, "admin")
+    report("SessionTokens.verify", rate(lambda: tokens.verify(token), args.seconds))
+
+    # the token is checked in before_request for every route; an unmatched
+    # URL isolates that from any handler work
+    token, _ = backend.session_tokens.issue(1, "admin")
+    headers = {"Authorization": f"Bearer {token}"}
+    with_token = rate(lambda: client.get("/bench-auth-404", headers=headers), args.seconds)
+    without_token = rate(lambda: client.get("/bench-auth-404"), args.seconds)
+    report("request with token", with_token)
+    report("request without token", without_token)
+    print(f"{'overhead per authenticated request':<36} {(1 / with_token - 1 / without_token) * 1e6:12.1f} us")
+    report("GET /session", rate(lambda: client.get("/session", headers=headers), args.seconds))
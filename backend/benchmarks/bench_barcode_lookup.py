@@ -0,0 +1,66 @@
+# bench_barcode_lookup.py
+#
+# Latency of barcode lookups served from the in-memory map, both as a raw
+# index lookup and end-to-end through /products/barcode/<code> on the Flask
+# test client (no database needed: the index is pre-built in memory).
+#
+#   python benchmarks/bench_barcode_lookup.py [--products 100000] [--lookups 20000]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import app as backend
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+def report(label, latencies):
+    print(f"{label:<22} n={len(latencies):<6} p50 {percentile(latencies, 50) * 1000:7.1f}us  "
+          f"p99 {percentile(latencies, 99) * 1000:7.1f}us  max {max(latencies) * 1000:7.1f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    backend.search_index.build(
+        {"id": i, "name": f"Product {i}", "description": "", "barcode": f"890{i:010d}",
+         "category": "Groceries", "price": 9.99, "stock": 10}
+        for i in range(1, args.products + 1)
+    )
+    codes = [f"890{rng.randint(1, args.products):010d}" for _ in range(args.lookups)]
+
+    latencies = []
+    for code in codes:
+        start = time.perf_counter()
+        backend.search_index.by_barcode(code)
+        latencies.append((time.perf_counter() - start) * 1000)
+    report("index lookup", latencies)
+
+    client = backend.app.test_client()
+    latencies = []
+    for code in codes[:5000]:
+        start = time.perf_counter()
+        client.get(f"/products/barcode/{code}")
+        latencies.append((time.perf_counter() - start) * 1000)
+    report("GET /products/barcode", latencies)
+
+    latencies = []
+    for n in range(200):
+        batch = codes[n * 50:(n + 1) * 50]
+        start = time.perf_counter()
+        client.post("/products/barcode/bulk", json={"barcodes": batch})
+        latencies.append((time.perf_counter() - start) * 1000)
+    report("POST bulk (50 codes)", latencies)
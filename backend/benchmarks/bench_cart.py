@@ -0,0 +1,145 @@
+# bench_cart.py
+#
+# Round trips and latency of adding to a cart: the old select-then-write
+# sequence of /cart/add, the upsert it was replaced with (cold and warm
+# cart_id cache), and /cart/add-many's single multi-row upsert. Runs against
+# the MySQL database configured by the DB_* environment variables, which
+# needs migration 006 applied and at least --lines products. A throwaway
+# user is created for the run and removed afterwards.
+#
+#   python benchmarks/bench_cart.py [--rounds 200] [--lines 20]
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import app as backend
+from carts import CartIdCache, add_cart_items
+from instrumentation import RequestStats, current_request_stats
+
+
+def legacy_add(conn, cursor, user_id, product_id, quantity):
+    """/cart/add as it was before the upsert rewrite."""
+    cursor.execute("SELECT cart_id FROM cart WHERE user_id = %s", (user_id,))
+    cart = cursor.fetchone()
+    if not cart:
+        cursor.execute("INSERT INTO cart (user_id) VALUES (%s)", (user_id,))
+        conn.commit()
+        cart_id = cursor.lastrowid
+    else:
+        cart_id = cart[0]
+
+    cursor.execute("SELECT cart_item_id, quantity FROM cart_items WHERE cart_id = %s AND product_id = %s",
+                   (cart_id, product_id))
+    existing = cursor.fetchone()
+    if existing:
+        cursor.execute("UPDATE cart_items SET quantity = %s WHERE cart_item_id = %s",
+                       (existing[1] + quantity, existing[0]))
+    else:
+        cursor.execute("INSERT INTO cart_items (cart_id, product_id, quantity) VALUES (%s, %s, %s)",
+                       (cart_id, product_id, quantity))
+    conn.commit()
+
+
+class CountingConnection:
+    """Counts commits, which are round trips too."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+        self._conn.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def clear_cart(conn, user_id):
+    cursor = conn.cursor()
+    cursor.execute("DELETE ci FROM cart_items ci JOIN cart c ON ci.cart_id = c.cart_id WHERE c.user_id = %s",
+                   (user_id,))
+    conn.commit()
+    cursor.close()
+
+
+def measure(label, conn, user_id, rounds, lines, add_round, adds_per_round):
+    raw = CountingConnection(conn)
+    cursor = conn.cursor()
+    stats = RequestStats()
+    token = current_request_stats.set(stats)
+    elapsed = 0.0
+    try:
+        for _ in range(rounds):
+            clear_cart(conn, user_id)
+            stats.queries.clear()
+            commits_before = raw.commits
+            start = time.perf_counter()
+            add_round(raw, cursor)
+            elapsed += time.perf_counter() - start
+        trips = (len(stats.queries) + raw.commits - commits_before) / adds_per_round
+    finally:
+        current_request_stats.reset(token)
+        cursor.close()
+
+    per_add = elapsed / (rounds * adds_per_round) * 1000
+    print(f"{label:<28} {trips:5.1f} round trips/add   {per_add:7.3f} ms/add   "
+          f"{elapsed / rounds * 1000:8.2f} ms per {lines}-product cart")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=20, help="products added per round")
+    args = parser.parse_args()
+
+    conn = backend.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT product_id FROM products ORDER BY product_id LIMIT %s", (args.lines,))
+    product_ids = [row[0] for row in cursor.fetchall()]
+    if len(product_ids) < args.lines:
+        sys.exit(f"Need at least {args.lines} products; seed the database first.")
+
+    cursor.execute("INSERT INTO users (name, email, password_hash) VALUES (%s, %s, %s)",
+                   ("Cart bench", f"cart-bench-{uuid.uuid4().hex[:8]}@example.com", "x"))
+    user_id = cursor.lastrowid
+    conn.commit()
+
+    try:
+        # each add hits an existing line half the time, as in real carts
+        def legacy_round(c, cur):
+            for pid in product_ids + product_ids[::2]:
+                legacy_add(c, cur, user_id, pid, 1)
+
+        def upsert_round(cache):
+            def run(c, cur):
+                for pid in product_ids + product_ids[::2]:
+                    add_cart_items(c, cur, cache, user_id, {pid: 1})
+            return run
+
+        def cold_round(c, cur):
+            # fresh cache every add: one extra upsert to resolve the cart
+            for pid in product_ids + product_ids[::2]:
+                add_cart_items(c, cur, CartIdCache(), user_id, {pid: 1})
+
+        def add_many_round(c, cur):
+            add_cart_items(c, cur, warm, user_id, {pid: 1 for pid in product_ids})
+
+        adds = len(product_ids) + len(product_ids[::2])
+        warm = CartIdCache()
+        measure("legacy select+write", conn, user_id, args.rounds, args.lines, legacy_round, adds)
+        measure("upsert, cold cart_id", conn, user_id, args.rounds, args.lines, cold_round, adds)
+        measure("upsert, cached cart_id", conn, user_id, args.rounds, args.lines, upsert_round(warm), adds)
+        measure("add-many (one request)", conn, user_id, args.rounds, args.lines, add_many_round, len(product_ids))
+    finally:
+        clear_cart(conn, user_id)
+        cursor.execute("DELETE FROM cart WHERE user_id = %s", (user_id,))
+        cursor.execute("DELETE FROM users WHERE user_id = %s", (user_id,))
+        conn.commit()
+        cursor.close()
+        conn.close()
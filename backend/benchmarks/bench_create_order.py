@@ -0,0 +1,97 @@
+# bench_create_order.py
+#
+# Throughput of POST /orders for 1, 10 and 100-line orders, driven through
+# the Flask test client against the MySQL database configured by the DB_*
+# environment variables. Needs at least 100 products; the products used are
+# restocked before each run so orders never fail on stock.
+#
+# A second round places 1-line orders from 1 and then --threads threads,
+# each thread on its own product, so no two orders share a product row
+# lock. Throughput that doesn't grow with threads points at rows every
+# checkout writes (rollup, association version) serializing them.
+#
+#   python benchmarks/bench_create_order.py [--orders 200] [--threads 8] [--user-id 1]
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import app as backend
+
+
+def product_ids(n):
+    conn = backend.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT product_id FROM products ORDER BY product_id LIMIT %s", (n,))
+    ids = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+    return ids
+
+
+def restock(ids, amount):
+    conn = backend.get_db_connection()
+    cursor = conn.cursor()
+    placeholders = ", ".join(["%s"] * len(ids))
+    cursor.execute(f"UPDATE products SET stock = stock + %s WHERE product_id IN ({placeholders})",
+                   [amount] + ids)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--user-id", type=int, default=1)
+    args = parser.parse_args()
+
+    client = backend.app.test_client()
+    ids = product_ids(100)
+    if len(ids) < 100:
+        sys.exit("Need at least 100 products; seed the database first.")
+
+    for lines in (1, 10, 100):
+        items = [{"product_id": pid, "quantity": 1} for pid in ids[:lines]]
+        restock(ids[:lines], args.orders)
+
+        start = time.perf_counter()
+        for _ in range(args.orders):
+            response = client.post("/orders", json={"user_id": args.user_id, "items": items})
+            if response.status_code != 200:
+                sys.exit(f"order failed: {response.get_json()}")
+        elapsed = time.perf_counter() - start
+
+        print(f"{lines:>3}-line orders: {args.orders / elapsed:8.1f} orders/s  "
+              f"{args.orders * lines / elapsed:9.1f} lines/s  "
+              f"{elapsed / args.orders * 1000:7.2f} ms/order")
+
+    def place(pid, count, failures):
+        thread_client = backend.app.test_client()
+        for _ in range(count):
+            response = thread_client.post("/orders", json={"user_id": args.user_id,
+                                                           "items": [{"product_id": pid, "quantity": 1}]})
+            if response.status_code != 200:
+                failures.append(response.get_json())
+
+    for threads in sorted({1, args.threads}):
+        per_thread = max(1, args.orders // threads)
+        restock(ids[:threads], per_thread)
+        failures = []
+        workers = [threading.Thread(target=place, args=(pid, per_thread, failures)) for pid in ids[:threads]]
+        start = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - start
+        if failures:
+            sys.exit(f"order failed: {failures[0]}")
+
+        print(f"{threads:>3} thread(s), 1-line orders on distinct products: "
+              f"{threads * per_thread / elapsed:8.1f} orders/s")
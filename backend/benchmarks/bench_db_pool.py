@@ -0,0 +1,78 @@
+# bench_db_pool.py
+#
+# Requests/sec for "connect per request" vs the pooled get_db_connection().
+# Each simulated request checks out a connection, runs one query and gives
+# the connection back. Uses MySQL when --mysql is passed (credentials from
+# the same DB_* environment variables as app.py), otherwise a SQLite file.
+#
+#   python benchmarks/bench_db_pool.py [--mysql] [--threads 8] [--requests 2000]
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from db_pool import ConnectionPool
+
+
+def make_connect(use_mysql):
+    if use_mysql:
+        import mysql.connector
+        config = {
+            "host": os.environ.get("DB_HOST", "localhost"),
+            "user": os.environ.get("DB_USER", "root"),
+            "password": os.environ.get("DB_PASS", ""),
+            "database": os.environ.get("DB_NAME", "supershop"),
+        }
+        return lambda: mysql.connector.connect(**config)
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    return lambda: sqlite3.connect(path, check_same_thread=False)
+
+
+def one_request(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1")
+    cursor.fetchall()
+    cursor.close()
+
+
+def run(label, checkout, threads, requests):
+    per_thread = requests // threads
+
+    def worker():
+        for _ in range(per_thread):
+            conn = checkout()
+            one_request(conn)
+            conn.close()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    total = per_thread * threads
+    print(f"{label:<20} {total:>7} requests  {elapsed:8.3f}s  {total / elapsed:10.1f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mysql", action="store_true")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    connect = make_connect(args.mysql)
+    pool = ConnectionPool(connect, size=args.threads, max_overflow=0)
+
+    run("connect-per-request", connect, args.threads, args.requests)
+    run("pooled", pool.acquire, args.threads, args.requests)
+    print("pool stats:", pool.stats())
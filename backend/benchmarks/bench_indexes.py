@@ -0,0 +1,143 @@
+# bench_indexes.py
+#
+# Shows what migrations/005_hot_path_indexes.sql does to the hot queries.
+# Builds a scratch database from src/data/supershop.sql, applies migrations
+# up to 004, seeds it with seed.py, then prints the EXPLAIN access path and
+# median time of each query before and after migrating to 005.
+#
+# Uses the DB_* environment variables for the server; the scratch schema
+# (BENCH_DB_NAME, default supershop_index_bench) is dropped afterwards
+# unless --keep is given.
+#
+#   python benchmarks/bench_indexes.py [--users 5000] [--products 5000] [--orders 100000]
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import mysql.connector
+
+from migrate import migrate, run_sql_file
+from seed import seed_database
+
+DB_HOST = os.environ.get("DB_HOST", "localhost")
+DB_USER = os.environ.get("DB_USER", "root")
+DB_PASS = os.environ.get("DB_PASS", "")
+BENCH_DB_NAME = os.environ.get("BENCH_DB_NAME", "supershop_index_bench")
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "src", "data", "supershop.sql")
+
+QUERIES = {
+    "user_orders": ("""
+        SELECT o.order_id, o.total, o.status, o.created_at, pa.method
+        FROM orders o
+        LEFT JOIN payments pa ON o.order_id = pa.order_id
+        WHERE o.user_id = %s
+        ORDER BY o.created_at DESC, o.order_id DESC
+        LIMIT 21
+    """, lambda s: (s["busiest_user_id"],)),
+    "completed_orders": ("""
+        SELECT COUNT(*) FROM orders WHERE status = 'completed'
+    """, lambda s: ()),
+    "product_stats": ("""
+        SELECT COUNT(DISTINCT o.order_id), SUM(oi.quantity), SUM(oi.quantity * oi.price)
+        FROM orders o
+        JOIN order_items oi ON o.order_id = oi.order_id
+        WHERE oi.product_id = %s AND o.status = 'completed'
+    """, lambda s: (s["hot_product_id"],)),
+    "popular_products": ("""
+        SELECT p.product_id, p.name, c.name, COUNT(oi.order_item_id) AS sales
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.category_id
+        LEFT JOIN order_items oi ON p.product_id = oi.product_id
+        GROUP BY p.product_id
+        ORDER BY sales DESC, p.product_id DESC
+        LIMIT 10
+    """, lambda s: ()),
+    "cart_item_lookup": ("""
+        SELECT cart_item_id, quantity FROM cart_items WHERE cart_id = %s AND product_id = %s
+    """, lambda s: (s["cart_id"], s["hot_product_id"])),
+    "admin_users": ("""
+        SELECT user_id, name, email, role, created_at FROM users ORDER BY created_at DESC LIMIT 50
+    """, lambda s: ()),
+    "categories": ("""
+        SELECT category_id, name, description FROM categories ORDER BY name
+    """, lambda s: ()),
+}
+
+
+def analyze(conn):
+    cursor = conn.cursor()
+    for table in ("users", "products", "orders", "order_items", "cart_items", "categories"):
+        cursor.execute(f"ANALYZE TABLE {table}")
+        cursor.fetchall()
+    cursor.close()
+
+
+def measure(conn, samples, repeat):
+    results = {}
+    cursor = conn.cursor(dictionary=True)
+    for name, (sql, params_for) in QUERIES.items():
+        params = params_for(samples)
+        cursor.execute("EXPLAIN " + sql, params)
+        plan = cursor.fetchall()
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            timings.append(time.perf_counter() - start)
+
+        access = ", ".join(f"{row['table']}:{row['type']}/{row['key'] or '-'}" for row in plan)
+        examined = sum(int(row["rows"] or 0) for row in plan)
+        results[name] = (access, examined, statistics.median(timings))
+    cursor.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args()
+
+    server = mysql.connector.connect(host=DB_HOST, user=DB_USER, password=DB_PASS)
+    cursor = server.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{BENCH_DB_NAME}`")
+    cursor.execute(f"CREATE DATABASE `{BENCH_DB_NAME}`")
+    cursor.close()
+
+    conn = mysql.connector.connect(host=DB_HOST, user=DB_USER, password=DB_PASS, database=BENCH_DB_NAME)
+    try:
+        run_sql_file(conn, SCHEMA_PATH)
+        migrate(conn, target="004", log=lambda message: None)
+        samples = seed_database(conn, users=args.users, products=args.products,
+                                orders=args.orders, seed=args.seed)
+        analyze(conn)
+
+        before = measure(conn, samples, args.repeat)
+        migrate(conn, target="005")
+        after = measure(conn, samples, args.repeat)
+
+        for name in QUERIES:
+            b_access, b_rows, b_time = before[name]
+            a_access, a_rows, a_time = after[name]
+            print(f"\n{name}: {b_time * 1000:.2f} ms -> {a_time * 1000:.2f} ms "
+                  f"({b_time / a_time:.1f}x), rows examined ~{b_rows} -> ~{a_rows}")
+            print(f"  before: {b_access}")
+            print(f"  after:  {a_access}")
+    finally:
+        conn.close()
+        if not args.keep:
+            cursor = server.cursor()
+            cursor.execute(f"DROP DATABASE IF EXISTS `{BENCH_DB_NAME}`")
+            cursor.close()
+        server.close()
@@ -0,0 +1,113 @@
+# bench_login_storm.py
+#
+# Mixed workload: catalog and cart readers run throughout, first alone
+# ("quiet") and then alongside a burst of logins ("storm"). With hashing
+# offloaded to the hash pool, /products and /cart latency should stay
+# about the same in both phases, and logins beyond the pool's capacity are
+# answered 429 instead of queueing. Run it once with HASH_WORKERS=0 on the
+# server to see the inline baseline.
+#
+# Needs a running server and a seeded database (see seed.py):
+#
+#   HASH_WORKERS=2 python server.py --workers 1
+#   python benchmarks/bench_login_storm.py --url http://127.0.0.1:5000
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from seed import SEED_ADMIN_EMAIL, SEED_PASSWORD
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+async def reader(client, path, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+        except httpx.HTTPError:
+            errors[path] = errors.get(path, 0) + 1
+            continue
+        if response.status_code >= 400:
+            errors[path] = errors.get(path, 0) + 1
+        else:
+            latencies.setdefault(path, []).append((time.perf_counter() - start) * 1000)
+
+
+async def login_client(client, body, deadline, outcomes):
+    while time.perf_counter() < deadline:
+        try:
+            response = await client.post("/login", json=body)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = "error"
+        outcomes[status] = outcomes.get(status, 0) + 1
+        if status == 429:
+            # honour Retry-After loosely, as a well-behaved client would
+            await asyncio.sleep(float(response.headers.get("Retry-After", 1)) / 10)
+
+
+async def run_phase(client, paths, readers, logins, body, duration):
+    deadline = time.perf_counter() + duration
+    latencies, errors, outcomes = {}, {}, {}
+    tasks = [reader(client, paths[n % len(paths)], deadline, latencies, errors) for n in range(readers)]
+    tasks += [login_client(client, body, deadline, outcomes) for _ in range(logins)]
+    await asyncio.gather(*tasks)
+    return latencies, errors, outcomes
+
+
+def report(phase, paths, latencies, errors, outcomes, duration):
+    for path in paths:
+        ms = latencies.get(path, [])
+        print(f"{phase:<6} {path:<22} {len(ms) / duration:8.1f} req/s  err {errors.get(path, 0):<4} "
+              f"p50 {percentile(ms, 50):7.1f}ms  p95 {percentile(ms, 95):7.1f}ms  p99 {percentile(ms, 99):7.1f}ms")
+    if outcomes:
+        summary = ", ".join(f"{status}: {count}" for status, count in sorted(outcomes.items(), key=str))
+        print(f"{phase:<6} {'/login':<22} {outcomes.get(200, 0) / duration:8.1f} ok/s   ({summary})")
+
+
+async def main(args):
+    body = {"email": args.email, "password": args.password}
+    limits = httpx.Limits(max_connections=args.readers + args.logins)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        response = await client.post("/login", json=body)
+        if response.status_code != 200:
+            sys.exit(f"login as {args.email} failed: {response.text}")
+        user_id = response.json()["user"]["user_id"]
+        paths = ["/products?limit=50", f"/cart/{user_id}"]
+
+        quiet = await run_phase(client, paths, args.readers, 0, body, args.duration)
+        storm = await run_phase(client, paths, args.readers, args.logins, body, args.duration)
+
+    report("quiet", paths, *quiet, args.duration)
+    report("storm", paths, *storm, args.duration)
+    print()
+    for path in paths:
+        before = percentile(quiet[0].get(path, []), 95)
+        after = percentile(storm[0].get(path, []), 95)
+        change = f"{after / before:.2f}x" if before else "-"
+        print(f"{path:<22} p95 {before:7.1f}ms -> {after:7.1f}ms  ({change})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--readers", type=int, default=8, help="concurrent /products and /cart clients")
+    parser.add_argument("--logins", type=int, default=32, help="concurrent login clients during the storm")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per phase")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--email", default=SEED_ADMIN_EMAIL)
+    parser.add_argument("--password", default=SEED_PASSWORD)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,127 @@
+# bench_product_io.py
+#
+# Throughput and memory of the bulk product pipeline (product_io.py) at
+# catalog scale: streams --products synthetic CSV rows (default 1M, with a
+# small share of invalid ones) through import_products(), then exports the
+# whole table back through export_products() into a byte counter. Peak RSS
+# is printed after each phase; it should stay flat as --products grows,
+# since neither side holds more than a batch or page in memory.
+#
+# Runs against a scratch MySQL database built from src/data/supershop.sql
+# plus all migrations (BENCH_DB_NAME, default supershop_product_io_bench,
+# dropped afterwards unless --keep), or a SQLite file with --sqlite.
+#
+#   python benchmarks/bench_product_io.py [--products 1000000] [--batch 2000]
+#   python benchmarks/bench_product_io.py --sqlite /tmp/product_io.db --products 200000
+
+import argparse
+import os
+import random
+import resource
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import mysql.connector
+
+from migrate import migrate, run_sql_file
+from product_io import BATCH_SIZE, export_products, import_products, iter_records
+from seed import ADJECTIVES, CATEGORY_NAMES, NOUNS, SQLITE_SCHEMA
+
+DB_HOST = os.environ.get("DB_HOST", "localhost")
+DB_USER = os.environ.get("DB_USER", "root")
+DB_PASS = os.environ.get("DB_PASS", "")
+BENCH_DB_NAME = os.environ.get("BENCH_DB_NAME", "supershop_product_io_bench")
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "src", "data", "supershop.sql")
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def synthetic_lines(count, seed, bad_every=1000):
+    """CSV text lines for `count` products, generated on the fly."""
+    rng = random.Random(seed)
+    yield "name,description,price,stock,barcode,category\n"
+    for i in range(1, count + 1):
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}"
+        price = "n/a" if i % bad_every == 0 else f"{rng.uniform(10, 2000):.2f}"
+        category = rng.choice(CATEGORY_NAMES)
+        yield f'"{name}",Bulk imported product,{price},{rng.randint(0, 500)},{890000000000 + i},"{category}"\n'
+
+
+def setup(args):
+    if args.sqlite:
+        if os.path.exists(args.sqlite):
+            os.remove(args.sqlite)
+        conn = sqlite3.connect(args.sqlite)
+        conn.executescript(SQLITE_SCHEMA)
+        dialect = "sqlite"
+    else:
+        server = mysql.connector.connect(host=DB_HOST, user=DB_USER, password=DB_PASS)
+        cursor = server.cursor()
+        cursor.execute(f"DROP DATABASE IF EXISTS `{BENCH_DB_NAME}`")
+        cursor.execute(f"CREATE DATABASE `{BENCH_DB_NAME}`")
+        cursor.close()
+        server.close()
+        conn = mysql.connector.connect(host=DB_HOST, user=DB_USER, password=DB_PASS, database=BENCH_DB_NAME)
+        run_sql_file(conn, SCHEMA_PATH)
+        migrate(conn, log=lambda message: None)
+        dialect = "mysql"
+
+    placeholder = "?" if dialect == "sqlite" else "%s"
+    cursor = conn.cursor()
+    # the schema dump ships sample rows; start from an empty catalog
+    for table in ("cart_items", "order_items", "products", "categories"):
+        cursor.execute(f"DELETE FROM {table}")
+    cursor.executemany(f"INSERT INTO categories (name) VALUES ({placeholder})",
+                       [(name,) for name in CATEGORY_NAMES])
+    conn.commit()
+    cursor.close()
+    return conn, dialect
+
+
+def teardown(conn, args):
+    conn.close()
+    if args.keep or args.sqlite:
+        return
+    server = mysql.connector.connect(host=DB_HOST, user=DB_USER, password=DB_PASS)
+    cursor = server.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{BENCH_DB_NAME}`")
+    cursor.close()
+    server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sqlite", metavar="PATH", help="use a SQLite file instead of a MySQL scratch database")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args()
+
+    conn, dialect = setup(args)
+    try:
+        print(f"baseline peak RSS {peak_rss_mb():.0f} MB")
+
+        records = iter_records(synthetic_lines(args.products, args.seed), "csv")
+        result = import_products(conn, dialect, records, batch_size=args.batch)
+        print(f"import  {result.inserted:>10,} rows  {result.rejected:,} rejected  {result.elapsed:7.1f}s  "
+              f"{(result.inserted + result.rejected) / result.elapsed:10,.0f} rows/s  "
+              f"peak RSS {peak_rss_mb():.0f} MB")
+
+        start = time.perf_counter()
+        size = lines = 0
+        for chunk in export_products(conn, dialect, "csv"):
+            size += len(chunk)
+            lines += chunk.count("\n")
+        elapsed = time.perf_counter() - start
+        # minus the header; descriptions contain no newlines
+        print(f"export  {lines - 1:>10,} rows  {size / 2**20:,.0f} MB CSV      {elapsed:7.1f}s  "
+              f"{(lines - 1) / elapsed:10,.0f} rows/s  peak RSS {peak_rss_mb():.0f} MB")
+    finally:
+        teardown(conn, args)
@@ -0,0 +1,299 @@
+# bench_routes.py
+#
+# End-to-end HTTP benchmark for the backend routes. Each scenario hammers
+# one route at --concurrency for --duration seconds and reports throughput,
+# error count, p50/p95/p99 latency and SQL statements per request. The
+# statement counts are read from the server's /metrics endpoint, so run the
+# server as a single process (`python server.py --dev` or `--workers 1`)
+# against a seeded database (see seed.py):
+#
+#   python seed.py --scale medium --reset --rebuild
+#   python benchmarks/bench_routes.py --url http://127.0.0.1:5000 --save-baseline base.json
+#   ... change something ...
+#   python benchmarks/bench_routes.py --url http://127.0.0.1:5000 --compare base.json
+#
+# --compare exits with status 1 if any scenario's p95 or throughput is more
+# than --threshold worse than the baseline, or if it now runs more SQL
+# statements per request (the N+1 check).
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import re
+import sys
+import time
+import uuid
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from seed import SEED_ADMIN_EMAIL, SEED_PASSWORD
+
+METRIC_LINE = re.compile(r'^db_queries_per_request_(sum|count)\{route="([^"]*)"\} (\S+)$')
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+# ---------------------
+# SCENARIOS
+# ---------------------
+# name -> (route label as reported by /metrics, request builder). A builder
+# gets (client, ctx, n, i) -- n is the virtual client, i its iteration -- and
+# returns the coroutine to time; any awaits before that are untimed setup.
+
+async def cart_item_for(client, ctx, product_id):
+    response = await client.get(f"/cart/{ctx['user_id']}")
+    for item in response.json()["items"]:
+        if item["id"] == product_id:
+            return item["cart_item_id"]
+    return None
+
+
+async def build_cart_update(client, ctx, n, i):
+    product_id = ctx["product_ids"][n % len(ctx["product_ids"])]
+    item_id = await cart_item_for(client, ctx, product_id)
+    if item_id is None:
+        await client.post("/cart/add", json={"user_id": ctx["user_id"], "product_id": product_id})
+        item_id = await cart_item_for(client, ctx, product_id)
+    return client.put("/cart/update", json={"cart_item_id": item_id, "quantity": 1 + i % 5})
+
+
+async def build_cart_remove(client, ctx, n, i):
+    product_id = ctx["product_ids"][n % len(ctx["product_ids"])]
+    await client.post("/cart/add", json={"user_id": ctx["user_id"], "product_id": product_id})
+    item_id = await cart_item_for(client, ctx, product_id)
+    return client.request("DELETE", "/cart/remove", json={"cart_item_id": item_id})
+
+
+async def simple(coro):
+    return coro
+
+
+SCENARIOS = {
+    "login": ("/login", lambda c, ctx, n, i: simple(
+        c.post("/login", json={"email": ctx["email"], "password": ctx["password"]}))),
+    "register": ("/register", lambda c, ctx, n, i: simple(
+        c.post("/register", json={"name": "Bench User", "email": f"bench-{ctx['run_id']}-{n}-{i}@example.com",
+                                  "password": "bench-password", "phone": "01700000000", "address": "Dhaka"}))),
+    "products": ("/products", lambda c, ctx, n, i: simple(
+        c.get("/products?limit=50"))),
+    "products_filtered": ("/products", lambda c, ctx, n, i: simple(
+        c.get(f"/products?category_id={ctx['category_id']}&in_stock=1&sort=-price&limit=50"))),
+    "product_search": ("/products/search", lambda c, ctx, n, i: simple(
+        c.get(f"/products/search?q={ctx['search_terms'][i % len(ctx['search_terms'])]}&limit=20"))),
+    "barcode": ("/products/barcode/<code>", lambda c, ctx, n, i: simple(
+        c.get(f"/products/barcode/{ctx['barcodes'][i % len(ctx['barcodes'])]}"))),
+    "barcode_bulk": ("/products/barcode/bulk", lambda c, ctx, n, i: simple(
+        c.post("/products/barcode/bulk", json={"barcodes": ctx["barcodes"][:50]}))),
+    "popular_products": ("/popular-products", lambda c, ctx, n, i: simple(
+        c.get("/popular-products"))),
+    "categories": ("/categories", lambda c, ctx, n, i: simple(
+        c.get("/categories"))),
+    "cart": ("/cart/<int:user_id>", lambda c, ctx, n, i: simple(
+        c.get(f"/cart/{ctx['user_id']}"))),
+    "cart_add": ("/cart/add", lambda c, ctx, n, i: simple(
+        c.post("/cart/add", json={"user_id": ctx["user_id"],
+                                  "product_id": ctx["product_ids"][i % len(ctx["product_ids"])]}))),
+    "cart_update": ("/cart/update", build_cart_update),
+    "cart_remove": ("/cart/remove", build_cart_remove),
+    "stock_bulk": ("/admin/products/stock/bulk", lambda c, ctx, n, i: simple(
+        c.post("/admin/products/stock/bulk", json={"items": [
+            # +1 then -1 per client, so stock never drops below where it started
+            {"product_id": pid, "delta": 1 if i % 2 == 0 else -1} for pid in ctx["product_ids"]
+        ]}))),
+    "user_orders": ("/user/<int:user_id>/orders", lambda c, ctx, n, i: simple(
+        c.get(f"/user/{ctx['user_id']}/orders?limit=20"))),
+    "create_order": ("/orders", lambda c, ctx, n, i: simple(
+        c.post("/orders", json={"user_id": ctx["user_id"], "items": [
+            {"product_id": pid, "quantity": 1}
+            for pid in ctx["order_product_ids"][(n + i) % 5:(n + i) % 5 + 3]
+        ]}))),
+    "sales_analytics": ("/admin/sales-analytics", lambda c, ctx, n, i: simple(
+        c.get("/admin/sales-analytics"))),
+    "purchase_associations": ("/analysis/purchase-associations", lambda c, ctx, n, i: simple(
+        c.get("/analysis/purchase-associations?top=10"))),
+    "product_analysis": ("/analysis/product/<int:product_id>", lambda c, ctx, n, i: simple(
+        c.get(f"/analysis/product/{ctx['product_ids'][i % len(ctx['product_ids'])]}"))),
+}
+
+
+async def discover(client, email, password, user_id):
+    """Log in and pick sample products, barcodes and a category from the API."""
+    response = await client.post("/login", json={"email": email, "password": password})
+    if response.status_code != 200:
+        sys.exit(f"login as {email} failed: {response.text}")
+    user = response.json()["user"]
+    # the /admin scenarios need the admin session
+    client.headers["Authorization"] = f"Bearer {response.json()['token']}"
+
+    products = (await client.get("/products?limit=100&in_stock=1")).json()["products"]
+    if len(products) < 10:
+        sys.exit("Need at least 10 products in stock; seed the database first.")
+    categories = (await client.get("/categories")).json()["categories"]
+
+    return {
+        "run_id": uuid.uuid4().hex[:8],
+        "email": email,
+        "password": password,
+        "user_id": user_id or user["user_id"],
+        "product_ids": [p["id"] for p in products],
+        "order_product_ids": [p["id"] for p in products[:8]],
+        "barcodes": [p["barcode"] for p in products if p.get("barcode")] or ["0000000000000"],
+        "search_terms": sorted({p["name"].split()[0].lower() for p in products})[:20],
+        "category_id": categories[0]["id"] if categories else 1,
+    }
+
+
+async def restock(client, product_ids, amount):
+    for pid in product_ids:
+        await client.put(f"/admin/products/{pid}/stock", json={"stock_change": amount})
+
+
+async def query_counts(client):
+    """{route: (statement sum, request count)} scraped from /metrics."""
+    counts = {}
+    text = (await client.get("/metrics")).text
+    for line in text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            kind, route, value = match.groups()
+            total, count = counts.get(route, (0.0, 0.0))
+            counts[route] = (total + float(value), count) if kind == "sum" else (total, count + float(value))
+    return counts
+
+
+async def run_scenario(client, ctx, name, concurrency, duration):
+    route, build = SCENARIOS[name]
+    latencies = []
+    errors = 0
+    before = await query_counts(client)
+    deadline = time.perf_counter() + duration
+
+    async def virtual_client(n):
+        nonlocal errors
+        for i in itertools.count():
+            if time.perf_counter() >= deadline:
+                return
+            try:
+                request = await build(client, ctx, n, i)
+                start = time.perf_counter()
+                response = await request
+                elapsed = time.perf_counter() - start
+            except (httpx.HTTPError, KeyError, TypeError, ValueError):
+                errors += 1
+                continue
+            if response.status_code >= 400:
+                errors += 1
+            else:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(virtual_client(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    after = await query_counts(client)
+    total = after.get(route, (0, 0))[0] - before.get(route, (0, 0))[0]
+    count = after.get(route, (0, 0))[1] - before.get(route, (0, 0))[1]
+
+    ms = [x * 1000 for x in latencies]
+    return {
+        "route": route,
+        "requests": len(ms),
+        "errors": errors,
+        "rps": round(len(ms) / elapsed, 1),
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        # untimed setup requests hit other routes, so they don't skew this
+        "queries_per_request": round(total / count, 2) if count else None,
+    }
+
+
+async def run_all(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        ctx = await discover(client, args.email, args.password, args.user_id)
+        results = {}
+        for name in args.only or SCENARIOS:
+            if name == "create_order":
+                # enough stock that orders never fail during the run
+                await restock(client, ctx["order_product_ids"], 1_000_000)
+            results[name] = await run_scenario(client, ctx, name, args.concurrency, args.duration)
+            report(name, results[name])
+        return results
+
+
+def report(name, r):
+    qpr = "-" if r["queries_per_request"] is None else f"{r['queries_per_request']:.1f}"
+    print(f"{name:<22} {r['rps']:8.1f} req/s  err {r['errors']:<5} p50 {r['p50_ms']:7.1f}ms  "
+          f"p95 {r['p95_ms']:7.1f}ms  p99 {r['p99_ms']:7.1f}ms  q/req {qpr}")
+
+
+def compare(results, baseline, threshold):
+    """Print deltas against `baseline`; return the names of regressed scenarios."""
+    regressed = []
+    print(f"\n{'scenario':<22} {'req/s':>16} {'p95 ms':>18} {'q/req':>12}")
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<22} (no baseline)")
+            continue
+
+        problems = []
+        if base["rps"] and r["rps"] < base["rps"] * (1 - threshold):
+            problems.append("throughput")
+        if base["p95_ms"] and r["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            problems.append("p95")
+        if base["queries_per_request"] is not None and r["queries_per_request"] is not None \
+                and r["queries_per_request"] > base["queries_per_request"] + 0.5:
+            problems.append("queries")
+
+        qpr = f"{base['queries_per_request']}->{r['queries_per_request']}"
+        print(f"{name:<22} {base['rps']:>7.1f}->{r['rps']:<7.1f} {base['p95_ms']:>8.1f}->{r['p95_ms']:<8.1f} "
+              f"{qpr:>12}  {'REGRESSED: ' + ', '.join(problems) if problems else 'ok'}")
+        if problems:
+            regressed.append(name)
+    return regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per scenario")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--email", default=SEED_ADMIN_EMAIL, help="admin account used for every scenario")
+    parser.add_argument("--password", default=SEED_PASSWORD)
+    parser.add_argument("--user-id", type=int, help="shopper for cart/order scenarios (default: the login user)")
+    parser.add_argument("--only", action="append", choices=SCENARIOS, help="run only these scenarios")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed relative slowdown before --compare fails (default 0.10)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_all(args))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"concurrency": args.concurrency, "duration": args.duration,
+                       "results": results}, f, indent=2)
+        print(f"\n✅ Baseline written to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if (baseline["concurrency"], baseline["duration"]) != (args.concurrency, args.duration):
+            print("⚠️  baseline was recorded with different --concurrency/--duration")
+        regressed = compare(results, baseline["results"], args.threshold)
+        if regressed:
+            sys.exit(f"\n❌ Regressions in: {', '.join(regressed)}")
+        print("\n✅ No regressions")
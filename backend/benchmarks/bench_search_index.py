@@ -0,0 +1,92 @@
+# bench_search_index.py
+#
+# Build time and query latency of the in-memory product search index on a
+# synthetic catalog (no database needed).
+#
+#   python benchmarks/bench_search_index.py [--products 100000] [--queries 2000]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from search_index import ProductSearchIndex
+
+WORDS = (
+    "organic fresh premium classic wireless smart mini ultra basmati rice "
+    "tea coffee milk butter cheese bread apple mango banana chicken beef "
+    "soap shampoo cable charger phone laptop mouse keyboard speaker lamp "
+    "battery bottle juice chocolate biscuit noodles oil sugar salt flour"
+).split()
+# synthetic brand/model words so the vocabulary looks like a real catalog
+SYLLABLES = "ka ro mi ta lu ne so vi da pe zu ra ko li ma".split()
+CATEGORIES = ["Electronics", "Groceries", "Dairy", "Bakery", "Beverages", "Household"]
+
+
+def make_vocabulary(rng, size=5000):
+    return ["".join(rng.sample(SYLLABLES, 3)) for _ in range(size)]
+
+
+def make_products(n, rng, brands):
+    for i in range(1, n + 1):
+        yield {
+            "id": i,
+            "name": f"{rng.choice(brands)} " + " ".join(rng.sample(WORDS, 2)) + f" {i % 500}",
+            "description": " ".join(rng.sample(WORDS, 8)),
+            "barcode": f"890{i:010d}",
+            "category": rng.choice(CATEGORIES),
+            "price": round(rng.uniform(1, 500), 2),
+            "stock": rng.randint(0, 100),
+        }
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = ProductSearchIndex()
+
+    start = time.perf_counter()
+    brands = make_vocabulary(rng)
+    index.build(make_products(args.products, rng, brands))
+    print(f"build: {args.products} products in {time.perf_counter() - start:.2f}s  {index.stats()}")
+
+    queries = []
+    for _ in range(args.queries):
+        kind = rng.random()
+        if kind < 0.3:
+            queries.append(rng.choice(brands))                             # brand lookup
+        elif kind < 0.6:
+            queries.append(f"{rng.choice(brands)} {rng.choice(WORDS)}")    # brand + word
+        elif kind < 0.8:
+            queries.append(" ".join(rng.sample(WORDS, 2)))                 # generic words
+        else:
+            brand = rng.choice(brands)
+            queries.append(brand[:rng.randint(2, len(brand))])             # typeahead
+
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        index.search(q, limit=20)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    print(f"queries: {len(latencies)}  p50 {percentile(latencies, 50):.2f}ms  "
+          f"p95 {percentile(latencies, 95):.2f}ms  p99 {percentile(latencies, 99):.2f}ms")
+
+    start = time.perf_counter()
+    for i in range(1000):
+        index.add({"id": args.products + i + 1, "name": f"new item {i}", "description": "fresh",
+                   "barcode": f"999{i:010d}", "category": "Groceries", "price": 1.0, "stock": 1})
+    print(f"incremental add: {(time.perf_counter() - start) * 1000 / 1000:.3f}ms/product")
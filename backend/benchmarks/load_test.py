@@ -0,0 +1,89 @@
+# load_test.py
+#
+# Async HTTP load generator for comparing serving modes. Start the backend
+# once as `python server.py --dev` (sync, threaded WSGI) and once as
+# `uvicorn asgi:app --port 5001` (async), then:
+#
+#   python benchmarks/load_test.py --target sync=http://127.0.0.1:5000 \
+#       --target async=http://127.0.0.1:5001 --concurrency 500 --duration 30
+#
+# Each virtual client loops over the read endpoints for the duration and
+# the report shows throughput, error count and p50/p95/p99/max latency.
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+DEFAULT_PATHS = [
+    "/products",
+    "/products?limit=50",
+    "/categories",
+    "/cart/{user_id}",
+    "/user/{user_id}/orders?limit=20",
+]
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+async def run_target(base_url, paths, concurrency, duration, timeout):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        async def virtual_client(n):
+            nonlocal errors
+            i = n
+            while time.perf_counter() < deadline:
+                path = paths[i % len(paths)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 400:
+                        errors += 1
+                    else:
+                        latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(virtual_client(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return latencies, errors, elapsed
+
+
+def report(label, latencies, errors, elapsed):
+    ms = [x * 1000 for x in latencies]
+    print(f"{label:<8} {len(ms) / elapsed:9.1f} req/s  errors {errors:<6} "
+          f"p50 {percentile(ms, 50):7.1f}ms  p95 {percentile(ms, 95):7.1f}ms  "
+          f"p99 {percentile(ms, 99):7.1f}ms  max {max(ms, default=0):7.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", action="append", required=True,
+                        help="label=base_url, may be repeated")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--path", action="append", help="override the endpoint list")
+    args = parser.parse_args()
+
+    paths = [p.format(user_id=args.user_id) for p in (args.path or DEFAULT_PATHS)]
+
+    for target in args.target:
+        label, _, url = target.partition("=")
+        latencies, errors, elapsed = asyncio.run(
+            run_target(url, paths, args.concurrency, args.duration, args.timeout))
+        report(label, latencies, errors, elapsed)
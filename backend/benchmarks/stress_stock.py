@@ -0,0 +1,109 @@
+# stress_stock.py
+#
+# Concurrency check for stock mutations: many threads place multi-item
+# orders (items listed in random order) while others push admin stock
+# adjustments at the same products. Afterwards every product's stock must
+# equal initial - units sold + successful adjustments, and never go below 0.
+# Runs through the Flask test client against the MySQL database configured
+# by the DB_* environment variables; exits non-zero on any violation.
+#
+#   python benchmarks/stress_stock.py [--threads 16] [--ops 200] [--products 5]
+
+import argparse
+import os
+import random
+import sys
+import threading
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import app as backend
+
+
+def query(sql, params=()):
+    conn = backend.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall() if cursor.with_rows else None
+    conn.commit()
+    cursor.close()
+    conn.close()
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=200, help="operations per thread")
+    parser.add_argument("--products", type=int, default=5)
+    parser.add_argument("--initial-stock", type=int, default=300)
+    parser.add_argument("--user-id", type=int, default=1)
+    args = parser.parse_args()
+
+    ids = [row[0] for row in query("SELECT product_id FROM products ORDER BY product_id LIMIT %s",
+                                   (args.products,))]
+    if len(ids) < 2:
+        sys.exit("Need at least 2 products; seed the database first.")
+
+    placeholders = ", ".join(["%s"] * len(ids))
+    query(f"UPDATE products SET stock = %s WHERE product_id IN ({placeholders})",
+          [args.initial_stock] + ids)
+
+    # stock adjustments are an admin route; sign a session for an existing
+    # admin (the role is checked against users) instead of logging in
+    admins = query("SELECT user_id FROM users WHERE role = 'admin' ORDER BY user_id LIMIT 1")
+    if not admins:
+        sys.exit("Need an admin user; seed the database first.")
+    admin_headers = {"Authorization": f"Bearer {backend.session_tokens.issue(admins[0][0], 'admin')[0]}"}
+
+    sold = Counter()
+    adjusted = Counter()
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        client = backend.app.test_client()
+        for _ in range(args.ops):
+            if rng.random() < 0.7:
+                picked = rng.sample(ids, rng.randint(1, min(3, len(ids))))
+                items = [{"product_id": pid, "quantity": rng.randint(1, 3)} for pid in picked]
+                response = client.post("/orders", json={"user_id": args.user_id, "items": items})
+                with lock:
+                    outcomes[f"order {response.status_code}"] += 1
+                    if response.status_code == 200:
+                        for item in items:
+                            sold[item["product_id"]] += item["quantity"]
+            else:
+                pid = rng.choice(ids)
+                delta = rng.choice([-5, -1, 1, 5])
+                response = client.put(f"/admin/products/{pid}/stock", json={"stock_change": delta},
+                                      headers=admin_headers)
+                with lock:
+                    outcomes[f"stock {response.status_code}"] += 1
+                    if response.status_code == 200:
+                        adjusted[pid] += delta
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    final = dict(query(f"SELECT product_id, stock FROM products WHERE product_id IN ({placeholders})", ids))
+    failures = 0
+    for pid in ids:
+        expected = args.initial_stock - sold[pid] + adjusted[pid]
+        status = "ok"
+        if final[pid] != expected:
+            status = "LOST UPDATE"
+            failures += 1
+        elif final[pid] < 0:
+            status = "OVERSOLD"
+            failures += 1
+        print(f"product {pid}: final {final[pid]:>5}  expected {expected:>5}  "
+              f"sold {sold[pid]:>5}  adjusted {adjusted[pid]:>+5}  {status}")
+
+    print("outcomes:", dict(outcomes))
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,116 @@
+# carts.py
+#
+# Cart writes built on two unique keys (migrations/006_cart_unique_keys.sql):
+#
+#   cart        UNIQUE (user_id)
+#   cart_items  UNIQUE (cart_id, product_id)
+#
+# A user's cart_id is resolved with one upsert and then cached, since a
+# user's cart row is never deleted or replaced. Adding items is a single
+# INSERT ... ON DUPLICATE KEY UPDATE that either creates the line or adds to
+# its quantity, so /cart/add is one statement plus the commit instead of up
+# to five round trips, and /cart/add-many sends every line in one
+# multi-row statement.
+
+import threading
+from collections import OrderedDict
+
+import mysql.connector
+
+# ER_NO_REFERENCED_ROW_2: cart_id or product_id doesn't exist
+ER_NO_REFERENCED_ROW = 1452
+
+# LAST_INSERT_ID(cart_id) makes lastrowid the existing id when the row is
+# already there. Each call still burns an auto-increment value, which the
+# cache keeps rare.
+CART_UPSERT_SQL = """
+    INSERT INTO cart (user_id) VALUES (%s)
+    ON DUPLICATE KEY UPDATE cart_id = LAST_INSERT_ID(cart_id)
+"""
+
+CART_ITEMS_UPSERT_SQL = """
+    INSERT INTO cart_items (cart_id, product_id, quantity)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity)
+"""
+
+
+class UnknownProduct(Exception):
+    pass
+
+
+class CartIdCache:
+    """Bounded user_id -> cart_id map shared by all request threads."""
+
+    def __init__(self, max_entries=50_000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        with self._lock:
+            cart_id = self._entries.get(user_id)
+            if cart_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return cart_id
+
+    def set(self, user_id, cart_id):
+        with self._lock:
+            self._entries[user_id] = cart_id
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def resolve_cart_id(cursor, cache, user_id):
+    """Return the user's cart_id, creating the cart if needed."""
+    cart_id = cache.get(user_id)
+    if cart_id is None:
+        cursor.execute(CART_UPSERT_SQL, (user_id,))
+        cart_id = cursor.lastrowid
+        cache.set(user_id, cart_id)
+    return cart_id
+
+
+def add_cart_items(conn, cursor, cache, user_id, quantities):
+    """
+    Add {product_id: quantity} to the user's cart and commit.
+
+    Returns the cart_id. Raises UnknownProduct if any product doesn't exist
+    (nothing is added).
+    """
+    rows = sorted(quantities.items())
+    for attempt in range(2):
+        cart_id = resolve_cart_id(cursor, cache, user_id)
+        try:
+            # executemany sends a single multi-row INSERT
+            cursor.executemany(CART_ITEMS_UPSERT_SQL, [(cart_id, pid, qty) for pid, qty in rows])
+            conn.commit()
+            return cart_id
+        except mysql.connector.Error as e:
+            conn.rollback()
+            if e.errno != ER_NO_REFERENCED_ROW:
+                raise
+            # a cached cart_id can only go stale if the cart row was removed
+            # by hand; re-resolve once before blaming the products
+            cache.discard(user_id)
+            if attempt == 1:
+                raise UnknownProduct() from None
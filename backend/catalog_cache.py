@@ -0,0 +1,90 @@
+# catalog_cache.py
+#
+# In-process cache for catalog reads (/products, /categories,
+# /popular-products, /analysis/product/<id>).
+#
+# Entries are keyed by (namespace, namespace version, request key). Writes
+# call invalidate() which bumps the namespace version, so stale entries are
+# never read again and simply age out of the LRU. The same versions feed the
+# ETags, letting unchanged reads answer 304 without touching the database.
+#
+# The cache is per process: with several workers a write only invalidates
+# the worker that handled it. The others may serve stale entries for up to
+# the TTL, and their ETags include a TTL epoch (wall-clock time // ttl) so a
+# client's cached copy stops matching at the next epoch -- at most one TTL
+# later -- instead of getting 304s indefinitely.
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class CatalogCache:
+
+    def __init__(self, max_entries=512, ttl=60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._versions = {}
+        self._lock = threading.Lock()
+        # changes on every restart so ETags from a previous process never match
+        self._boot_id = uuid.uuid4().hex[:8]
+        self.hits = 0
+        self.misses = 0
+
+    def reset_boot_id(self):
+        # called in each forked worker: versions diverge per process from here
+        self._boot_id = uuid.uuid4().hex[:8]
+
+    def version(self, namespace):
+        with self._lock:
+            return self._versions.get(namespace, 0)
+
+    def key(self, namespace, request_key):
+        return (namespace, self.version(namespace), request_key)
+
+    def etag(self, namespace, request_key):
+        digest = hashlib.sha1(request_key.encode()).hexdigest()[:12]
+        epoch = int(time.time() // self.ttl) if self.ttl > 0 else time.time_ns()
+        return f"{self._boot_id}-{namespace}-{self.version(namespace)}-{epoch}-{digest}"
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *namespaces):
+        with self._lock:
+            for namespace in namespaces:
+                self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "versions": dict(self._versions),
+            }
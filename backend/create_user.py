@@ -1,58 +1,302 @@
 # create_user.py
+#
+# Bulk user import from CSV or JSON Lines.
+#
+#   python create_user.py users.csv
+#   python create_user.py users.jsonl --batch 2000 --workers 8 --rejects rejects.csv
+#   python create_user.py - --format jsonl < users.jsonl
+#   python create_user.py --admin admin@supershop.com --name Admin   # prompts for the password
+#
+# Each record has name, email and password (or an already computed
+# password_hash), plus optional phone, address and role ("user" or
+# "admin"). CSV files need a header row with those column names.
+#
+# The file is streamed: records are validated as they are read, hashed in
+# chunks on a process pool (one process per core by default) and inserted
+# in multi-row batches, one transaction per batch, while the next chunks
+# are still hashing. Only a bounded number of chunks are in flight, so
+# memory stays flat whatever the file size.
+#
+# Duplicate emails (already in the database, or repeated in the file) are
+# detected by the users.email unique key: each batch is sent with
+# INSERT IGNORE and the affected row count says how many were skipped.
+# With --rejects, the batch's emails are then looked up to name them -- a
+# row whose stored hash isn't the one just computed was a duplicate
+# (hashes are salted, so two rows never share one). Rejected records are
+# written to --rejects as CSV (line, email, reason).
+#
+# Passwords are hashed with PASSWORD_HASH_METHOD, like the app, and are
+# never printed.
+
+import argparse
+import csv
+import getpass
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import mysql.connector
-from werkzeug.security import generate_password_hash
+
+from auth import PasswordHasher
+from product_io import format_from_name, iter_records
 
 # ---------- CONFIG ----------
-DB_HOST = "localhost"
-DB_USER = "root"
-DB_PASS = ""          # your MySQL password
-DB_NAME = "supershop"  # your database name
+DB_HOST = os.environ.get("DB_HOST", "localhost")
+DB_USER = os.environ.get("DB_USER", "root")
+DB_PASS = os.environ.get("DB_PASS", "")
+DB_NAME = os.environ.get("DB_NAME", "supershop")
+PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD") or None
 # ---------------------------
 
-def create_user(name, email, password, phone=None, address=None, role="user"):
-    try:
-        # Connect to DB
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASS,
-            database=DB_NAME
+BATCH_SIZE = 1_000
+HASH_CHUNK = 100
+ROLES = ("user", "admin")
+# column limits from supershop.sql; INSERT IGNORE would truncate silently
+MAX_LENGTHS = {"name": 100, "email": 150, "phone": 20}
+COLUMNS = ("name", "email", "phone", "address", "password_hash", "role")
+
+
+class RejectedRow(Exception):
+    pass
+
+
+# ---------------------
+# READING
+# ---------------------
+def read_records(path, fmt):
+    """Yield (line number, dict or None) from a CSV or JSON Lines file ("-" is stdin)."""
+    # same streaming parser as the product import
+    if path == "-":
+        yield from iter_records(sys.stdin, fmt)
+        return
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from iter_records(f, fmt)
+
+
+def clean_record(record):
+    """Validate one record; returns a dict with COLUMNS plus "password"."""
+    if record is None:
+        raise RejectedRow("not a valid record")
+
+    def text(key):
+        value = record.get(key)
+        value = "" if value is None else str(value).strip()
+        if len(value) > MAX_LENGTHS.get(key, len(value)):
+            raise RejectedRow(f"{key} longer than {MAX_LENGTHS[key]} characters")
+        return value or None
+
+    row = {key: text(key) for key in ("name", "email", "phone", "address")}
+    if not row["name"]:
+        raise RejectedRow("missing name")
+    if not row["email"] or "@" not in row["email"]:
+        raise RejectedRow("missing or invalid email")
+    row["role"] = text("role") or "user"
+    if row["role"] not in ROLES:
+        raise RejectedRow(f"role must be one of {', '.join(ROLES)}")
+
+    # passwords are taken verbatim, surrounding spaces included; a JSON
+    # number or list is refused rather than guessed at
+    password = record.get("password")
+    if password is not None and not isinstance(password, str):
+        raise RejectedRow("password must be a string")
+    row["password"] = password or None
+    row["password_hash"] = text("password_hash")
+    if not row["password"] and not row["password_hash"]:
+        raise RejectedRow("missing password")
+    return row
+
+
+# ---------------------
+# HASHING
+# ---------------------
+def hash_chunk(method, rows):
+    """Runs in a pool process: fill in password_hash and drop the plaintext."""
+    hasher = PasswordHasher(method)
+    for row in rows:
+        if row["password"]:
+            row["password_hash"] = hasher.hash(row["password"])
+        row["password"] = None
+    return rows
+
+
+def chunked(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def hashed_rows(rows, workers, method, chunk_size=HASH_CHUNK):
+    """Yield rows with password_hash set, in input order, hashing in parallel."""
+    if workers <= 1:
+        for chunk in chunked(rows, chunk_size):
+            yield from hash_chunk(method, chunk)
+        return
+
+    # at most 2 chunks per process queued: enough to keep every core busy
+    # while batches are inserted, without reading the whole file ahead
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in chunked(rows, chunk_size):
+            pending.append(executor.submit(hash_chunk, method, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+# ---------------------
+# WRITING
+# ---------------------
+class UserImporter:
+    """Inserts rows in batches, one transaction each, tracking duplicates."""
+
+    def __init__(self, conn, dialect, rejects=None):
+        self.conn = conn
+        self.dialect = dialect
+        self.placeholder = "?" if dialect == "sqlite" else "%s"
+        self.rejects = rejects
+        self.inserted = 0
+        self.duplicates = 0
+        self.invalid = 0
+
+    def reject(self, line_no, email, reason):
+        if self.rejects is not None:
+            self.rejects.writerow([line_no, email or "", reason])
+
+    def insert_batch(self, batch):
+        """batch is a list of (line number, row)."""
+        if not batch:
+            return
+        ignore = "INSERT OR IGNORE" if self.dialect == "sqlite" else "INSERT IGNORE"
+        sql = (f"{ignore} INTO users ({', '.join(COLUMNS)}) "
+               f"VALUES ({', '.join([self.placeholder] * len(COLUMNS))})")
+        cursor = self.conn.cursor()
+        try:
+            # mysql.connector sends this as one multi-row INSERT
+            cursor.executemany(sql, [tuple(row[c] for c in COLUMNS) for _, row in batch])
+            inserted = cursor.rowcount
+            if inserted < len(batch):
+                self.duplicates += len(batch) - inserted
+                if self.rejects is not None:
+                    self._report_duplicates(cursor, batch)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        self.inserted += inserted
+
+    def _report_duplicates(self, cursor, batch):
+        # emails compare case-insensitively under the column's collation
+        emails = sorted({row["email"] for _, row in batch})
+        cursor.execute(
+            f"SELECT email, password_hash FROM users WHERE email IN ({', '.join([self.placeholder] * len(emails))})",
+            emails,
         )
-        cursor = conn.cursor()
+        stored = {email.lower(): password_hash for email, password_hash in cursor.fetchall()}
+        for line_no, row in batch:
+            email = row["email"].lower()
+            if stored.get(email) == row["password_hash"]:
+                # inserted by this batch; a repeat further down is a duplicate of it
+                stored[email] = None
+            else:
+                self.reject(line_no, row["email"], "duplicate email")
 
-        # Hash password
-        password_hash = generate_password_hash(password)
 
-        # Insert query
-        query = """
-            INSERT INTO users (name, email, phone, address, password_hash, role)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """
+def import_users(conn, dialect, records, workers=None, batch_size=BATCH_SIZE,
+                 method=PASSWORD_HASH_METHOD, rejects=None, log=print):
+    """Import (line number, record) pairs; returns the UserImporter with the counts."""
+    importer = UserImporter(conn, dialect, rejects)
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
 
-        cursor.execute(query, (name, email, phone, address, password_hash, role))
-        conn.commit()
+    def valid_rows():
+        for line_no, record in records:
+            try:
+                row = clean_record(record)
+            except RejectedRow as e:
+                importer.invalid += 1
+                importer.reject(line_no, (record or {}).get("email"), str(e))
+                continue
+            # line numbers travel with the row through the process pool
+            row["line"] = line_no
+            yield row
 
-        print("✅ User created successfully!")
-        print("Email:", email)
-        print("Original Password:", password)
-        print("Role:", role)
+    def progress():
+        elapsed = time.perf_counter() - started
+        done = importer.inserted + importer.duplicates + importer.invalid
+        log(f"  {done:,} rows, {importer.inserted:,} inserted, {done / elapsed if elapsed else 0:,.0f} rows/s")
 
-    except Exception as e:
-        print("❌ Error:", e)
+    batch = []
+    batches = 0
+    for row in hashed_rows(valid_rows(), workers, method):
+        batch.append((row.pop("line"), row))
+        if len(batch) >= batch_size:
+            importer.insert_batch(batch)
+            batch = []
+            batches += 1
+            if batches % 10 == 0:
+                progress()
+    importer.insert_batch(batch)
 
-    finally:
-        cursor.close()
-        conn.close()
+    importer.elapsed = time.perf_counter() - started
+    return importer
+
+
+def connect(sqlite_path=None):
+    if sqlite_path:
+        return sqlite3.connect(sqlite_path), "sqlite"
+    return mysql.connector.connect(host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME), "mysql"
 
 
-# ---------- CREATE TEST USER ----------
 if __name__ == "__main__":
-    create_user(
-        name="Admin",
-        email="admin@supershop.com",
-        password="admin123",
-        phone="01700000001",
-        address="Dhaka",
-        role="admin"
-    )
+    parser = argparse.ArgumentParser(description="Import users from CSV or JSON Lines")
+    parser.add_argument("path", nargs="?", help='input file, or "-" for stdin')
+    parser.add_argument("--format", choices=("csv", "jsonl"),
+                        help="input format (default: from the file extension, csv for stdin)")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="rows per INSERT/transaction")
+    parser.add_argument("--workers", type=int, help="hashing processes (default: one per core)")
+    parser.add_argument("--rejects", metavar="PATH", help="write rejected rows (line, email, reason) as CSV")
+    parser.add_argument("--admin", metavar="EMAIL", help="create one admin instead, prompting for the password")
+    parser.add_argument("--name", default="Admin", help="name for --admin")
+    parser.add_argument("--sqlite", metavar="PATH", help="write to a SQLite file instead of MySQL")
+    args = parser.parse_args()
+
+    if args.admin:
+        password = getpass.getpass(f"Password for {args.admin}: ")
+        records = [(1, {"name": args.name, "email": args.admin, "password": password, "role": "admin"})]
+        args.workers = 1
+    elif args.path:
+        fmt = args.format or format_from_name(args.path)
+        records = read_records(args.path, fmt)
+    else:
+        parser.error("give an input file or --admin EMAIL")
+
+    rejects_file = open(args.rejects, "w", newline="") if args.rejects else None
+    rejects = csv.writer(rejects_file) if rejects_file else None
+    if rejects:
+        rejects.writerow(["line", "email", "reason"])
+
+    conn, dialect = connect(args.sqlite)
+    try:
+        result = import_users(conn, dialect, records, workers=args.workers, batch_size=args.batch, rejects=rejects)
+    finally:
+        conn.close()
+        if rejects_file:
+            rejects_file.close()
+
+    total = result.inserted + result.duplicates + result.invalid
+    rate = total / result.elapsed if result.elapsed else 0
+    print(f"✅ {result.inserted:,} users created, {result.duplicates:,} duplicate emails, "
+          f"{result.invalid:,} invalid rows in {result.elapsed:.1f}s ({rate:,.0f} rows/s)")
+    if result.duplicates + result.invalid and not args.rejects:
+        print("   Re-run with --rejects PATH to list the skipped rows.")
@@ -0,0 +1,236 @@
+# db_pool.py
+#
+# Small thread-safe connection pool used by app.py's get_db_connection().
+# Works with any DB-API connection factory (mysql.connector in the app,
+# sqlite3 in the benchmarks).
+
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the pool timeout."""
+
+
+def default_ping(raw):
+    # mysql.connector exposes ping(); anything else gets a trivial query
+    if hasattr(raw, "ping"):
+        raw.ping(reconnect=False)
+    else:
+        cursor = raw.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        cursor.close()
+
+
+class PooledConnection:
+    """Proxy around a raw connection; close() hands it back to the pool."""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self.closed = False
+
+    def cursor(self, *args, **kwargs):
+        if self.closed:
+            raise RuntimeError("Connection used after close() (cursor)")
+        cursor = self._raw.cursor(*args, **kwargs)
+        if self._pool.cursor_wrapper is not None:
+            cursor = self._pool.cursor_wrapper(cursor)
+        return cursor
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._pool.release(self._raw)
+
+    def __getattr__(self, name):
+        # after close() the raw connection may already belong to someone else
+        if self.__dict__.get("closed"):
+            raise RuntimeError(f"Connection used after close() ({name})")
+        return getattr(self._raw, name)
+
+
+class ConnectionPool:
+    """
+    Bounded pool: `size` connections are kept idle between requests, up to
+    `max_overflow` extra are opened under load and closed again on release.
+    Once size + max_overflow are checked out, callers wait up to `timeout`
+    seconds before PoolTimeout is raised. `cursor_wrapper`, if set, wraps
+    every cursor handed out (used for query instrumentation).
+    """
+
+    def __init__(self, connect, size=5, max_overflow=10, timeout=30.0,
+                 idle_timeout=300.0, ping=default_ping, ping_interval=5.0,
+                 cursor_wrapper=None):
+        self._connect = connect
+        self.cursor_wrapper = cursor_wrapper
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._ping = ping
+        self.ping_interval = ping_interval
+
+        self._idle = deque()  # (raw, last_used)
+        self._open = 0
+        self._lock = threading.Condition()
+
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "timeouts": 0,
+            "ping_failures": 0,
+            "reaped": 0,
+        }
+
+    # ---------------------
+    # CHECKOUT / RELEASE
+    # ---------------------
+    def acquire(self):
+        deadline = None
+        waited_from = None
+
+        with self._lock:
+            while True:
+                self._reap_idle_locked()
+
+                if self._idle:
+                    raw, last_used = self._idle.pop()
+                    break
+
+                if self._open < self.size + self.max_overflow:
+                    # reserve the slot before connecting outside the lock
+                    self._open += 1
+                    raw = None
+                    break
+
+                if deadline is None:
+                    deadline = time.monotonic() + self.timeout
+                    waited_from = time.monotonic()
+                    self._stats["waits"] += 1
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No database connection available within {self.timeout}s"
+                    )
+                self._lock.wait(remaining)
+
+            if waited_from is not None:
+                self._stats["wait_time_total"] += time.monotonic() - waited_from
+            self._stats["checkouts"] += 1
+
+        if raw is None:
+            raw = self._new_connection()
+        elif time.monotonic() - last_used > self.ping_interval and not self._alive(raw):
+            self._discard(raw, count_slot=False)
+            raw = self._new_connection()
+
+        return PooledConnection(self, raw)
+
+    def release(self, raw):
+        try:
+            # never hand an open transaction to the next request
+            if getattr(raw, "in_transaction", False):
+                raw.rollback()
+        except Exception:
+            self._discard(raw)
+            return
+
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((raw, time.monotonic()))
+                self._lock.notify()
+                return
+
+        # overflow connection: close it and free the slot
+        self._discard(raw)
+
+    # ---------------------
+    # MAINTENANCE
+    # ---------------------
+    def reap_idle(self):
+        with self._lock:
+            self._reap_idle_locked()
+
+    def close_all(self):
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for raw, _ in idle:
+            self._discard(raw)
+
+    def reset_after_fork(self):
+        """
+        In a forked child: forget every connection inherited from the parent.
+        They are not closed -- that would end the parent's sessions on the
+        shared sockets -- only kept referenced so they are never finalized.
+        """
+        self._inherited = [raw for raw, _ in self._idle]
+        self._idle = deque()
+        self._open = 0
+        self._lock = threading.Condition()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = self.size
+            stats["max_overflow"] = self.max_overflow
+            stats["open"] = self._open
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._open - len(self._idle)
+        return stats
+
+    # ---------------------
+    # INTERNALS
+    # ---------------------
+    def _new_connection(self):
+        try:
+            raw = self._connect()
+        except Exception:
+            with self._lock:
+                self._open -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._stats["created"] += 1
+        return raw
+
+    def _alive(self, raw):
+        try:
+            self._ping(raw)
+            return True
+        except Exception:
+            with self._lock:
+                self._stats["ping_failures"] += 1
+            return False
+
+    def _discard(self, raw, count_slot=True):
+        try:
+            raw.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._stats["closed"] += 1
+            if count_slot:
+                self._open -= 1
+                self._lock.notify()
+
+    def _reap_idle_locked(self):
+        # oldest connections sit at the left end of the deque
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            raw, _ = self._idle.popleft()
+            self._open -= 1
+            self._stats["reaped"] += 1
+            try:
+                raw.close()
+            except Exception:
+                pass
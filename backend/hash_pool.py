@@ -0,0 +1,148 @@
+# hash_pool.py
+#
+# Runs password hashing in a small pool of worker processes so a burst of
+# logins or registrations doesn't hold the GIL of the web worker and stall
+# cheap requests (/products, /cart) being served by its other threads.
+#
+# Admission is bounded: at most `workers + max_pending` hashes may be in
+# flight per web worker. Past that, hash()/verify() raise HashPoolBusy at
+# once instead of queueing, and the routes answer 429 with Retry-After, so
+# a login storm turns into fast rejections rather than an ever-growing
+# backlog of slow requests.
+#
+#   hasher = HashPool(PasswordHasher("scrypt:32768:8:1"), workers=2, max_pending=16)
+#   hasher.verify(stored_hash, password)     # same interface as PasswordHasher
+#
+# The process pool is created on first use, so a preforking server that
+# imports the app in its master starts one pool per worker after the fork.
+# Worker processes are spawned rather than forked, since the web worker
+# already runs threads and holds sockets, and run at a lower CPU priority
+# (`nice`) so that on a busy host request threads win the CPU over hashing.
+# workers=0 hashes on the calling thread but keeps the admission bound.
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+
+class HashPoolBusy(Exception):
+    pass
+
+
+def lower_priority(increment):
+    # pool initializer; os.nice doesn't exist on Windows
+    if increment and hasattr(os, "nice"):
+        os.nice(increment)
+
+
+class HashPool:
+
+    def __init__(self, hasher, workers=2, max_pending=16, timeout=10.0, nice=10):
+        self.hasher = hasher
+        self.workers = workers
+        self.nice = nice
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(1, workers + max_pending))
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    # PasswordHasher interface
+
+    def hash(self, password):
+        return self._call(self.hasher.hash, password)
+
+    def verify(self, stored_hash, password):
+        return self._call(self.hasher.verify, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        return self.hasher.needs_rehash(stored_hash)
+
+    def current_prefix(self):
+        return self.hasher.current_prefix()
+
+    # pool
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"),
+                                                     initializer=lower_priority, initargs=(self.nice,))
+            return self._executor
+
+    def _admit(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashPoolBusy("Too many password checks in progress, try again shortly")
+        with self._lock:
+            self._in_flight += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def _call(self, fn, *args):
+        self._admit()
+        if not self.workers:
+            try:
+                return fn(*args)
+            finally:
+                self._release()
+
+        try:
+            executor = self._get_executor()
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._reset(executor)
+            self._release()
+            raise HashPoolBusy("Password hashing workers restarting, try again shortly") from None
+        except BaseException:
+            self._release()
+            raise
+        # the slot is freed when the hash actually finishes, not when the
+        # caller stops waiting for it
+        future.add_done_callback(self._release)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.timeouts += 1
+            raise HashPoolBusy("Password check timed out, try again shortly") from None
+        except BrokenProcessPool:
+            # a worker died (OOM kill, ...); start a fresh pool next time
+            self._reset(executor)
+            raise HashPoolBusy("Password hashing workers restarting, try again shortly") from None
+
+    def _reset(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
@@ -0,0 +1,194 @@
+# instrumentation.py
+#
+# Request-level performance accounting and a Prometheus text exporter.
+#
+# Every request gets a RequestStats object (held in a ContextVar so the
+# analytics executor's worker threads can report into it too). Cursors
+# handed out by the connection pool are wrapped in InstrumentedCursor,
+# which times each statement and records it on the current request. At the
+# end of the request the totals feed per-route histograms:
+#
+#   http_request_duration_seconds   latency
+#   db_queries_per_request          statement count (catches N+1 regressions)
+#   db_time_per_request_seconds     cumulative time spent in SQL
+#   db_pool_wait_seconds            time spent waiting for a pooled connection
+#
+# Metrics are per process; with several workers each one exposes its own.
+
+import threading
+import time
+from contextvars import ContextVar
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+current_request_stats = ContextVar("current_request_stats", default=None)
+
+
+class RequestStats:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []        # (sql, seconds, rows)
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+        self._lock = threading.Lock()
+
+    def record_query(self, sql, seconds, rows):
+        with self._lock:
+            self.queries.append((sql, seconds, rows))
+            self.db_time += seconds
+
+    def record_pool_wait(self, seconds):
+        with self._lock:
+            self.pool_wait += seconds
+
+
+class InstrumentedCursor:
+    """
+    Times execute()/executemany() on a DB-API cursor. `on_query(cursor, sql,
+    params, seconds, rowcount)` is called after every statement and
+    `on_rows(sql, n)` for rows read back with fetchall()/fetchone().
+    """
+
+    def __init__(self, cursor, on_query=None, on_rows=None):
+        self._cursor = cursor
+        self._on_query = on_query
+        self._on_rows = on_rows
+        self._last_sql = None
+
+    def _timed(self, method, sql, args):
+        self._last_sql = sql
+        start = time.perf_counter()
+        try:
+            return method(sql, *args)
+        finally:
+            seconds = time.perf_counter() - start
+            rows = getattr(self._cursor, "rowcount", -1)
+            stats = current_request_stats.get()
+            if stats is not None:
+                stats.record_query(sql, seconds, rows)
+            if self._on_query is not None:
+                self._on_query(self._cursor, sql, args[0] if args else None, seconds, rows)
+
+    def execute(self, sql, *args, **kwargs):
+        return self._timed(lambda q, *a: self._cursor.execute(q, *a, **kwargs), sql, args)
+
+    def executemany(self, sql, *args, **kwargs):
+        return self._timed(lambda q, *a: self._cursor.executemany(q, *a, **kwargs), sql, args)
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        if self._on_rows is not None:
+            self._on_rows(self._last_sql, len(rows))
+        return rows
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if self._on_rows is not None and row is not None:
+            self._on_rows(self._last_sql, 1)
+        return row
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.series = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{escape_label(v)}"' for k, v in pairs) + "}"
+
+
+class Metrics:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}  # (route, method, status) -> count
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.db_queries = Histogram(COUNT_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS)
+        self.pool_wait = Histogram(LATENCY_BUCKETS)
+        self.slow_requests = 0
+
+    def observe_request(self, route, method, status, stats, duration, slow):
+        with self._lock:
+            key = (route, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.observe((route, method), duration)
+            self.db_queries.observe((route,), len(stats.queries))
+            self.db_time.observe((route,), stats.db_time)
+            self.pool_wait.observe((route,), stats.pool_wait)
+            if slow:
+                self.slow_requests += 1
+
+    def render(self, gauges=(), counters=()):
+        """
+        Prometheus text exposition. `gauges` is an iterable of
+        (name, help, value) for point-in-time values such as pool usage;
+        `counters` likewise for running totals kept elsewhere (pool
+        checkouts, cache hits), whose names should end in _total.
+        """
+        lines = []
+        with self._lock:
+            lines += [
+                "# HELP http_requests_total Requests handled, by route, method and status.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (route, method, status), count in sorted(self.requests.items()):
+                labels = format_labels(("route", "method", "status"), (route, method, status))
+                lines.append(f"http_requests_total{labels} {count}")
+
+            for name, help_text, histogram, label_names in (
+                ("http_request_duration_seconds", "Request latency.", self.latency, ("route", "method")),
+                ("db_queries_per_request", "SQL statements executed per request.", self.db_queries, ("route",)),
+                ("db_time_per_request_seconds", "Cumulative SQL time per request.", self.db_time, ("route",)),
+                ("db_pool_wait_seconds", "Time spent waiting for a pooled connection per request.",
+                 self.pool_wait, ("route",)),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for labels, series in sorted(histogram.series.items()):
+                    for bound, count in zip(histogram.buckets, series):
+                        lines.append(f"{name}_bucket{format_labels(label_names, labels, ('le', bound))} {count}")
+                    lines.append(f"{name}_bucket{format_labels(label_names, labels, ('le', '+Inf'))} {series[-1]}")
+                    lines.append(f"{name}_sum{format_labels(label_names, labels)} {series[-2]}")
+                    lines.append(f"{name}_count{format_labels(label_names, labels)} {series[-1]}")
+
+            lines += [
+                "# HELP slow_requests_total Requests over the slow-request threshold.",
+                "# TYPE slow_requests_total counter",
+                f"slow_requests_total {self.slow_requests}",
+            ]
+
+        for name, help_text, value in gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+        for name, help_text, value in counters:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {value}"]
+
+        return "\n".join(lines) + "\n"
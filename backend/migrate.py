@@ -0,0 +1,200 @@
+# migrate.py
+#
+# Versioned schema migrations. Files in migrations/ are named
+# NNN_description.sql and applied in order; each applied version is
+# recorded in schema_migrations together with a checksum of the file.
+#
+#   python migrate.py                 # apply everything pending
+#   python migrate.py up 005          # apply pending migrations up to 005
+#   python migrate.py status          # list applied / pending versions
+#   python migrate.py baseline 004    # mark 001-004 as applied without running
+#                                     # them (databases migrated by hand)
+#
+# MySQL commits DDL implicitly, so a migration that fails halfway is not
+# rolled back: fix the database or the file, then run again.
+
+import hashlib
+import os
+import re
+import sys
+
+import mysql.connector
+
+# ---------- CONFIG ----------
+DB_HOST = os.environ.get("DB_HOST", "localhost")
+DB_USER = os.environ.get("DB_USER", "root")
+DB_PASS = os.environ.get("DB_PASS", "")
+DB_NAME = os.environ.get("DB_NAME", "supershop")
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+# ---------------------------
+
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+SCHEMA_MIGRATIONS_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(20) NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        checksum CHAR(40) NOT NULL,
+        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (version)
+    )
+"""
+
+
+def split_statements(sql):
+    """Split a SQL script on semicolons outside quotes and comments."""
+    statements, current = [], []
+    i, n = 0, len(sql)
+    quote = None
+
+    while i < n:
+        ch = sql[i]
+        if quote:
+            current.append(ch)
+            if ch == "\\" and i + 1 < n:
+                current.append(sql[i + 1])
+                i += 1
+            elif ch == quote:
+                quote = None
+        elif ch in ("'", '"', "`"):
+            quote = ch
+            current.append(ch)
+        elif sql.startswith("--", i) or ch == "#":
+            # line comment: skip to end of line
+            end = sql.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        elif ch == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def run_sql_file(conn, path):
+    with open(path, encoding="utf-8") as f:
+        statements = split_statements(f.read())
+    cursor = conn.cursor()
+    try:
+        for statement in statements:
+            cursor.execute(statement)
+            if cursor.with_rows:
+                cursor.fetchall()
+        conn.commit()
+    finally:
+        cursor.close()
+    return len(statements)
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """[(version, name, path)] sorted by version."""
+    found = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            found.append((match.group(1), match.group(2), os.path.join(directory, filename)))
+    found.sort(key=lambda m: int(m[0]))
+
+    versions = [version for version, _, _ in found]
+    duplicates = {v for v in versions if versions.count(v) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate migration versions: {', '.join(sorted(duplicates))}")
+    return found
+
+
+def file_checksum(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def applied_migrations(conn):
+    """{version: checksum} of migrations already recorded."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SCHEMA_MIGRATIONS_SQL)
+        cursor.execute("SELECT version, checksum FROM schema_migrations")
+        return dict(cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def record_migration(conn, version, name, checksum):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+            (version, name, checksum),
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def migrate(conn, target=None, directory=MIGRATIONS_DIR, log=print):
+    """Apply pending migrations (up to `target`, inclusive). Returns versions applied."""
+    applied = applied_migrations(conn)
+    done = []
+
+    for version, name, path in discover_migrations(directory):
+        if target is not None and int(version) > int(target):
+            break
+        checksum = file_checksum(path)
+        if version in applied:
+            if applied[version] != checksum:
+                log(f"⚠️  {version}_{name}.sql changed after it was applied")
+            continue
+
+        count = run_sql_file(conn, path)
+        record_migration(conn, version, name, checksum)
+        log(f"✅ Applied {version}_{name}.sql ({count} statements)")
+        done.append(version)
+
+    return done
+
+
+def baseline(conn, target, directory=MIGRATIONS_DIR, log=print):
+    """Record migrations up to `target` as applied without executing them."""
+    applied = applied_migrations(conn)
+    for version, name, path in discover_migrations(directory):
+        if int(version) > int(target):
+            break
+        if version not in applied:
+            record_migration(conn, version, name, file_checksum(path))
+            log(f"✅ Marked {version}_{name}.sql as applied")
+
+
+def status(conn, directory=MIGRATIONS_DIR):
+    applied = applied_migrations(conn)
+    return [
+        (version, name, version in applied)
+        for version, name, _ in discover_migrations(directory)
+    ]
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:] or ["up"]
+    command = args[0]
+    if command not in ("up", "status", "baseline") or len(args) > 2 or (command == "baseline" and len(args) != 2):
+        sys.exit("usage: python migrate.py [up [VERSION] | status | baseline VERSION]")
+
+    conn = mysql.connector.connect(host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME)
+    try:
+        if command == "status":
+            for version, name, is_applied in status(conn):
+                print(f"{'applied' if is_applied else 'pending':8} {version}_{name}.sql")
+        elif command == "baseline":
+            baseline(conn, args[1])
+        else:
+            applied = migrate(conn, target=args[1] if len(args) > 1 else None)
+            if not applied:
+                print("✅ Database is up to date")
+    finally:
+        conn.close()
@@ -0,0 +1,8 @@
+-- Indexes backing the /products filters and sort keys
+-- (category + price range, price/name/stock ordering with product_id tiebreak)
+
+ALTER TABLE `products`
+  ADD KEY `idx_products_category_price` (`category_id`, `price`, `product_id`),
+  ADD KEY `idx_products_price` (`price`, `product_id`),
+  ADD KEY `idx_products_name` (`name`, `product_id`),
+  ADD KEY `idx_products_stock` (`stock`, `product_id`);
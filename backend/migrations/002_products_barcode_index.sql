@@ -0,0 +1,4 @@
+-- Index for barcode lookups (/products/barcode/<code> and the bulk variant)
+
+ALTER TABLE `products`
+  ADD KEY `idx_products_barcode` (`barcode`);
@@ -0,0 +1,19 @@
+-- Materialized co-purchase counts, maintained by create_order
+-- (backfill with: python associations.py rebuild)
+
+CREATE TABLE `product_order_counts` (
+  `product_id` int(11) NOT NULL,
+  `order_count` int(11) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`product_id`),
+  CONSTRAINT `product_order_counts_ibfk_1` FOREIGN KEY (`product_id`) REFERENCES `products` (`product_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+CREATE TABLE `product_pair_counts` (
+  `product_a` int(11) NOT NULL,
+  `product_b` int(11) NOT NULL,
+  `co_count` int(11) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`product_a`, `product_b`),
+  KEY `product_b` (`product_b`),
+  CONSTRAINT `product_pair_counts_ibfk_1` FOREIGN KEY (`product_a`) REFERENCES `products` (`product_id`),
+  CONSTRAINT `product_pair_counts_ibfk_2` FOREIGN KEY (`product_b`) REFERENCES `products` (`product_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
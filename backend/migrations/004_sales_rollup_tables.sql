@@ -0,0 +1,30 @@
+-- Pre-aggregated sales for /admin/sales-analytics, maintained by create_order
+-- (backfill with: python rollups.py rebuild)
+
+CREATE TABLE `sales_daily_rollup` (
+  `sale_date` date NOT NULL,
+  `order_count` int(11) NOT NULL DEFAULT 0,
+  `items_sold` int(11) NOT NULL DEFAULT 0,
+  `revenue` decimal(14,2) NOT NULL DEFAULT 0.00,
+  `completed_revenue` decimal(14,2) NOT NULL DEFAULT 0.00,
+  PRIMARY KEY (`sale_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+CREATE TABLE `sales_product_rollup` (
+  `product_id` int(11) NOT NULL,
+  `quantity` int(11) NOT NULL DEFAULT 0,
+  `revenue` decimal(14,2) NOT NULL DEFAULT 0.00,
+  `order_count` int(11) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`product_id`),
+  KEY `idx_sales_product_quantity` (`quantity`),
+  CONSTRAINT `sales_product_rollup_ibfk_1` FOREIGN KEY (`product_id`) REFERENCES `products` (`product_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+CREATE TABLE `sales_category_rollup` (
+  `category_id` int(11) NOT NULL,
+  `quantity` int(11) NOT NULL DEFAULT 0,
+  `revenue` decimal(14,2) NOT NULL DEFAULT 0.00,
+  `order_count` int(11) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`category_id`),
+  CONSTRAINT `sales_category_rollup_ibfk_1` FOREIGN KEY (`category_id`) REFERENCES `categories` (`category_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
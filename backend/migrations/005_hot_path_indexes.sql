@@ -0,0 +1,33 @@
+-- Composite indexes for the remaining hot WHERE / JOIN / ORDER BY paths.
+-- Single-column keys that a new composite starts with are dropped in the
+-- same statement (the composite still backs their foreign key).
+
+-- /user/<id>/orders: WHERE user_id ORDER BY created_at DESC, order_id DESC,
+-- including the keyset (before, before_id) pages
+ALTER TABLE `orders`
+  DROP KEY `user_id`,
+  ADD KEY `idx_orders_user_created` (`user_id`, `created_at`, `order_id`);
+
+-- status = 'completed' counts and filters (purchase associations,
+-- /analysis/product/<id>, association and rollup rebuilds)
+ALTER TABLE `orders`
+  ADD KEY `idx_orders_status_created` (`status`, `created_at`);
+
+-- /analysis/product/<id> and /popular-products look items up by product;
+-- quantity and price make the per-product aggregates index-only
+ALTER TABLE `order_items`
+  DROP KEY `product_id`,
+  ADD KEY `idx_order_items_product_order` (`product_id`, `order_id`, `quantity`, `price`);
+
+-- cart add/update: WHERE cart_id = ? AND product_id = ?
+ALTER TABLE `cart_items`
+  DROP KEY `cart_id`,
+  ADD KEY `idx_cart_items_cart_product` (`cart_id`, `product_id`);
+
+-- /admin/users: ORDER BY created_at DESC
+ALTER TABLE `users`
+  ADD KEY `idx_users_created` (`created_at`);
+
+-- /categories: ORDER BY name
+ALTER TABLE `categories`
+  ADD KEY `idx_categories_name` (`name`);
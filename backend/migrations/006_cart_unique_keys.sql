@@ -0,0 +1,45 @@
+-- One cart per user and one line per product in a cart, so cart writes can
+-- be single INSERT ... ON DUPLICATE KEY UPDATE statements (see carts.py).
+-- Existing duplicates are merged first: extra carts fold into the user's
+-- oldest cart, duplicate lines into the oldest line with summed quantities.
+
+UPDATE cart_items ci
+JOIN cart c ON c.cart_id = ci.cart_id
+JOIN (
+  SELECT user_id, MIN(cart_id) AS keep_id
+  FROM cart
+  WHERE user_id IS NOT NULL
+  GROUP BY user_id
+  HAVING COUNT(*) > 1
+) k ON k.user_id = c.user_id
+SET ci.cart_id = k.keep_id
+WHERE ci.cart_id <> k.keep_id;
+
+DELETE c
+FROM cart c
+JOIN cart k ON k.user_id = c.user_id AND k.cart_id < c.cart_id;
+
+CREATE TEMPORARY TABLE cart_item_totals AS
+SELECT MIN(cart_item_id) AS keep_id, SUM(quantity) AS quantity
+FROM cart_items
+GROUP BY cart_id, product_id
+HAVING COUNT(*) > 1;
+
+UPDATE cart_items ci
+JOIN cart_item_totals t ON t.keep_id = ci.cart_item_id
+SET ci.quantity = t.quantity;
+
+DROP TEMPORARY TABLE cart_item_totals;
+
+DELETE ci
+FROM cart_items ci
+JOIN cart_items k
+  ON k.cart_id = ci.cart_id AND k.product_id = ci.product_id AND k.cart_item_id < ci.cart_item_id;
+
+ALTER TABLE `cart`
+  DROP KEY `user_id`,
+  ADD UNIQUE KEY `uq_cart_user` (`user_id`);
+
+ALTER TABLE `cart_items`
+  DROP KEY `idx_cart_items_cart_product`,
+  ADD UNIQUE KEY `uq_cart_items_cart_product` (`cart_id`, `product_id`);
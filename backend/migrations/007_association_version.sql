@@ -0,0 +1,12 @@
+-- Version of the materialized co-purchase counts. create_order bumps it
+-- right after committing the counts (rebuild_associations within its own
+-- transaction), so the endpoint can keep its built AssociationEngine until
+-- it moves.
+
+CREATE TABLE `association_version` (
+  `id` tinyint(4) NOT NULL,
+  `version` bigint(20) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+INSERT INTO `association_version` (`id`, `version`) VALUES (1, 0);
@@ -0,0 +1,7 @@
+-- The product's category when the order was placed, so rollups.py rebuild
+-- attributes sales the same way create_order's incremental rollups do.
+-- Rows from before this migration stay NULL and fall back to the product's
+-- current category.
+
+ALTER TABLE `order_items`
+  ADD COLUMN `category_id` int(11) DEFAULT NULL AFTER `product_id`;
@@ -0,0 +1,15 @@
+-- Every order bumps today's row in sales_daily_rollup and one row per
+-- category in sales_category_rollup, inside create_order's transaction. A
+-- single row per day / category would make concurrent checkouts queue on
+-- it until commit, so each is split into ROLLUP_SHARDS rows (see
+-- rollups.py) picked by order_id; readers SUM over the shards.
+
+ALTER TABLE `sales_daily_rollup`
+  ADD COLUMN `shard` tinyint(4) NOT NULL DEFAULT 0 AFTER `sale_date`,
+  DROP PRIMARY KEY,
+  ADD PRIMARY KEY (`sale_date`, `shard`);
+
+ALTER TABLE `sales_category_rollup`
+  ADD COLUMN `shard` tinyint(4) NOT NULL DEFAULT 0 AFTER `category_id`,
+  DROP PRIMARY KEY,
+  ADD PRIMARY KEY (`category_id`, `shard`);
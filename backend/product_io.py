@@ -0,0 +1,414 @@
+# product_io.py
+#
+# Bulk product import and export, shared by the admin endpoints
+# (POST /admin/products/import, GET /admin/products/export) and the CLI:
+#
+#   python product_io.py import products.csv --errors errors.csv
+#   python product_io.py import products.jsonl --create-categories
+#   python product_io.py export products.csv            # "-" for stdout
+#
+# Records are CSV (header row) or JSON Lines with name, price and either
+# category (a name) or category_id, plus optional description, stock and
+# barcode -- the same columns the export writes, so an export can be fed
+# straight back in.
+#
+# Import streams its input: rows are validated one at a time and inserted
+# in multi-row batches, one transaction per batch, so memory is bounded by
+# the batch size rather than the file. Category names are resolved from a
+# dict loaded once per import (new names can be created on the fly with
+# create_categories). A row that fails validation, or that the database
+# rejects, is reported with its line number and the rest of the file is
+# still imported; when a batch insert fails it is retried row by row to
+# find the culprits. LOAD DATA INFILE would be faster still, but needs
+# local_infile on both ends and reports errors per file, not per row.
+#
+# Export pages through products by primary key (keyset pagination), so it
+# also runs in constant memory and never holds long locks.
+
+import argparse
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+
+import mysql.connector
+
+# ---------- CONFIG ----------
+DB_HOST = os.environ.get("DB_HOST", "localhost")
+DB_USER = os.environ.get("DB_USER", "root")
+DB_PASS = os.environ.get("DB_PASS", "")
+DB_NAME = os.environ.get("DB_NAME", "supershop")
+# ---------------------------
+
+BATCH_SIZE = 2_000
+EXPORT_PAGE = 5_000
+# column limits from supershop.sql
+MAX_LENGTHS = {"name": 150, "barcode": 100, "category": 100}
+MAX_PRICE = Decimal("99999999.99")  # decimal(10,2)
+INSERT_COLUMNS = ("category_id", "name", "description", "price", "stock", "barcode")
+EXPORT_COLUMNS = ("product_id", "name", "description", "price", "stock", "barcode",
+                  "category", "category_id", "created_at")
+CONTENT_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+
+class RejectedRow(Exception):
+    pass
+
+
+# ---------------------
+# RECORDS
+# ---------------------
+def iter_records(lines, fmt):
+    """Yield (line number, dict or None) from an iterable of CSV or JSON Lines text."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_no, None
+            continue
+        yield line_no, record if isinstance(record, dict) else None
+
+
+def format_from_name(name, default="csv"):
+    if name and name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if name and name.endswith(".csv"):
+        return "csv"
+    return default
+
+
+class CategoryResolver:
+    """Category name/id lookups from one in-memory copy of the categories table."""
+
+    def __init__(self, conn, placeholder, create_missing=False):
+        self.conn = conn
+        self.placeholder = placeholder
+        self.create_missing = create_missing
+        self.created = 0
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT category_id, name FROM categories")
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        self.ids = {category_id for category_id, _ in rows}
+        self.by_name = {name.strip().lower(): category_id for category_id, name in rows}
+
+    def resolve(self, category_id, name):
+        if category_id not in (None, ""):
+            try:
+                category_id = int(category_id)
+            except (TypeError, ValueError):
+                raise RejectedRow("category_id must be an integer") from None
+            if category_id not in self.ids:
+                raise RejectedRow(f"unknown category_id {category_id}")
+            return category_id
+
+        name = "" if name is None else str(name).strip()
+        if not name:
+            raise RejectedRow("missing category")
+        if len(name) > MAX_LENGTHS["category"]:
+            raise RejectedRow(f"category longer than {MAX_LENGTHS['category']} characters")
+        category_id = self.by_name.get(name.lower())
+        if category_id is None:
+            if not self.create_missing:
+                raise RejectedRow(f"unknown category {name!r}")
+            category_id = self._create(name)
+        return category_id
+
+    def _create(self, name):
+        # committed on its own: no product rows are pending while records
+        # are being resolved, and a later failed batch mustn't undo it
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(f"INSERT INTO categories (name) VALUES ({self.placeholder})", (name,))
+            category_id = cursor.lastrowid
+            self.conn.commit()
+        finally:
+            cursor.close()
+        self.ids.add(category_id)
+        self.by_name[name.lower()] = category_id
+        self.created += 1
+        return category_id
+
+
+def clean_product(record, categories):
+    """Validate one record; returns a tuple in INSERT_COLUMNS order."""
+    if record is None:
+        raise RejectedRow("not a valid record")
+
+    def text(key):
+        value = record.get(key)
+        value = "" if value is None else str(value).strip()
+        if len(value) > MAX_LENGTHS.get(key, len(value)):
+            raise RejectedRow(f"{key} longer than {MAX_LENGTHS[key]} characters")
+        return value or None
+
+    name = text("name")
+    if not name:
+        raise RejectedRow("missing name")
+
+    price = record.get("price")
+    if price in (None, ""):
+        raise RejectedRow("missing price")
+    try:
+        price = Decimal(str(price).strip()).quantize(Decimal("0.01"))
+    except (InvalidOperation, ValueError):
+        raise RejectedRow("price must be a number") from None
+    if not price.is_finite() or price < 0 or price > MAX_PRICE:
+        raise RejectedRow(f"price must be between 0 and {MAX_PRICE}")
+
+    stock = record.get("stock")
+    if stock in (None, ""):
+        stock = 0
+    try:
+        stock = int(stock)
+    except (TypeError, ValueError):
+        raise RejectedRow("stock must be an integer") from None
+    if stock < 0:
+        raise RejectedRow("stock cannot be negative")
+
+    category_id = categories.resolve(record.get("category_id"), record.get("category"))
+    return (category_id, name, text("description"), price, stock, text("barcode"))
+
+
+# ---------------------
+# IMPORT
+# ---------------------
+class ProductImport:
+    """Counts and the per-row error report of one import."""
+
+    def __init__(self, on_error=None, max_errors=1000):
+        self.on_error = on_error
+        self.max_errors = max_errors
+        self.inserted = 0
+        self.rejected = 0
+        self.errors = []  # first max_errors of {"line", "error"}
+        self.categories_created = 0
+        self.elapsed = 0.0
+
+    def reject(self, line_no, reason):
+        self.rejected += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line_no, "error": reason})
+        if self.on_error is not None:
+            self.on_error(line_no, reason)
+
+    def summary(self):
+        rows = self.inserted + self.rejected
+        return {
+            "inserted": self.inserted,
+            "rejected": self.rejected,
+            "categories_created": self.categories_created,
+            "seconds": round(self.elapsed, 3),
+            "rows_per_second": round(rows / self.elapsed) if self.elapsed else None,
+            "errors": self.errors,
+            "errors_truncated": self.rejected > len(self.errors),
+        }
+
+
+def insert_batch(conn, sql, batch, result):
+    """batch is a list of (line number, row tuple)."""
+    if not batch:
+        return
+    cursor = conn.cursor()
+    try:
+        # mysql.connector sends this as one multi-row INSERT
+        cursor.executemany(sql, [row for _, row in batch])
+        conn.commit()
+        result.inserted += len(batch)
+        return
+    except (mysql.connector.Error, sqlite3.Error):
+        conn.rollback()
+    finally:
+        cursor.close()
+
+    # something in the batch was refused; find it row by row
+    cursor = conn.cursor()
+    try:
+        for line_no, row in batch:
+            try:
+                cursor.execute(sql, row)
+                conn.commit()
+                result.inserted += 1
+            except (mysql.connector.Error, sqlite3.Error) as e:
+                conn.rollback()
+                result.reject(line_no, str(e))
+    finally:
+        cursor.close()
+
+
+def import_products(conn, dialect, records, batch_size=BATCH_SIZE, create_categories=False,
+                    on_error=None, max_errors=1000, result=None):
+    """
+    Insert (line number, record) pairs; returns a ProductImport.
+
+    Batches are committed as they go. Pass `result` to keep the counts of
+    what was committed if the import raises partway.
+    """
+    placeholder = "?" if dialect == "sqlite" else "%s"
+    sql = (f"INSERT INTO products ({', '.join(INSERT_COLUMNS)}) "
+           f"VALUES ({', '.join([placeholder] * len(INSERT_COLUMNS))})")
+    if result is None:
+        result = ProductImport(on_error, max_errors)
+    categories = CategoryResolver(conn, placeholder, create_categories)
+    started = time.perf_counter()
+
+    batch = []
+    try:
+        for line_no, record in records:
+            try:
+                row = clean_product(record, categories)
+            except RejectedRow as e:
+                result.reject(line_no, str(e))
+                continue
+            if dialect == "sqlite":
+                # sqlite3 has no Decimal adapter
+                row = row[:3] + (str(row[3]),) + row[4:]
+            batch.append((line_no, row))
+            if len(batch) >= batch_size:
+                insert_batch(conn, sql, batch, result)
+                batch = []
+        insert_batch(conn, sql, batch, result)
+    finally:
+        result.categories_created = categories.created
+        result.elapsed = time.perf_counter() - started
+    return result
+
+
+# ---------------------
+# EXPORT
+# ---------------------
+def iter_products(conn, dialect, page_size=EXPORT_PAGE):
+    """Yield export rows (dicts) in product_id order, one page at a time."""
+    placeholder = "?" if dialect == "sqlite" else "%s"
+    sql = f"""
+        SELECT p.product_id, p.name, p.description, p.price, p.stock, p.barcode,
+               c.name AS category, p.category_id, p.created_at
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.category_id
+        WHERE p.product_id > {placeholder}
+        ORDER BY p.product_id
+        LIMIT {int(page_size)}
+    """
+    last_id = 0
+    while True:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, (last_id,))
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        # each page is its own read; don't keep a snapshot open in between
+        conn.commit()
+        for row in rows:
+            yield dict(zip(EXPORT_COLUMNS, row))
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1][0]
+
+
+def export_products(conn, dialect, fmt, page_size=EXPORT_PAGE):
+    """Yield the export as text chunks (one per page) in CSV or JSON Lines."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer:
+        writer.writerow(EXPORT_COLUMNS)
+
+    count = 0
+    for product in iter_products(conn, dialect, page_size):
+        price = product["price"]
+        product["price"] = str(price) if price is not None else None
+        if product["created_at"] is not None and not isinstance(product["created_at"], str):
+            product["created_at"] = product["created_at"].isoformat(sep=" ")
+        if writer:
+            writer.writerow([product[c] for c in EXPORT_COLUMNS])
+        else:
+            buffer.write(json.dumps(product, ensure_ascii=False) + "\n")
+        count += 1
+        if count % page_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def connect(sqlite_path=None):
+    if sqlite_path:
+        return sqlite3.connect(sqlite_path), "sqlite"
+    return mysql.connector.connect(host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME), "mysql"
+
+
+def run_export(conn, dialect, path, fmt):
+    out = sys.stdout if path == "-" else open(path, "w", newline="", encoding="utf-8")
+    started = time.perf_counter()
+    try:
+        for chunk in export_products(conn, dialect, fmt):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if out is not sys.stdout:
+        print(f"✅ Exported products to {path} in {time.perf_counter() - started:.1f}s")
+
+
+def run_import(conn, dialect, path, fmt, batch_size, create_categories, errors_path):
+    errors_file = open(errors_path, "w", newline="") if errors_path else None
+    on_error = None
+    if errors_file:
+        errors = csv.writer(errors_file)
+        errors.writerow(["line", "error"])
+        on_error = lambda line_no, error: errors.writerow([line_no, error])
+
+    source = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        result = import_products(conn, dialect, iter_records(source, fmt), batch_size=batch_size,
+                                 create_categories=create_categories, on_error=on_error)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if errors_file:
+            errors_file.close()
+
+    rate = result.summary()["rows_per_second"] or 0
+    print(f"✅ {result.inserted:,} products imported, {result.rejected:,} rejected, "
+          f"{result.categories_created} categories created in {result.elapsed:.1f}s ({rate:,} rows/s)")
+    for error in result.errors[:10]:
+        print(f"   line {error['line']}: {error['error']}")
+    if result.rejected > 10 and not errors_path:
+        print("   Re-run with --errors PATH for the full list.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk product import/export (CSV or JSON Lines)")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("path", help='file to read or write, "-" for stdin/stdout')
+    parser.add_argument("--format", choices=CONTENT_TYPES,
+                        help="default: from the file extension, csv for stdin/stdout")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="rows per INSERT/transaction")
+    parser.add_argument("--create-categories", action="store_true",
+                        help="create categories that don't exist yet instead of rejecting the row")
+    parser.add_argument("--errors", metavar="PATH", help="write every rejected row (line, error) as CSV")
+    parser.add_argument("--sqlite", metavar="PATH", help="use a SQLite file instead of MySQL")
+    args = parser.parse_args()
+    fmt = args.format or format_from_name(args.path)
+
+    conn, dialect = connect(args.sqlite)
+    try:
+        if args.command == "export":
+            run_export(conn, dialect, args.path, fmt)
+        else:
+            run_import(conn, dialect, args.path, fmt, args.batch, args.create_categories, args.errors)
+    finally:
+        conn.close()
@@ -0,0 +1,74 @@
+# query_executor.py
+#
+# Runs independent read-only queries concurrently, each on its own pooled
+# connection, so an analytics endpoint takes as long as its slowest query
+# rather than the sum of all of them.
+#
+#   results, timings = executor.run({
+#       "top": ("SELECT ...", (), "all"),
+#       "totals": ("SELECT ...", (since,), "one"),
+#   }, deadline=5)
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class QueryDeadlineExceeded(Exception):
+    def __init__(self, pending):
+        super().__init__(f"Queries did not finish in time: {', '.join(sorted(pending))}")
+        self.pending = pending
+
+
+class ParallelQueryExecutor:
+
+    def __init__(self, pool, max_workers=8):
+        self.pool = pool
+        self._threads = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="analytics-query")
+
+    def _run_one(self, sql, params, fetch):
+        start = time.perf_counter()
+        conn = self.pool.acquire()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(sql, params)
+                rows = cursor.fetchone() if fetch == "one" else cursor.fetchall()
+            finally:
+                cursor.close()
+        finally:
+            conn.close()
+        return rows, time.perf_counter() - start
+
+    def run(self, queries, deadline=None):
+        """
+        Execute {name: (sql, params, "all" | "one")} and return
+        ({name: rows}, {name: seconds}).
+
+        Raises QueryDeadlineExceeded if anything is still running after
+        `deadline` seconds; the stragglers finish in the background and
+        return their connections to the pool. The first query error is
+        re-raised once all queries have completed.
+        """
+        # each query runs in a copy of the caller's context so per-request
+        # instrumentation still sees it
+        futures = {
+            self._threads.submit(contextvars.copy_context().run, self._run_one, sql, params, fetch): name
+            for name, (sql, params, fetch) in queries.items()
+        }
+        done, pending = wait(futures, timeout=deadline)
+        if pending:
+            for future in pending:
+                future.cancel()
+            raise QueryDeadlineExceeded([futures[f] for f in pending])
+
+        results, timings = {}, {}
+        for future, name in futures.items():
+            results[name], timings[name] = future.result()
+        return results, timings
+
+
+def server_timing_header(timings):
+    """Format per-query timings for a Server-Timing response header."""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
@@ -0,0 +1,258 @@
+# query_profiler.py
+#
+# Per-statement profiling for every query that goes through the pool.
+#
+# InstrumentedCursor reports each statement to QueryProfiler.record(), which
+# folds it into a per-fingerprint aggregate (literals and IN lists stripped,
+# so "WHERE id = 7" and "WHERE id = 9" are the same statement). Statements
+# slower than `explain_threshold` have their plan sampled with EXPLAIN on a
+# background thread, at most once per fingerprint every `explain_interval`
+# seconds, so profiling never adds a round-trip to the request itself.
+# Plans that read a table with access type ALL are flagged as full scans.
+#
+# report() returns the top-N fingerprints by total time; if `report_path` is
+# set the same report is rewritten there every `report_interval` seconds
+# ("{pid}" in the path is replaced so each worker process gets its own file).
+
+import json
+import os
+import queue
+import re
+import threading
+import time
+from functools import lru_cache
+
+# leading keyword of statements EXPLAIN accepts; WITH covers CTE queries
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\([^)]*\)s|%s|\?")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES\s*\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*",
+                          re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql):
+    """Normalise a statement so calls that differ only in values group together."""
+    text = " ".join(sql.split())
+    text = _STRING.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _IN_LIST.sub("IN (...)", text)
+    text = _VALUES_LIST.sub("VALUES (...)", text)
+    return text
+
+
+def full_scans(plan):
+    """Tables an EXPLAIN plan reads with a full table scan."""
+    return sorted({
+        row["table"] for row in plan
+        if isinstance(row, dict) and row.get("type") == "ALL" and row.get("table")
+    })
+
+
+class QueryStats:
+
+    def __init__(self, sample):
+        self.sample = sample
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.slow = 0
+        self.plan = None
+        self.full_scans = []
+        self.explained_at = None
+
+
+class QueryProfiler:
+
+    def __init__(self, connect, explain_threshold=0.1, explain_interval=300.0,
+                 report_path=None, report_interval=60.0, top=20):
+        self._connect = connect
+        self.explain_threshold = explain_threshold
+        self.explain_interval = explain_interval
+        self.report_path = report_path
+        self.report_interval = report_interval
+        self.top = top
+
+        self._stats = {}  # fingerprint -> QueryStats
+        self._lock = threading.Lock()
+        self._explain_queue = queue.Queue(maxsize=100)
+        self._worker = None
+
+    # ---------------------
+    # CURSOR HOOKS
+    # ---------------------
+    def record(self, cursor, sql, params, seconds, rows):
+        if not isinstance(sql, str) or sql.lstrip()[:7].upper() == "EXPLAIN":
+            return
+        if self.report_path:
+            self._ensure_worker()
+        key = fingerprint(sql)
+        explain = False
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = QueryStats(" ".join(sql.split()))
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            if rows is not None and rows > 0:
+                stats.rows += rows
+
+            if seconds >= self.explain_threshold:
+                stats.slow += 1
+                now = time.monotonic()
+                if (stats.explained_at is None or now - stats.explained_at > self.explain_interval) \
+                        and key.split(" ", 1)[0].upper() in EXPLAINABLE:
+                    stats.explained_at = now
+                    explain = True
+
+        if explain:
+            # executemany: explain the first parameter set
+            if isinstance(params, list) and params and isinstance(params[0], (tuple, list, dict)):
+                params = params[0]
+            self._ensure_worker()
+            try:
+                self._explain_queue.put_nowait((key, sql, params))
+            except queue.Full:
+                pass
+
+    def record_rows(self, sql, rows):
+        # rows read through fetchall()/fetchone(); unbuffered SELECTs report
+        # rowcount -1 at execute time
+        if not isinstance(sql, str):
+            return
+        key = fingerprint(sql)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is not None:
+                stats.rows += rows
+
+    # ---------------------
+    # REPORTING
+    # ---------------------
+    def report(self, top=None):
+        with self._lock:
+            ranked = sorted(self._stats.items(), key=lambda item: item[1].total, reverse=True)
+            total_time = sum(stats.total for _, stats in ranked)
+            statements = [
+                {
+                    "fingerprint": key,
+                    "sample": stats.sample,
+                    "count": stats.count,
+                    "total_ms": round(stats.total * 1000, 2),
+                    "avg_ms": round(stats.total * 1000 / stats.count, 3),
+                    "max_ms": round(stats.max * 1000, 2),
+                    "rows": stats.rows,
+                    "rows_per_call": round(stats.rows / stats.count, 1),
+                    "slow_calls": stats.slow,
+                    "full_scans": stats.full_scans,
+                    "plan": stats.plan,
+                }
+                for key, stats in ranked[:top or self.top]
+            ]
+            flagged = sorted(key for key, stats in self._stats.items() if stats.full_scans)
+
+        return {
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "fingerprints": len(ranked),
+            "total_ms": round(total_time * 1000, 2),
+            "full_scan_fingerprints": flagged,
+            "statements": statements,
+        }
+
+    def write_report(self, path=None):
+        path = (path or self.report_path).replace("{pid}", str(os.getpid()))
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.report(), f, indent=2, default=str)
+        # replace in one step so readers never see a half-written file
+        os.replace(tmp, path)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    # ---------------------
+    # BACKGROUND WORKER
+    # ---------------------
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name="query-profiler", daemon=True)
+            self._worker.start()
+
+    def stop(self, timeout=5.0):
+        """Drop queued EXPLAINs and wait for the worker to exit (before fork)."""
+        worker = self._worker
+        if worker is None or not worker.is_alive():
+            return
+        while True:
+            try:
+                self._explain_queue.get_nowait()
+            except queue.Empty:
+                break
+        # the worker may be mid-EXPLAIN; the sentinel is picked up after it
+        self._explain_queue.put(None)
+        worker.join(timeout)
+
+    def reset_after_fork(self):
+        """In a forked child: the parent's worker thread and locks don't carry over."""
+        self._lock = threading.Lock()
+        self._explain_queue = queue.Queue(maxsize=100)
+        self._worker = None
+
+    def _run(self):
+        next_report = time.monotonic() + self.report_interval
+        while True:
+            timeout = max(0.0, next_report - time.monotonic()) if self.report_path else None
+            try:
+                item = self._explain_queue.get(timeout=timeout)
+            except queue.Empty:
+                pass
+            else:
+                if item is None:
+                    return  # stop()
+                key, sql, params = item
+                try:
+                    self._explain(key, sql, params)
+                except Exception:
+                    pass  # never let a bad plan kill the worker
+
+            if self.report_path and time.monotonic() >= next_report:
+                try:
+                    self.write_report()
+                except OSError:
+                    pass
+                next_report = time.monotonic() + self.report_interval
+
+    def _explain(self, key, sql, params):
+        try:
+            conn = self._connect()
+        except Exception:
+            return
+        try:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute("EXPLAIN " + sql, params or ())
+                plan = cursor.fetchall()
+            finally:
+                cursor.close()
+        except Exception as e:
+            plan = [{"error": str(e)}]
+        finally:
+            conn.close()
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is not None:
+                stats.plan = plan
+                stats.full_scans = full_scans(plan)
@@ -0,0 +1,162 @@
+# rollups.py
+#
+# Pre-aggregated sales tables behind /admin/sales-analytics.
+#
+#   sales_daily_rollup     (sale_date, shard, order_count, items_sold, revenue, completed_revenue)
+#   sales_product_rollup   (product_id, quantity, revenue, order_count)
+#   sales_category_rollup  (category_id, shard, quantity, revenue, order_count)
+#
+# create_order calls record_order_rollups() inside its transaction, so the
+# dashboard reads a handful of small rows instead of scanning order_items.
+# Every order touches today's daily row and its categories' rows, which
+# stay locked until the order commits; those two tables are therefore
+# split into ROLLUP_SHARDS rows per key, picked by order_id, so concurrent
+# checkouts rarely wait on each other. Readers SUM over the shards. (The
+# product rows need no sharding: create_order already holds the product's
+# row lock from reserve_stock.)
+# Categories are attributed as they were when the order was placed
+# (order_items.category_id). The product and category rollups count
+# completed orders only, like the association counts; the daily rollup
+# counts every order and keeps completed revenue apart. To backfill (or
+# after editing orders by hand):
+#
+#   python rollups.py rebuild
+
+import os
+import sys
+
+import mysql.connector
+
+# ---------- CONFIG ----------
+DB_HOST = os.environ.get("DB_HOST", "localhost")
+DB_USER = os.environ.get("DB_USER", "root")
+DB_PASS = os.environ.get("DB_PASS", "")
+DB_NAME = os.environ.get("DB_NAME", "supershop")
+# ---------------------------
+
+ROLLUP_SHARDS = 16
+
+
+def record_order_rollups(cursor, order_id, lines, status="completed"):
+    """
+    Fold one new order into the rollups.
+
+    `lines` is a list of (product_id, category_id, quantity, price).
+    """
+    items_sold = sum(quantity for _, _, quantity, _ in lines)
+    revenue = sum(quantity * price for _, _, quantity, price in lines)
+    completed_revenue = revenue if status == "completed" else 0
+    shard = order_id % ROLLUP_SHARDS
+
+    # date taken from the order row so it matches DATE(orders.created_at)
+    cursor.execute("""
+        INSERT INTO sales_daily_rollup
+            (sale_date, shard, order_count, items_sold, revenue, completed_revenue)
+        SELECT DATE(created_at), %s, 1, %s, %s, %s
+        FROM orders
+        WHERE order_id = %s
+        ON DUPLICATE KEY UPDATE
+            order_count = order_count + 1,
+            items_sold = items_sold + VALUES(items_sold),
+            revenue = revenue + VALUES(revenue),
+            completed_revenue = completed_revenue + VALUES(completed_revenue)
+    """, (shard, items_sold, revenue, completed_revenue, order_id))
+
+    if status != "completed":
+        return
+
+    cursor.executemany("""
+        INSERT INTO sales_product_rollup (product_id, quantity, revenue, order_count)
+        VALUES (%s, %s, %s, 1)
+        ON DUPLICATE KEY UPDATE
+            quantity = quantity + VALUES(quantity),
+            revenue = revenue + VALUES(revenue),
+            order_count = order_count + 1
+    """, [(pid, quantity, quantity * price) for pid, _, quantity, price in lines])
+
+    categories = {}
+    for _, category_id, quantity, price in lines:
+        if category_id is None:
+            continue
+        qty, rev = categories.get(category_id, (0, 0))
+        categories[category_id] = (qty + quantity, rev + quantity * price)
+
+    if categories:
+        cursor.executemany("""
+            INSERT INTO sales_category_rollup (category_id, shard, quantity, revenue, order_count)
+            VALUES (%s, %s, %s, %s, 1)
+            ON DUPLICATE KEY UPDATE
+                quantity = quantity + VALUES(quantity),
+                revenue = revenue + VALUES(revenue),
+                order_count = order_count + 1
+        """, [(cid, shard, qty, rev) for cid, (qty, rev) in categories.items()])
+
+
+def rebuild_rollups(conn):
+    """Recompute all rollup tables from orders/order_items in one transaction."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM sales_daily_rollup")
+        cursor.execute("DELETE FROM sales_product_rollup")
+        cursor.execute("DELETE FROM sales_category_rollup")
+
+        cursor.execute("""
+            INSERT INTO sales_daily_rollup
+                (sale_date, order_count, items_sold, revenue, completed_revenue)
+            SELECT
+                DATE(o.created_at),
+                COUNT(DISTINCT o.order_id),
+                COALESCE(SUM(oi.quantity), 0),
+                COALESCE(SUM(oi.quantity * oi.price), 0),
+                COALESCE(SUM(CASE WHEN o.status = 'completed' THEN oi.quantity * oi.price END), 0)
+            FROM orders o
+            LEFT JOIN order_items oi ON oi.order_id = o.order_id
+            GROUP BY DATE(o.created_at)
+        """)
+
+        cursor.execute("""
+            INSERT INTO sales_product_rollup (product_id, quantity, revenue, order_count)
+            SELECT
+                oi.product_id,
+                SUM(oi.quantity),
+                SUM(oi.quantity * oi.price),
+                COUNT(DISTINCT oi.order_id)
+            FROM order_items oi
+            JOIN orders o ON o.order_id = oi.order_id
+            WHERE oi.product_id IS NOT NULL AND o.status = 'completed'
+            GROUP BY oi.product_id
+        """)
+
+        cursor.execute("""
+            INSERT INTO sales_category_rollup (category_id, quantity, revenue, order_count)
+            SELECT
+                COALESCE(oi.category_id, p.category_id) AS category_id,
+                SUM(oi.quantity),
+                SUM(oi.quantity * oi.price),
+                COUNT(DISTINCT oi.order_id)
+            FROM order_items oi
+            JOIN orders o ON o.order_id = oi.order_id
+            LEFT JOIN products p ON p.product_id = oi.product_id
+            WHERE o.status = 'completed'
+              AND COALESCE(oi.category_id, p.category_id) IS NOT NULL
+            GROUP BY COALESCE(oi.category_id, p.category_id)
+        """)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("usage: python rollups.py rebuild")
+
+    conn = mysql.connector.connect(host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME)
+    try:
+        rebuild_rollups(conn)
+        print("✅ Rebuilt sales rollups")
+    finally:
+        conn.close()
@@ -0,0 +1,199 @@
+# search_index.py
+#
+# In-memory inverted index over products for /products/search.
+#
+# Every product is tokenized over name, description, barcode and category
+# name. Each token maps to {product_id: field weight}; a sorted token list
+# allows prefix lookups so the last word of a query works as typeahead.
+# Results are ranked by summed field weights (exact token hits count more
+# than prefix hits) with ties broken by name.
+#
+# The index also keeps a barcode -> product_id hash map for the POS scanning
+# fast path; it shares the product dicts so stock updates apply to both.
+#
+# build() indexes into fresh structures and swaps them in under the lock, so
+# a periodic rebuild doesn't block searches while it runs.
+
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+FIELD_WEIGHTS = {
+    "barcode": 5.0,
+    "name": 3.0,
+    "category": 2.0,
+    "description": 1.0,
+}
+PREFIX_FACTOR = 0.6
+MIN_PREFIX_LENGTH = 2
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+
+class ProductSearchIndex:
+
+    def __init__(self):
+        self._postings = defaultdict(dict)  # token -> {product_id: weight}
+        self._tokens = []                   # sorted, for prefix search
+        self._doc_tokens = {}               # product_id -> set(tokens)
+        self.products = {}                  # product_id -> product dict
+        self._barcodes = {}                 # barcode -> product_id
+        self._lock = threading.RLock()
+        self.ready = False
+        self.built_at = None  # time.monotonic() of the last build()
+
+    # ---------------------
+    # BUILD / UPDATE
+    # ---------------------
+    def build(self, products):
+        fresh = ProductSearchIndex()
+        for product in products:
+            fresh._index(product)
+        with self._lock:
+            self._postings = fresh._postings
+            self._doc_tokens = fresh._doc_tokens
+            self.products = fresh.products
+            self._barcodes = fresh._barcodes
+            self._tokens = sorted(self._postings)
+            self.built_at = time.monotonic()
+            self.ready = True
+
+    def add(self, product):
+        with self._lock:
+            self.remove(product["id"])
+            new_tokens = self._index(product)
+            for token in new_tokens:
+                i = bisect_left(self._tokens, token)
+                if i == len(self._tokens) or self._tokens[i] != token:
+                    insort(self._tokens, token)
+
+    def remove(self, product_id):
+        with self._lock:
+            for token in self._doc_tokens.pop(product_id, ()):
+                postings = self._postings.get(token)
+                if postings is None:
+                    continue
+                postings.pop(product_id, None)
+                if not postings:
+                    del self._postings[token]
+                    i = bisect_left(self._tokens, token)
+                    if i < len(self._tokens) and self._tokens[i] == token:
+                        del self._tokens[i]
+            product = self.products.pop(product_id, None)
+            if product is not None and self._barcodes.get(product.get("barcode")) == product_id:
+                del self._barcodes[product["barcode"]]
+
+    def update_stock(self, product_id, stock):
+        with self._lock:
+            product = self.products.get(product_id)
+            if product is not None:
+                self.products[product_id] = dict(product, stock=stock)
+
+    def adjust_stock(self, product_id, delta):
+        with self._lock:
+            product = self.products.get(product_id)
+            if product is not None:
+                self.products[product_id] = dict(product, stock=(product.get("stock") or 0) + delta)
+
+    def _index(self, product):
+        # returns the tokens that are new to the index
+        product_id = product["id"]
+        weights = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(product.get(field)):
+                weights[token] = max(weights[token], weight)
+
+        new_tokens = []
+        for token, weight in weights.items():
+            if token not in self._postings:
+                new_tokens.append(token)
+            self._postings[token][product_id] = weight
+
+        self._doc_tokens[product_id] = set(weights)
+        self.products[product_id] = product
+        if product.get("barcode"):
+            self._barcodes[product["barcode"]] = product_id
+        return new_tokens
+
+    # ---------------------
+    # QUERY
+    # ---------------------
+    def search(self, query, limit=20, in_stock=False):
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            term_maps = []
+            for n, term in enumerate(terms):
+                postings = self._postings.get(term, {})
+                # only the last word of the query is treated as a prefix
+                if n == len(terms) - 1:
+                    prefix = self._prefix(term)
+                    if prefix:
+                        for product_id, weight in postings.items():
+                            if weight > prefix.get(product_id, 0):
+                                prefix[product_id] = weight
+                        postings = prefix
+                if not postings:
+                    return []
+                term_maps.append(postings)
+
+            # walk the rarest term and probe the others (AND semantics)
+            term_maps.sort(key=len)
+            rarest, others = term_maps[0], term_maps[1:]
+            products = self.products
+            hits = []
+            for product_id, score in rarest.items():
+                for postings in others:
+                    weight = postings.get(product_id)
+                    if weight is None:
+                        break
+                    score += weight
+                else:
+                    product = products[product_id]
+                    if in_stock and (product.get("stock") or 0) <= 0:
+                        continue
+                    hits.append((score, product))
+
+        top = heapq.nsmallest(limit, hits, key=lambda hit: (-hit[0], hit[1].get("name") or ""))
+        return [dict(product, score=round(score, 2)) for score, product in top]
+
+    def by_barcode(self, barcode):
+        product_id = self._barcodes.get(barcode)
+        if product_id is None:
+            return None
+        return self.products.get(product_id)
+
+    def _prefix(self, term):
+        matches = {}
+        if len(term) < MIN_PREFIX_LENGTH:
+            return matches
+        i = bisect_left(self._tokens, term)
+        while i < len(self._tokens) and self._tokens[i].startswith(term):
+            token = self._tokens[i]
+            if token != term:
+                for product_id, weight in self._postings[token].items():
+                    weight *= PREFIX_FACTOR
+                    if weight > matches.get(product_id, 0):
+                        matches[product_id] = weight
+            i += 1
+        return matches
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "products": len(self.products),
+                "tokens": len(self._tokens),
+                "barcodes": len(self._barcodes),
+            }
@@ -0,0 +1,393 @@
+# seed.py
+#
+# Deterministic synthetic data for load testing and benchmarks.
+#
+# Generates users, categories, products, orders (with items and payments),
+# carts and one admin, with Zipf-distributed product popularity: a handful
+# of products appear in most orders, the long tail rarely. The same --seed
+# always produces the same rows. Rows are written in multi-row INSERT
+# batches and orders are generated in chunks, so memory stays flat at
+# millions of rows.
+#
+#   python seed.py --scale medium --reset --rebuild     # MySQL (DB_* env vars)
+#   python seed.py --scale small --sqlite /tmp/shop.db  # SQLite stand-in
+#
+# Every seeded user's password is SEED_PASSWORD; the admin logs in as
+# SEED_ADMIN_EMAIL. Benchmarks import seed_database() directly.
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+import mysql.connector
+from werkzeug.security import generate_password_hash
+
+# ---------- CONFIG ----------
+DB_HOST = os.environ.get("DB_HOST", "localhost")
+DB_USER = os.environ.get("DB_USER", "root")
+DB_PASS = os.environ.get("DB_PASS", "")
+DB_NAME = os.environ.get("DB_NAME", "supershop")
+# ---------------------------
+
+SEED_PASSWORD = "password123"
+SEED_ADMIN_EMAIL = "seed-admin@example.com"
+
+SCALES = {
+    "small": {"users": 1_000, "products": 500, "orders": 10_000},
+    "medium": {"users": 50_000, "products": 5_000, "orders": 500_000},
+    "large": {"users": 1_000_000, "products": 50_000, "orders": 5_000_000},
+}
+
+BATCH_SIZE = 5_000
+ORDER_CHUNK = 10_000
+EPOCH = datetime(2024, 1, 1)
+HISTORY_MINUTES = 2 * 365 * 24 * 60
+
+CATEGORY_NAMES = [
+    "Rice & Grains", "Lentils & Pulses", "Oil & Ghee", "Spices", "Dairy", "Bakery",
+    "Fruits", "Vegetables", "Meat & Fish", "Snacks", "Beverages", "Tea & Coffee",
+    "Household", "Personal Care", "Baby Care", "Frozen Food",
+]
+FIRST_NAMES = ["Rahim", "Karim", "Ayesha", "Fatima", "Nusrat", "Tanvir", "Sadia", "Imran",
+               "Farhan", "Mitu", "Rafi", "Sumaiya", "Arif", "Nabila", "Hasan", "Jannat"]
+LAST_NAMES = ["Ahmed", "Hossain", "Rahman", "Islam", "Chowdhury", "Khan", "Akter", "Sarker"]
+CITIES = ["Dhaka", "Chattogram", "Khulna", "Rajshahi", "Sylhet", "Barishal", "Rangpur", "Mymensingh"]
+ADJECTIVES = ["Fresh", "Premium", "Organic", "Classic", "Family", "Daily", "Golden", "Pure"]
+NOUNS = ["Rice", "Atta", "Dal", "Oil", "Milk", "Bread", "Biscuits", "Juice", "Tea", "Soap",
+         "Shampoo", "Noodles", "Chips", "Sugar", "Salt", "Honey", "Butter", "Cheese"]
+STATUSES = ["completed"] * 7 + ["pending", "processing", "cancelled"]
+PAYMENT_METHODS = ["cash", "card", "bkash", "nagad", "rocket", "online"]
+
+SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT NOT NULL UNIQUE,
+        phone TEXT, address TEXT, password_hash TEXT NOT NULL,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, role TEXT DEFAULT 'user'
+    );
+    CREATE TABLE IF NOT EXISTS admin_users (
+        admin_id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES users(user_id)
+    );
+    CREATE TABLE IF NOT EXISTS categories (
+        category_id INTEGER PRIMARY KEY, name TEXT NOT NULL, description TEXT
+    );
+    CREATE TABLE IF NOT EXISTS products (
+        product_id INTEGER PRIMARY KEY, category_id INTEGER REFERENCES categories(category_id),
+        name TEXT NOT NULL, description TEXT, price NUMERIC NOT NULL, stock INTEGER DEFAULT 0,
+        barcode TEXT, created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS orders (
+        order_id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users(user_id),
+        total NUMERIC NOT NULL, status TEXT DEFAULT 'pending',
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS order_items (
+        order_item_id INTEGER PRIMARY KEY, order_id INTEGER REFERENCES orders(order_id),
+        product_id INTEGER REFERENCES products(product_id), category_id INTEGER,
+        quantity INTEGER NOT NULL, price NUMERIC NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS payments (
+        payment_id INTEGER PRIMARY KEY, order_id INTEGER NOT NULL REFERENCES orders(order_id),
+        amount NUMERIC NOT NULL, method TEXT NOT NULL, transaction_reference TEXT,
+        paid_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS cart (
+        cart_id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users(user_id),
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS cart_items (
+        cart_item_id INTEGER PRIMARY KEY, cart_id INTEGER REFERENCES cart(cart_id),
+        product_id INTEGER REFERENCES products(product_id), quantity INTEGER NOT NULL DEFAULT 1
+    );
+    CREATE INDEX IF NOT EXISTS idx_orders_user_created ON orders (user_id, created_at, order_id);
+    CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id);
+    CREATE INDEX IF NOT EXISTS idx_order_items_product_order ON order_items (product_id, order_id);
+    CREATE INDEX IF NOT EXISTS idx_cart_user ON cart (user_id);
+    CREATE INDEX IF NOT EXISTS idx_cart_items_cart_product ON cart_items (cart_id, product_id);
+    CREATE INDEX IF NOT EXISTS idx_products_barcode ON products (barcode);
+"""
+
+# children first, so a reset never trips a foreign key
+RESET_ORDER = [
+    "product_pair_counts", "product_order_counts",
+    "sales_daily_rollup", "sales_product_rollup", "sales_category_rollup",
+    "payments", "order_items", "orders", "cart_items", "cart", "admin_users",
+    "products", "categories", "users",
+]
+
+
+# ---------------------
+# DISTRIBUTIONS
+# ---------------------
+def zipf_cum_weights(n, s):
+    """Cumulative weights for ranks 1..n with P(rank k) proportional to 1 / k**s."""
+    return list(accumulate(1.0 / (k ** s) for k in range(1, n + 1)))
+
+
+class ZipfPicker:
+    """Draws ids with Zipf popularity; which id gets which rank is shuffled by `rng`."""
+
+    def __init__(self, ids, s, rng):
+        self.ids = list(ids)
+        rng.shuffle(self.ids)
+        self.cum_weights = zipf_cum_weights(len(self.ids), s)
+
+    def pick(self, rng, k=1):
+        return rng.choices(self.ids, cum_weights=self.cum_weights, k=k)
+
+    def most_popular(self):
+        return self.ids[0]
+
+
+def random_timestamp(rng):
+    return (EPOCH + timedelta(minutes=rng.randrange(HISTORY_MINUTES))).strftime("%Y-%m-%d %H:%M:%S")
+
+
+# ---------------------
+# WRITING
+# ---------------------
+class Writer:
+    """Multi-row batched inserts for MySQL or SQLite connections."""
+
+    def __init__(self, conn, dialect):
+        self.conn = conn
+        self.dialect = dialect
+        self.placeholder = "?" if dialect == "sqlite" else "%s"
+        self.rows_written = 0
+
+    def insert(self, table, columns, rows):
+        if not rows:
+            return
+        sql = (f"INSERT INTO {table} ({', '.join(columns)}) "
+               f"VALUES ({', '.join([self.placeholder] * len(columns))})")
+        cursor = self.conn.cursor()
+        try:
+            # mysql.connector rewrites executemany INSERTs into one multi-row statement
+            for start in range(0, len(rows), BATCH_SIZE):
+                cursor.executemany(sql, rows[start:start + BATCH_SIZE])
+        finally:
+            cursor.close()
+        self.conn.commit()
+        self.rows_written += len(rows)
+
+    def scalar(self, sql):
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(sql)
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+
+    def next_id(self, table, column):
+        return (self.scalar(f"SELECT COALESCE(MAX({column}), 0) FROM {table}") or 0) + 1
+
+    def set_bulk_mode(self, enabled):
+        if self.dialect != "mysql":
+            return
+        # unique checks stay on: the email key must still reject duplicates
+        cursor = self.conn.cursor()
+        cursor.execute(f"SET foreign_key_checks = {0 if enabled else 1}")
+        cursor.close()
+
+    def reset(self):
+        cursor = self.conn.cursor()
+        try:
+            for table in RESET_ORDER:
+                try:
+                    cursor.execute(f"DELETE FROM {table}")
+                except (mysql.connector.Error, sqlite3.Error):
+                    pass  # optional tables (rollups, associations) may not exist yet
+            self.conn.commit()
+        finally:
+            cursor.close()
+
+
+# ---------------------
+# GENERATION
+# ---------------------
+def seed_database(conn, dialect="mysql", users=1_000, products=500, orders=10_000,
+                  carts=0.3, zipf=1.1, seed=42, reset=False, log=print):
+    """
+    Seed `conn` and return a summary with id ranges and handy sample ids
+    (hot_product_id, busiest_user_id, cart_user_id) for benchmarks.
+
+    `carts` is the fraction of users who get an active cart.
+    """
+    rng = random.Random(seed)
+    writer = Writer(conn, dialect)
+    started = time.perf_counter()
+
+    if dialect == "sqlite":
+        conn.executescript(SQLITE_SCHEMA)
+    if reset:
+        writer.reset()
+
+    writer.set_bulk_mode(True)
+    try:
+        # one real hash shared by every seeded user keeps seeding fast
+        password_hash = generate_password_hash(SEED_PASSWORD)
+
+        # categories
+        category_start = writer.next_id("categories", "category_id")
+        category_ids = list(range(category_start, category_start + len(CATEGORY_NAMES)))
+        writer.insert("categories", ["category_id", "name", "description"], [
+            (cid, name, f"{name} (seeded)") for cid, name in zip(category_ids, CATEGORY_NAMES)
+        ])
+
+        # users (the first one is the admin, unless an earlier run created it)
+        with_admin = not writer.scalar(f"SELECT COUNT(*) FROM users WHERE email = '{SEED_ADMIN_EMAIL}'")
+        user_start = writer.next_id("users", "user_id")
+        user_ids = range(user_start, user_start + users)
+        for chunk_start in range(0, users, ORDER_CHUNK):
+            rows = []
+            for i in range(chunk_start, min(chunk_start + ORDER_CHUNK, users)):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                is_admin = with_admin and i == 0
+                email = SEED_ADMIN_EMAIL if is_admin else f"{first.lower()}.{last.lower()}.{user_start + i}@example.com"
+                rows.append((
+                    user_start + i, f"{first} {last}", email,
+                    f"017{rng.randrange(10 ** 8):08d}", rng.choice(CITIES), password_hash,
+                    random_timestamp(rng), "admin" if is_admin else "user",
+                ))
+            writer.insert("users", ["user_id", "name", "email", "phone", "address",
+                                    "password_hash", "created_at", "role"], rows)
+        if with_admin:
+            writer.insert("admin_users", ["user_id"], [(user_start,)])
+
+        # products
+        product_start = writer.next_id("products", "product_id")
+        product_ids = range(product_start, product_start + products)
+        prices = {}
+        rows = []
+        for pid in product_ids:
+            price = round(min(5000.0, rng.lognormvariate(4.5, 0.9)), 2)
+            prices[pid] = price
+            rows.append((
+                pid, rng.choice(category_ids),
+                f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {pid}",
+                f"Seeded product {pid}", price, rng.randrange(20, 1000),
+                f"{890000000000 + pid:013d}", random_timestamp(rng),
+            ))
+        writer.insert("products", ["product_id", "category_id", "name", "description",
+                                   "price", "stock", "barcode", "created_at"], rows)
+
+        product_picker = ZipfPicker(product_ids, zipf, rng)
+        # customers are skewed too, but less than products
+        user_picker = ZipfPicker(user_ids, 0.6, rng)
+
+        # orders, items and payments, chunk by chunk
+        order_start = writer.next_id("orders", "order_id")
+        item_id = writer.next_id("order_items", "order_item_id")
+        payment_id = writer.next_id("payments", "payment_id")
+        for chunk_start in range(0, orders, ORDER_CHUNK):
+            order_rows, item_rows, payment_rows = [], [], []
+            for i in range(chunk_start, min(chunk_start + ORDER_CHUNK, orders)):
+                order_id = order_start + i
+                created_at = random_timestamp(rng)
+                lines = {}
+                for pid in product_picker.pick(rng, k=min(products, 1 + int(rng.expovariate(0.4)))):
+                    lines[pid] = lines.get(pid, 0) + rng.randint(1, 3)
+
+                total = 0.0
+                for pid, quantity in lines.items():
+                    item_rows.append((item_id, order_id, pid, quantity, prices[pid]))
+                    total += quantity * prices[pid]
+                    item_id += 1
+                total = round(total, 2)
+
+                status = rng.choice(STATUSES)
+                order_rows.append((order_id, user_picker.pick(rng)[0], total, status, created_at))
+                if status != "cancelled":
+                    payment_rows.append((payment_id, order_id, total, rng.choice(PAYMENT_METHODS),
+                                         f"TXN{order_id:010d}", created_at))
+                    payment_id += 1
+
+            writer.insert("orders", ["order_id", "user_id", "total", "status", "created_at"], order_rows)
+            writer.insert("order_items", ["order_item_id", "order_id", "product_id", "quantity", "price"],
+                          item_rows)
+            writer.insert("payments", ["payment_id", "order_id", "amount", "method",
+                                       "transaction_reference", "paid_at"], payment_rows)
+            done = min(chunk_start + ORDER_CHUNK, orders)
+            if done % (ORDER_CHUNK * 10) == 0 or done == orders:
+                log(f"  {done}/{orders} orders")
+
+        # active carts
+        cart_start = writer.next_id("cart", "cart_id")
+        cart_item_id = writer.next_id("cart_items", "cart_item_id")
+        cart_users = [uid for uid in user_ids if rng.random() < carts]
+        cart_rows, cart_item_rows = [], []
+        for offset, uid in enumerate(cart_users):
+            cart_id = cart_start + offset
+            cart_rows.append((cart_id, uid, random_timestamp(rng)))
+            for pid in set(product_picker.pick(rng, k=rng.randint(1, 5))):
+                cart_item_rows.append((cart_item_id, cart_id, pid, rng.randint(1, 4)))
+                cart_item_id += 1
+        writer.insert("cart", ["cart_id", "user_id", "created_at"], cart_rows)
+        writer.insert("cart_items", ["cart_item_id", "cart_id", "product_id", "quantity"], cart_item_rows)
+    finally:
+        writer.set_bulk_mode(False)
+
+    elapsed = time.perf_counter() - started
+    log(f"✅ Seeded {writer.rows_written} rows in {elapsed:.1f}s "
+        f"({writer.rows_written / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    return {
+        "seed": seed,
+        "users": (user_start, user_start + users - 1),
+        "products": (product_start, product_start + products - 1),
+        "orders": (order_start, order_start + orders - 1),
+        "admin_email": SEED_ADMIN_EMAIL,
+        "password": SEED_PASSWORD,
+        "admin_user_id": user_start,
+        "hot_product_id": product_picker.most_popular(),
+        "busiest_user_id": user_picker.most_popular(),
+        "cart_user_id": cart_users[0] if cart_users else None,
+        "cart_id": cart_start if cart_users else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed the supershop database with synthetic data")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--products", type=int)
+    parser.add_argument("--orders", type=int)
+    parser.add_argument("--carts", type=float, default=0.3, help="fraction of users with an active cart")
+    parser.add_argument("--zipf", type=float, default=1.1, help="product popularity skew")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="delete existing rows first")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="rebuild association counts and sales rollups afterwards (MySQL)")
+    parser.add_argument("--sqlite", metavar="PATH", help="write to a SQLite file instead of MySQL")
+    args = parser.parse_args()
+
+    counts = dict(SCALES[args.scale])
+    for name in counts:
+        if getattr(args, name) is not None:
+            counts[name] = getattr(args, name)
+
+    if args.sqlite:
+        conn = sqlite3.connect(args.sqlite)
+        dialect = "sqlite"
+    else:
+        conn = mysql.connector.connect(host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME)
+        dialect = "mysql"
+
+    try:
+        summary = seed_database(conn, dialect, carts=args.carts, zipf=args.zipf, seed=args.seed,
+                                reset=args.reset, **counts)
+        if args.rebuild:
+            if dialect != "mysql":
+                sys.exit("--rebuild needs MySQL")
+            from associations import rebuild_associations
+            from rollups import rebuild_rollups
+            rebuild_associations(conn)
+            rebuild_rollups(conn)
+            print("✅ Rebuilt purchase associations and sales rollups")
+        print(f"Admin login: {summary['admin_email']} / {summary['password']}")
+    finally:
+        conn.close()
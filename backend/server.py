@@ -1,36 +1,104 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-import mysql.connector
-
-app = Flask(__name__)
-CORS(app)
-
-# Create MySQL connection
-db = mysql.connector.connect(
-    host="localhost",
-    user="root",
-    password="",
-    database="supershop"
-)
-
-@app.route("/login", methods=["POST"])
-def login():
-    data = request.json
-    email = data.get("email")
-    password = data.get("password")
-
-    cursor = db.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM users WHERE email=%s AND password=%s", (email, password))
-    user = cursor.fetchone()
-
-    if user:
-        return jsonify({"success": True, "user": user})
-    else:
-        return jsonify({"success": False, "message": "Invalid login"})
+# server.py
+#
+# Single entry point for running the backend.
+#
+#   python server.py --dev                 # Flask dev server with reloader
+#   python server.py                       # production: preforked gunicorn workers
+#   python server.py --workers 8 --bind 0.0.0.0:5000
+#
+# Production mode loads app.py once in the master, warms it up (search
+# index, catalog cache) and closes its DB connections before forking, so
+# every worker starts with warm shared memory and its own connection pool.
+# The total connection budget (DB_MAX_CONNECTIONS) is split across workers.
+#
+# Signals (sent to the master):
+#   HUP          restart workers gracefully; they fork from the preloaded
+#                master, so app.py and its environment are NOT re-read
+#   USR2, WINCH  zero-downtime code reload: start a new master with the new
+#                code, then let the old one drain its workers (the new master
+#                inherits this one's environment: env config needs a restart)
+#   TERM         graceful shutdown
+
+import argparse
+import multiprocessing
+import os
+
+# ---------- CONFIG ----------
+DEFAULT_BIND = os.environ.get("BIND", "127.0.0.1:5000")
+DEFAULT_WORKERS = int(os.environ.get("WEB_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+DEFAULT_THREADS = int(os.environ.get("WEB_THREADS", 4))
+DB_MAX_CONNECTIONS = int(os.environ.get("DB_MAX_CONNECTIONS", 100))
+GRACEFUL_TIMEOUT = int(os.environ.get("GRACEFUL_TIMEOUT", 30))
+# ---------------------------
+
+
+def size_db_pool(workers, threads):
+    """Split the connection budget across workers before app.py builds its pool."""
+    per_worker = max(1, DB_MAX_CONNECTIONS // workers)
+    # every thread can hold one connection; anything above that is overflow
+    size = min(threads, per_worker)
+    os.environ.setdefault("DB_POOL_SIZE", str(size))
+    os.environ.setdefault("DB_POOL_MAX_OVERFLOW", str(max(0, per_worker - size)))
+
+
+def run_production(bind, workers, threads):
+    from gunicorn.app.base import BaseApplication
+
+    size_db_pool(workers, threads)
+
+    class SuperShopServer(BaseApplication):
+
+        def load_config(self):
+            self.cfg.set("bind", bind)
+            self.cfg.set("workers", workers)
+            self.cfg.set("threads", threads)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("preload_app", True)
+            self.cfg.set("graceful_timeout", GRACEFUL_TIMEOUT)
+            self.cfg.set("post_fork", post_fork)
+
+        def load(self):
+            import app as backend
+
+            backend.warm_up()
+            # connections must not be shared across fork: stop the profiler's
+            # EXPLAIN thread (it checks connections out of the pool) before
+            # closing what the pool holds
+            backend.query_profiler.stop()
+            backend.db_pool.close_all()
+            in_use = backend.db_pool.stats()["in_use"]
+            if in_use:
+                backend.app.logger.warning("%d database connection(s) still checked out before fork", in_use)
+            return backend.app
+
+    def post_fork(server, worker):
+        import app as backend
+
+        # anything the master still held belongs to the master
+        backend.db_pool.reset_after_fork()
+        backend.query_profiler.reset_after_fork()
+        backend.catalog_cache.reset_boot_id()
+
+    SuperShopServer().run()
+
+
+def run_dev(bind):
+    import app as backend
+
+    host, _, port = bind.partition(":")
+    print(f"🚀 Flask backend running on http://{host}:{port}")
+    backend.app.run(host=host, port=int(port or 5000), debug=True)
 
-@app.route("/")
-def home():
-    return "Backend Running!"
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dev", action="store_true", help="run the Flask development server")
+    parser.add_argument("--bind", default=DEFAULT_BIND)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS)
+    args = parser.parse_args()
+
+    if args.dev:
+        run_dev(args.bind)
+    else:
+        run_production(args.bind, args.workers, args.threads)
@@ -0,0 +1,230 @@
+# stock.py
+#
+# Concurrency-safe stock mutations shared by create_order and the admin
+# stock endpoints.
+#
+# - Orders lock their product rows with SELECT ... FOR UPDATE in ascending
+#   product_id order, so two orders touching the same products always queue
+#   on the same first row instead of deadlocking on each other.
+# - Admin adjustments are a single relative UPDATE guarded by the
+#   non-negative check, so there is no read-then-write window to lose.
+# - Bulk adjustments (receiving a delivery) lock their rows the same way as
+#   orders, then load the deltas into a temporary table and update every
+#   product by joining on it: a fixed handful of statements whatever the
+#   number of SKUs, and all or nothing if any product would go negative.
+# - If InnoDB still picks us as a deadlock victim (or a lock wait times
+#   out), with_deadlock_retry() rolls back and re-runs the transaction.
+
+import random
+import time
+
+import mysql.connector
+
+# ER_LOCK_DEADLOCK, ER_LOCK_WAIT_TIMEOUT
+RETRYABLE_ERRNOS = (1213, 1205)
+
+
+class InsufficientStock(Exception):
+    def __init__(self, shortages):
+        super().__init__("Insufficient stock")
+        self.shortages = shortages
+
+
+class ProductNotFound(Exception):
+    pass
+
+
+class NegativeStock(Exception):
+    pass
+
+
+def merge_order_lines(items):
+    """Collapse client line items into {product_id: quantity}; raises ValueError."""
+    quantities = {}
+    for item in items:
+        product_id = int(item['product_id'])
+        quantity = int(item['quantity'])
+        if quantity <= 0:
+            raise ValueError("Quantities must be positive")
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def with_deadlock_retry(conn, work, attempts=4, base_delay=0.02):
+    """Run work() (one full transaction, including commit) with retry on deadlock."""
+    for attempt in range(attempts):
+        try:
+            return work()
+        except mysql.connector.Error as e:
+            if e.errno not in RETRYABLE_ERRNOS or attempt == attempts - 1:
+                raise
+            conn.rollback()
+            # exponential backoff with jitter so the retries don't collide again
+            time.sleep(base_delay * (2 ** attempt) * (1 + random.random()))
+
+
+def reserve_stock(cursor, quantities):
+    """
+    Lock the ordered products and decrement their stock in one UPDATE.
+
+    Returns {product_id: row} (price, category_id) read under the same locks.
+    Raises InsufficientStock (nothing is changed) if any product is missing or
+    short.
+    """
+    product_ids = sorted(quantities)
+    placeholders = ", ".join(["%s"] * len(product_ids))
+
+    cursor.execute(f"""
+        SELECT product_id, category_id, price, stock
+        FROM products
+        WHERE product_id IN ({placeholders})
+        ORDER BY product_id
+        FOR UPDATE
+    """, product_ids)
+    rows = {row['product_id']: row for row in cursor.fetchall()}
+
+    shortages = [
+        {
+            "product_id": pid,
+            "requested": quantities[pid],
+            "available": rows[pid]['stock'] if pid in rows else None
+        }
+        for pid in product_ids
+        if pid not in rows or rows[pid]['stock'] < quantities[pid]
+    ]
+    if shortages:
+        raise InsufficientStock(shortages)
+
+    case_sql = " ".join(["WHEN %s THEN %s"] * len(product_ids))
+    case_params = [v for pid in product_ids for v in (pid, quantities[pid])]
+    cursor.execute(f"""
+        UPDATE products
+        SET stock = stock - (CASE product_id {case_sql} END)
+        WHERE product_id IN ({placeholders})
+    """, case_params + product_ids)
+
+    return rows
+
+
+def adjust_product_stock(cursor, product_id, delta):
+    """Apply a relative stock change atomically and return the new stock."""
+    cursor.execute("""
+        UPDATE products
+        SET stock = stock + %s
+        WHERE product_id = %s AND stock + %s >= 0
+    """, (delta, product_id, delta))
+    changed = cursor.rowcount
+
+    # same transaction, so this sees our own write
+    cursor.execute("SELECT stock FROM products WHERE product_id = %s", (product_id,))
+    row = cursor.fetchone()
+    if row is None:
+        raise ProductNotFound(product_id)
+    if changed == 0 and delta != 0:
+        raise NegativeStock(product_id)
+    return row['stock']
+
+
+class BulkStockRejected(Exception):
+    def __init__(self, results):
+        super().__init__("Stock adjustment rejected")
+        self.results = results
+
+
+# Per-connection scratch table for apply_stock_deltas; MEMORY, since it
+# only ever holds one request's rows.
+STOCK_DELTAS_TABLE_SQL = """
+    CREATE TEMPORARY TABLE IF NOT EXISTS stock_deltas (
+        product_id INT NOT NULL PRIMARY KEY,
+        delta INT NOT NULL
+    ) ENGINE=MEMORY
+"""
+
+
+def resolve_barcodes(cursor, barcodes):
+    """{barcode: [product_id, ...]} for the given barcodes, in one query."""
+    if not barcodes:
+        return {}
+    barcodes = sorted(set(barcodes))
+    placeholders = ", ".join(["%s"] * len(barcodes))
+    cursor.execute(f"SELECT product_id, barcode FROM products WHERE barcode IN ({placeholders})", barcodes)
+    matches = {}
+    for row in cursor.fetchall():
+        matches.setdefault(row['barcode'], []).append(row['product_id'])
+    return matches
+
+
+def apply_stock_deltas(cursor, items):
+    """
+    Apply [{"product_id" | "barcode": ..., "delta": int}, ...] in one
+    set-based UPDATE, within the caller's transaction.
+
+    Deltas for the same product are summed. Returns one result per item, in
+    order, with the product's stock before and after the whole batch.
+    Raises BulkStockRejected (nothing is changed) with the same per-item
+    results if any product is unknown or would end up below zero.
+    """
+    matches = resolve_barcodes(cursor, [item['barcode'] for item in items if 'barcode' in item])
+
+    results = []
+    totals = {}
+    for index, item in enumerate(items):
+        result = dict(item, index=index)
+        if 'barcode' in item:
+            product_ids = matches.get(item['barcode'], [])
+            if len(product_ids) != 1:
+                result['error'] = "Unknown barcode" if not product_ids else "Barcode matches several products"
+                results.append(result)
+                continue
+            result['product_id'] = product_ids[0]
+        totals[result['product_id']] = totals.get(result['product_id'], 0) + item['delta']
+        results.append(result)
+
+    # lock the rows by primary key in product_id order, like reserve_stock
+    # (a join would lock in whatever order the plan visits them), then
+    # load the deltas once and update by joining on them
+    cursor.execute(STOCK_DELTAS_TABLE_SQL)
+    cursor.execute("DELETE FROM stock_deltas")
+    rows = []
+    if totals:
+        product_ids = sorted(totals)
+        placeholders = ", ".join(["%s"] * len(product_ids))
+        cursor.execute(f"""
+            SELECT product_id, stock
+            FROM products
+            WHERE product_id IN ({placeholders})
+            ORDER BY product_id
+            FOR UPDATE
+        """, product_ids)
+        rows = cursor.fetchall()
+        cursor.executemany("INSERT INTO stock_deltas (product_id, delta) VALUES (%s, %s)", sorted(totals.items()))
+    stock = {row['product_id']: row['stock'] for row in rows}
+
+    rejected = False
+    for result in results:
+        if 'error' in result:
+            rejected = True
+            continue
+        product_id = result['product_id']
+        if product_id not in stock:
+            result['error'] = "Product not found"
+            rejected = True
+            continue
+        result['old_stock'] = stock[product_id]
+        result['new_stock'] = stock[product_id] + totals[product_id]
+        if result['new_stock'] < 0:
+            result['error'] = "Stock cannot be negative"
+            rejected = True
+
+    if rejected:
+        cursor.execute("DELETE FROM stock_deltas")
+        raise BulkStockRejected(results)
+
+    if totals:
+        cursor.execute("""
+            UPDATE products p
+            JOIN stock_deltas d ON d.product_id = p.product_id
+            SET p.stock = p.stock + d.delta
+        """)
+        cursor.execute("DELETE FROM stock_deltas")
+    return results
@@ -0,0 +1,45 @@
+# test_auth.py
+#
+# Session token checks that need no database.
+#
+#   python -m pytest backend/tests
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from auth import InvalidToken, SessionTokens
+
+
+@pytest.fixture
+def tokens():
+    return SessionTokens("test-secret", ttl=60)
+
+
+def test_round_trip(tokens):
+    token, _ = tokens.issue(7, "admin")
+    claims = tokens.verify(token)
+    assert (claims["uid"], claims["role"]) == (7, "admin")
+
+
+@pytest.mark.parametrize("token", ["", "abc", "abc.", ".abc", "abc.d\xe9f", "\xe9.\xe9", "a.b.c", "abc.d\udcff"])
+def test_malformed_token_is_invalid(tokens, token):
+    with pytest.raises(InvalidToken):
+        tokens.verify(token)
+
+
+def test_revoked_token_is_invalid(tokens):
+    token, _ = tokens.issue(7, "user")
+    tokens.revoke(tokens.verify(token))
+    with pytest.raises(InvalidToken):
+        tokens.verify(token)
+
+
+def test_non_ascii_bearer_does_not_break_public_routes():
+    import app as backend
+
+    response = backend.app.test_client().get("/metrics", headers={"Authorization": "Bearer abc.d\xe9f"})
+    assert response.status_code == 200
@@ -54,6 +54,7 @@ function AddProductModal({ isOpen, onClose, onProductAdded }) {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          Authorization: `Bearer ${localStorage.getItem('token')}`,
         },
         body: JSON.stringify({
           ...formData,
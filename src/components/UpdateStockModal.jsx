@@ -22,6 +22,7 @@ function UpdateStockModal({ isOpen, onClose, product, onStockUpdated }) {
         method: 'PUT',
         headers: {
           'Content-Type': 'application/json',
+          Authorization: `Bearer ${localStorage.getItem('token')}`,
         },
         body: JSON.stringify({
           stock_change: change
@@ -21,7 +21,9 @@ function AdminAnalyticsPage() {
 
   const fetchAnalytics = async () => {
     try {
-      const response = await fetch('http://127.0.0.1:5000/admin/sales-analytics');
+      const response = await fetch('http://127.0.0.1:5000/admin/sales-analytics', {
+        headers: { Authorization: `Bearer ${localStorage.getItem('token')}` },
+      });
       const data = await response.json();
       
       if (data.success) {
@@ -82,7 +82,7 @@ function RegisterPage({ onNavigate, onRegister }) {
 
         // Store user + a token if you want
         localStorage.setItem('user', JSON.stringify(data.user));
-        localStorage.setItem('token', `token-${data.user.user_id}`);
+        localStorage.setItem('token', data.token);
 
         onRegister(data.user);
         setIsLoading(false);
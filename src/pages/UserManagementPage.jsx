@@ -13,7 +13,9 @@ function UserManagementPage() {
 
   const fetchUsers = async () => {
     try {
-      const response = await fetch('http://127.0.0.1:5000/admin/users');
+      const response = await fetch('http://127.0.0.1:5000/admin/users', {
+        headers: { Authorization: `Bearer ${localStorage.getItem('token')}` },
+      });
       const data = await response.json();
       
       if (data.success) {
@@ -37,6 +39,7 @@ function UserManagementPage() {
         method: 'PUT',
         headers: {
           'Content-Type': 'application/json',
+          Authorization: `Bearer ${localStorage.getItem('token')}`,
         },
         body: JSON.stringify({
           role: newRole